@@ -2,8 +2,19 @@
 #  author : Vojtech Coupek - xcoupe01
 
 import argparse
+import bisect
+import hashlib
+import io
+import json
+import marshal
+import operator
+import os
 import re
+import stat
 import sys
+import threading
+import time
+import types
 import xml.etree.ElementTree as xml
 
 # --- variables and constants ---
@@ -23,7 +34,16 @@ ERR_BADVAL_OP = 57  # < bad value of operand
 ERR_STRFAULT = 58  # < restricted string operations
 ERR_INTERNAL = 99  # < internal fault
 
-debug = False  # < print debug prints
+COMPILED_MAGIC = b'IPPcode20 compiled\n'  # < header of files with compiled program
+TRANSPILED_MAGIC = b'# IPPcode20 transpiled\n'  # < header of files with program transpiled to python
+OUTPUT_BUFFER_SIZE = 65536  # < default size of the output buffer (in characters)
+INPUT_BLOCK_SIZE = 1048576  # < size of blocks the input files are read by (in characters)
+SAMPLE_INTERVAL = 0.005  # < interval of the sampling profiler (in seconds)
+JIT_THRESHOLD = 50  # < number of backward jumps after which the loop is traced
+JIT_TRACE_LENGTH = 1000  # < maximal number of lines of a trace
+
+intPattern = re.compile(r'^[-]?\d+$')  # < valid int in the input and in the XML
+floatPattern = re.compile(r'^[0-9.abcdefABCDEF+\-px]*$')  # < valid float in the input and in the XML
 
 rules = [
     # base functions
@@ -93,50 +113,457 @@ rules = [
     ['BREAK']
 ]
 
+# operand kinds of each opcode from the rules table, the opcode is the key
+ruleTable = {rule_line[0]: rule_line[1:] for rule_line in rules}
+
+# table of methods of class Interpret executing each opcode
+# the method is bound to every instruction once, before the interpretation starts
+handlers = {
+    # base functions
+    'MOVE': 'execMove',
+    'CREATEFRAME': 'execCreateFrame',
+    'PUSHFRAME': 'execPushFrame',
+    'POPFRAME': 'execPopFrame',
+    'DEFVAR': 'execDefVar',
+    'CALL': 'execCall',
+    'RETURN': 'execReturn',
+    # stack operations
+    'PUSHS': 'execPushs',
+    'POPS': 'execPops',
+    # STACK extension
+    'CLEARS': 'execClears',
+    'ADDS': 'execAdds',
+    'SUBS': 'execSubs',
+    'MULS': 'execMuls',
+    'IDIVS': 'execIdivs',
+    'LTS': 'execLts',
+    'GTS': 'execGts',
+    'EQS': 'execEqs',
+    'ANDS': 'execAnds',
+    'ORS': 'execOrs',
+    'NOTS': 'execNots',
+    'INT2CHARS': 'execInt2Chars',
+    'STRI2INTS': 'execStri2Ints',
+    'INT2FLOATS': 'execInt2Floats',
+    'FLOAT2INTS': 'execFloat2Ints',
+    'JUMPIFEQS': 'execJumpIfEqs',
+    'JUMPIFNEQS': 'execJumpIfNeqs',
+    # arithmetical operations, logical operation, conversions
+    'ADD': 'execAdd',
+    'SUB': 'execSub',
+    'MUL': 'execMul',
+    'IDIV': 'execIdiv',
+    'LT': 'execLt',
+    'GT': 'execGt',
+    'EQ': 'execEq',
+    'AND': 'execAnd',
+    'OR': 'execOr',
+    'NOT': 'execNot',
+    'INT2CHAR': 'execInt2Char',
+    'STRI2INT': 'execStri2Int',
+    'INT2FLOAT': 'execInt2Float',
+    'FLOAT2INT': 'execFloat2Int',
+    'DIV': 'execDiv',
+    'DIVS': 'execDivs',
+    # input output operations
+    'READ': 'execRead',
+    'WRITE': 'execWrite',
+    # string operations
+    'CONCAT': 'execConcat',
+    'STRLEN': 'execStrLen',
+    'GETCHAR': 'execGetChar',
+    'SETCHAR': 'execSetChar',
+    # type operations
+    'TYPE': 'execType',
+    # jump operations
+    'LABEL': 'execLabel',
+    'JUMP': 'execJump',
+    'JUMPIFEQ': 'execJumpIfEq',
+    'JUMPIFNEQ': 'execJumpIfNeq',
+    'EXIT': 'execExit',
+    # debuging operations
+    'DPRINT': 'execDprint',
+    'BREAK': 'execBreak'
+}
+
+
+# stack operations fused by Interpret.fuseInstructions, opcode is the key and opcode
+# of the operation computing the result (see operateSymbols) is the value
+stackOperations = {
+    'ADDS': 'ADD',
+    'SUBS': 'SUB',
+    'MULS': 'MUL',
+    'IDIVS': 'IDIV',
+    'DIVS': 'DIV',
+    'LTS': 'LT',
+    'GTS': 'GT',
+    'EQS': 'EQ'
+}
+
+
+# opcodes whose result depends only on their operands, lines of these opcodes with
+# constant operands are folded by the Optimizer
+foldableOpcodes = ['ADD', 'SUB', 'MUL', 'IDIV', 'DIV', 'LT', 'GT', 'EQ', 'AND', 'OR', 'NOT', 'INT2CHAR',
+                   'STRI2INT', 'INT2FLOAT', 'FLOAT2INT', 'CONCAT', 'STRLEN', 'GETCHAR', 'TYPE']
+
+
+# opcodes which end recording of trace by TraceJit, they change frames or the call stack
+# or need exact number of executed instructions
+untraceableOpcodes = ['DEFVAR', 'CREATEFRAME', 'PUSHFRAME', 'POPFRAME', 'CALL', 'RETURN', 'EXIT', 'BREAK']
+
+
+# table of methods of class ClosureCompiler making closures of the opcodes, closures
+# of opcodes missing in the table call their handlers
+closureMakers = {
+    'LABEL': 'closeLabel',
+    'MOVE': 'closeMove',
+    'DEFVAR': 'closeDefVar',
+    'ADD': 'closeArithmetic',
+    'SUB': 'closeArithmetic',
+    'MUL': 'closeArithmetic',
+    'IDIV': 'closeArithmetic',
+    'DIV': 'closeArithmetic',
+    'LT': 'closeCompare',
+    'GT': 'closeCompare',
+    'EQ': 'closeCompare',
+    'AND': 'closeLogic',
+    'OR': 'closeLogic',
+    'NOT': 'closeNot',
+    'WRITE': 'closeWrite',
+    'PUSHS': 'closePushs',
+    'POPS': 'closePops',
+    'JUMP': 'closeJump',
+    'JUMPIFEQ': 'closeJumpIf',
+    'JUMPIFNEQ': 'closeJumpIf',
+    'JUMPIFEQS': 'closeJumpIfStack',
+    'JUMPIFNEQS': 'closeJumpIfStack',
+    'CALL': 'closeCall',
+    'RETURN': 'closeReturn'
+}
+
 
 # --- objects ---
 
+class InterpretError(Exception):
+    # error of the interpretation, code is the exit code from the table above
+    # every kind of error has its own subclass, message says where the error occurred
+    code = ERR_INTERNAL
+
+    def __init__(self, message=''):
+        super().__init__(message)
+        self.message = message
+
+
+class ParamError(InterpretError):
+    code = ERR_PARAM
+
+
+class InputFileError(InterpretError):
+    code = ERR_IN_FILES
+
+
+class OutputFileError(InterpretError):
+    code = ERR_OUT_FILES
+
+
+class XmlFormatError(InterpretError):
+    code = ERR_FORMAT_XML
+
+
+class XmlStructureError(InterpretError):
+    code = ERR_STRUCT_XML
+
+
+class SemanticError(InterpretError):
+    code = ERR_SEMFAULT
+
+
+class OperandTypeError(InterpretError):
+    code = ERR_BADTYPE_OP
+
+
+class UndefinedVariableError(InterpretError):
+    code = ERR_UNDEF_VAR
+
+
+class FrameError(InterpretError):
+    code = ERR_NOTDEF_FR
+
+
+class MissingValueError(InterpretError):
+    code = ERR_NOVAL_VAR
+
+
+class OperandValueError(InterpretError):
+    code = ERR_BADVAL_OP
+
+
+class StringError(InterpretError):
+    code = ERR_STRFAULT
+
+
+class InternalError(InterpretError):
+    code = ERR_INTERNAL
+
+
+class ProgramExit(Exception):
+    # raised to end the interpretation before the end of code with given exit code
+    # (instruction EXIT, help printed by command line interface)
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+class Nil:
+    # type of the IPPcode20 nil@nil value, the only instance is NIL below
+    __slots__ = ()
+
+    def __repr__(self):
+        return 'nil'
+
+
+NIL = Nil()
+
+
+class StrBuf:
+    # mutable string value of a variable, used when CONCAT appends to the same variable
+    # and by SETCHAR, so building of a string does not copy the whole string every time
+    # parts is array of appended texts, after the first SETCHAR it is array of single
+    # characters (chars is True), so characters can be set in place
+    # string is the joined value (None when parts changed since the last join), the value
+    # is converted to str whenever it is observed (WRITE, EQ, MOVE, PUSHS, ...)
+    __slots__ = ('parts', 'chars', 'length', 'string')
+
+    def __init__(self, text):
+        self.parts = [text]
+        self.chars = False
+        self.length = len(text)
+        self.string = text
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if self.chars:
+            return self.parts[index]
+        return self.text()[index]
+
+    def __str__(self):
+        return self.text()
+
+    # returns the value as str
+    # @return the joined string
+    def text(self):
+        if self.string is None:
+            self.string = ''.join(self.parts)
+            if not self.chars:
+                self.parts = [self.string]
+        return self.string
+
+    # appends text to the end of the value
+    # @param text is the appended text
+    def append(self, text):
+        if self.chars:
+            self.parts.extend(text)
+        else:
+            self.parts.append(text)
+        self.length += len(text)
+        self.string = None
+
+    # sets one character of the value
+    # @param index is index of the character (must be in range of the value)
+    # @param char is the new character
+    def setChar(self, index, char):
+        if not self.chars:
+            self.parts = list(self.text())
+            self.chars = True
+        self.parts[index] = char
+        self.string = None
+
+
+class VarOperand:
+    # decoded variable operand, frame ('GF', 'LF' or 'TF') and name are split
+    # when the program is loaded, so there is no need to parse the string again
+    # slot is index of the variable in the array of the frame (set by Interpret.resolveSlots,
+    # None for operands made outside of the program, they are looked up by name)
+    kind = 'var'
+    __slots__ = ('frame', 'name', 'slot')
+
+    def __init__(self, frame, name):
+        self.frame = frame
+        self.name = name
+        self.slot = None
+
+    def __str__(self):
+        return self.frame + '@' + self.name
+
+    def compiled(self):
+        return 'var', self.frame, self.name
+
+
+class ConstOperand:
+    # decoded constant operand, holds its type and already decoded native value
+    # ('int' - int, 'float' - float, 'bool' - bool, 'string' - str, 'nil' - NIL)
+    kind = 'const'
+    __slots__ = ('type', 'value')
+
+    def __init__(self, const_type, const_value):
+        self.type = const_type
+        self.value = const_value
+
+    def __str__(self):
+        return self.type + '@' + valueToDebugString(self.type, self.value)
+
+    def compiled(self):
+        return 'const', self.type, None if self.value is NIL else self.value
+
+
+class LabelOperand:
+    # decoded label operand
+    kind = 'label'
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    def compiled(self):
+        return self.kind, self.name
+
+
+class TypeOperand:
+    # decoded type operand (used by READ)
+    kind = 'type'
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __str__(self):
+        return self.name
+
+    def compiled(self):
+        return self.kind, self.name
+
+
+class Instruction:
+    # one decoded line of IPPcode20 - opcode and array of decoded operands
+    # handler is method of Interpret executing the opcode (set by Interpret.resolveHandlers)
+    # checkVars are variables that must be defined before the line is executed and
+    # target is line of the label operand (both set by Interpret.checkLineRules)
+    # fused is tuple of the following lines executed together with this line by
+    # superinstruction handler (set by Interpret.fuseInstructions)
+    __slots__ = ('opcode', 'args', 'handler', 'checkVars', 'target', 'fused')
+
+    def __init__(self, opcode):
+        self.opcode = opcode
+        self.args = []
+        self.handler = None
+        self.checkVars = ()
+        self.target = None
+        self.fused = None
+
+    def __str__(self):
+        return self.opcode + ' ' + ' '.join(str(arg) for arg in self.args)
+
+
+class Variable:
+    # one variable stored in frame, holds type and native value of the variable
+    # variable which was defined but not set yet has type 'undef' and value None
+    __slots__ = ('type', 'value')
+
+    def __init__(self):
+        self.type = 'undef'
+        self.value = None
+
+
 class Frame:
-    # Frame is object, that holds variable, its types and values
-    # for each variable there is created item in every of three arrays
-    # vars array contains name of variable
-    # types array contains type of variable
-    # values array contains value of variable
-    # one variable is defined on the same index in all three fields
+    # Frame is object, that holds variables, their types and values
+    # vars is dictionary, where name of variable is the key and object Variable
+    # holding type and value of the variable is the value
+    # slots is array of the same variables, index is slot of the name in layout (dictionary
+    # shared by all frames of the same kind, name is the key and slot is the value, see
+    # Interpret.resolveSlots), variable which is not defined has None in its slot or its slot
+    # is behind the end of the array (array grows as the variables are defined)
+    # site is CREATEFRAME line that created the frame (see VariableStorage.createTempFrame)
     defined = False
-    vars = []
-    types = []
-    values = []
+    vars = {}
+    layout = {}
+    slots = []
+    site = None
 
-    def __init__(self, definition):
+    def __init__(self, definition, layout=None, size=None):
         self.defined = definition
-        self.vars = []
-        self.types = []
-        self.values = []
+        self.vars = {}
+        self.layout = {} if layout is None else layout
+        self.slots = [None] * (len(self.layout) if size is None else size)
+        self.site = None
 
     # Says if the frame is defined
     # @return true if defined, false otherwise
     def isDefined(self):
-        d_print("\tFRAME\tiDefined")
         return self.defined
 
     # Tries to create variable of given name
     # @err when frame is not defined or when variable is being redefined
     # @param var_name is name of variable to be created
     def createVar(self, var_name):
-        d_print("\tFRAME\tcreateVar\t" + var_name)
+        if self.defined:
+            if var_name in self.vars:
+                raise SemanticError("createVar - error variable " + var_name + " redefinition")
+            variable = self.vars[var_name] = Variable()
+            slot = self.layout.get(var_name)
+            if slot is not None:
+                slots = self.slots
+                if slot >= len(slots):
+                    slots.extend([None] * (slot + 1 - len(slots)))
+                slots[slot] = variable
+        else:
+            raise FrameError("insertVar - error accessing undefined frame")
+
+    # returns object holding type and value of the variable
+    # @err when frame is not defined or variable is undefined
+    # @param var_name is name of the variable
+    # @return object Variable if successful
+    def getVar(self, var_name):
+        if self.defined:
+            try:
+                return self.vars[var_name]
+            except KeyError:
+                raise UndefinedVariableError("getVar - error variable " + var_name + " not defined")
+        else:
+            raise FrameError("getVar - error accessing undefined frame")
+
+    # returns object holding type and value of the variable given by its slot
+    # @err when frame is not defined or variable is undefined
+    # @param slot is slot of the variable
+    # @param var_name is name of the variable
+    # @return object Variable if successful
+    def getSlot(self, slot, var_name):
         if self.defined:
             try:
-                self.vars[self.vars.index(var_name)] = [var_name + '-redefined']
-                d_print("FRAME createVar - error variable " + var_name + " redefinition")
-                exit(ERR_SEMFAULT)
-            except ValueError:
-                self.vars.append(var_name)
-                self.types.append('undef')
-                self.values.append('undef')
+                variable = self.slots[slot]
+            except IndexError:
+                variable = None
+            if variable is None:
+                raise UndefinedVariableError("getSlot - error variable " + var_name + " not defined")
+            return variable
         else:
-            d_print("FRAME insertVar - error accessing undefined frame")
-            exit(ERR_NOTDEF_FR)
+            raise FrameError("getSlot - error accessing undefined frame")
+
+    # removes all variables from the frame, so released frame can be reused as new one
+    # (the array of slots keeps its size)
+    def clear(self):
+        layout = self.layout
+        slots = self.slots
+        for var_name in self.vars:
+            slot = layout.get(var_name)
+            if slot is not None:
+                slots[slot] = None
+        self.vars = {}
 
     # Sets variable type and value based on variable name
     # @err when frame is not defined or variable is undefined
@@ -144,49 +571,23 @@ class Frame:
     # @param var_type is type that the variable is updated to
     # @param var_value is value that the variable is updated to
     def setVar(self, var_name, var_type, var_value):
-        d_print("\tFRAME\tsetVar\t" + var_name + " " + var_type + " " + repr(var_value))
-        if self.defined:
-            try:
-                self.types[self.vars.index(var_name)] = var_type
-                self.values[self.vars.index(var_name)] = var_value
-            except ValueError:
-                d_print("FRAME setVar - error variable " + var_name + " not defined")
-                exit(ERR_UNDEF_VAR)
-        else:
-            d_print("FRAME setVar - error accessing undefined frame")
-            exit(ERR_NOTDEF_FR)
+        variable = self.getVar(var_name)
+        variable.type = var_type
+        variable.value = var_value
 
     # returns type of given variable
     # @err when frame is not defined or variable is not defined
     # @param var_name is variable which type we want to know
     # @return variable type ('int', 'string' ect.) if successful
     def getVarType(self, var_name):
-        d_print("\tFRAME\tgetVarType\t" + var_name)
-        if self.defined:
-            try:
-                return self.types[self.vars.index(var_name)]
-            except ValueError:
-                d_print("FRAME getVarType - error variable " + var_name + " not defined")
-                exit(ERR_UNDEF_VAR)
-        else:
-            d_print("FRAME getVarType - error accessing undefined frame")
-            exit(ERR_NOTDEF_FR)
+        return self.getVar(var_name).type
 
     # returns value of given variable
     # @err when frame is not defined or variable is not defined
     # @param var_name is variable which value we want to know
     # @return variable value if successful
     def getVarVal(self, var_name):
-        d_print("\tFRAME\tgetVarVal\t" + var_name)
-        if self.defined:
-            try:
-                return self.values[self.vars.index(var_name)]
-            except ValueError:
-                d_print("FRAME setVar - error variable " + var_name + " not defined")
-                exit(ERR_UNDEF_VAR)
-        else:
-            d_print("FRAME getVarVal - error accessing undefined frame")
-            exit(ERR_NOTDEF_FR)
+        return self.getVar(var_name).value
 
     # returns type of given variable if it have specific value
     # @err when frame is not defined or variable is not defined or variable is not the wanted value
@@ -194,455 +595,772 @@ class Frame:
     # @param var_type is the type that we expect
     # @return variable value if successful
     def getVarValByType(self, var_name, var_type):
-        d_print("\tFRAME\tgetVarValByType\t" + var_name + " " + var_type)
-        if self.defined:
-            try:
-                if self.types[self.vars.index(var_name)] == var_type:
-                    return self.values[self.vars.index(var_name)]
-                elif self.types[self.vars.index(var_name)] == '':
-                    d_print("FRAME setVar - error variable " + var_name + " no value in variable")
-                    exit(ERR_NOVAL_VAR)
-                else:
-                    d_print("FRAME setVar - error variable " + var_name + " wrong value type")
-                    exit(ERR_BADTYPE_OP)
-            except ValueError:
-                d_print("FRAME setVar - error variable " + var_name + " not defined")
-                exit(ERR_UNDEF_VAR)
+        variable = self.getVar(var_name)
+        if variable.type == var_type:
+            return variable.value
+        elif variable.type == '':
+            raise MissingValueError("setVar - error variable " + var_name + " no value in variable")
         else:
-            d_print("FRAME getVarValByType - error accessing undefined frame")
-            exit(ERR_NOTDEF_FR)
+            raise OperandTypeError("setVar - error variable " + var_name + " wrong value type")
 
-    # debug print function, that prints all data stored in frame to stderr
-    def printAllFrame(self):
-        print('  +---------------+---------------+-------------', file=sys.stderr)
-        print('  |name \t\t|type \t\t|value', file=sys.stderr)
-        print('  +---------------+---------------+-------------')
-        for i in range(len(self.vars)):
-            print('  |' + self.vars[i] + ' \t|' + self.types[i] + ' \t|' + self.values[i], file=sys.stderr)
-        print('  +---------------+---------------+-------------', file=sys.stderr)
+    # debug print function, that writes all data stored in frame to the debug output
+    # @param output is the debug output (OutputBuffer)
+    def printAllFrame(self, output):
+        output.write('  +---------------+---------------+-------------\n')
+        output.write('  |name \t\t|type \t\t|value\n')
+        output.write('  +---------------+---------------+-------------\n')
+        for name, variable in self.vars.items():
+            output.write('  |' + name + ' \t|' + variable.type + ' \t|' +
+                         valueToDebugString(variable.type, variable.value) + '\n')
+        output.write('  +---------------+---------------+-------------\n')
 
 
 class VariableStorage:
+    # frameLayout is layout of slots of temporary and local frames (see Frame), temporary
+    # frame becomes local one, so they share the layout
+    # undefinedFrame is the temporary frame while there is none (it can't be changed)
+    # framePool is stack of released temporary frames, which are cleared and reused by
+    # createTempFrame instead of creating new ones
+    # frameSizes is number of slots the frames created by each CREATEFRAME line needed
+    # (CREATEFRAME line is the key), new frame from the line is created already sized
     GlobalFrame = Frame(True)
     TemporaryFrame = Frame(False)
     LocalFrame = []
     numLF = -1
+    frameLayout = {}
+    undefinedFrame = TemporaryFrame
+    framePool = []
+    frameSizes = {}
 
     def __init__(self):
         self.GlobalFrame = Frame(True)
         self.TemporaryFrame = Frame(False)
         self.LocalFrame = []
         self.numLF = -1
+        self.frameLayout = {}
+        self.undefinedFrame = self.TemporaryFrame
+        self.framePool = []
+        self.frameSizes = {}
+
+    # sets layouts of slots of the frames, must be set before any variable is defined
+    # @param global_layout is layout of the global frame
+    # @param frame_layout is layout of temporary and local frames
+    def setLayout(self, global_layout, frame_layout):
+        self.GlobalFrame = Frame(True, global_layout)
+        self.TemporaryFrame = Frame(False, frame_layout, 0)
+        self.frameLayout = frame_layout
+        self.undefinedFrame = self.TemporaryFrame
 
     # creates new temporary frame. If there was already one, its overwrote
-    def createTempFrame(self):
-        d_print("\tDATAS\tcreateTempFrame")
-        self.TemporaryFrame = Frame(True)
+    # @param site is CREATEFRAME line creating the frame
+    def createTempFrame(self, site=None):
+        self.releaseTempFrame()
+        if self.framePool:
+            frame = self.framePool.pop()
+        else:
+            frame = Frame(True, self.frameLayout, self.frameSizes.get(site, 0))
+        frame.site = site
+        self.TemporaryFrame = frame
+
+    # returns the temporary frame (if there is one) to the pool of frames, the frame
+    # must not be referenced anywhere else
+    def releaseTempFrame(self):
+        frame = self.TemporaryFrame
+        if frame.defined:
+            if len(frame.slots) > self.frameSizes.get(frame.site, 0):
+                self.frameSizes[frame.site] = len(frame.slots)
+            frame.clear()
+            self.framePool.append(frame)
 
     # pushes temporary frame to stack of local frames and sets it
     # to currently used local frame
     # @err when the temporary frame is not defined
     def pushLocFrame(self):
-        d_print("\tDATAS\tpushLocFrame")
         if self.TemporaryFrame.isDefined():
             self.LocalFrame.append(self.TemporaryFrame)
             self.numLF += 1
-            self.TemporaryFrame = Frame(False)
+            self.TemporaryFrame = self.undefinedFrame
         else:
-            d_print("DATAS pushLocFrame - error temporary frame not defined")
-            exit(ERR_NOTDEF_FR)
+            raise FrameError("pushLocFrame - error temporary frame not defined")
 
     # pops local frame from the local frames stack to temporary frame
     # this overwrites the temporary frame
     # @err when there is no local frame in stack
     def popLocFrame(self):
-        d_print("\tDATAS\tpopLocFrame")
         if self.numLF >= 0:
+            self.releaseTempFrame()
             self.TemporaryFrame = self.LocalFrame.pop(self.numLF)
             self.numLF -= 1
         else:
-            d_print("DATAS popLocFrame - error no local frame to be popped")
-            exit(ERR_NOTDEF_FR)
-
-    # creates var in variable storage based on the variable string from IPPcode20
-    # @err when the variable string is bad or when trying to redefine existing variable
-    # @param var_str is the variable defining string from IPPcode20
-    def createVar(self, var_str):
-        d_print("\tDATAS\tcreateVar\t" + var_str)
-        checkNameVar(var_str)
-        var = re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', var_str)
-        if var[1] == "GF":
-            self.GlobalFrame.createVar(var[2])
-        elif var[1] == "LF":
-            try:
-                self.LocalFrame[self.numLF].createVar(var[2])
-            except IndexError:
-                d_print(" DATAS createVar - error undefined frame")
-                exit(ERR_NOTDEF_FR)
-        elif var[1] == "TF":
-            try:
-                self.TemporaryFrame.createVar(var[2])
-            except IndexError:
-                d_print(" DATAS createVar - error undefined frame")
-                exit(ERR_NOTDEF_FR)
+            raise FrameError("popLocFrame - error no local frame to be popped")
+
+    # returns frame the decoded variable operand belongs to
+    # @err when the local frame is not defined
+    # @param var is the decoded variable operand
+    # @return frame of the variable
+    def getFrame(self, var):
+        if var.frame == "GF":
+            return self.GlobalFrame
+        elif var.frame == "TF":
+            return self.TemporaryFrame
+        elif self.numLF >= 0:
+            return self.LocalFrame[self.numLF]
+        else:
+            raise FrameError("getFrame - error Local frame not defined")
+
+    # returns object holding type and value of the variable, variable with slot is
+    # found by the slot without looking up its name
+    # @err when the frame or the variable is not defined
+    # @param var is the decoded variable operand
+    # @return object Variable
+    def getVariable(self, var):
+        if var.slot is None:
+            return self.getFrame(var).getVar(var.name)
+        return self.getFrame(var).getSlot(var.slot, var.name)
+
+    # creates var in variable storage based on the decoded variable operand
+    # @err when the frame is not defined or when trying to redefine existing variable
+    # @param var is the decoded variable operand
+    def createVar(self, var):
+        self.getFrame(var).createVar(var.name)
 
     # sets value and type to already created variable in variable storage
-    # @err when variable string is bad or the variable is not defined
-    # @param var_str is the variable defining string from IPPcode20
+    # @err when the variable is not defined
+    # @param var is the decoded variable operand
     # @param var_type is the type the variable will be set to
     # @param var_type is the value the variable will be set to
-    def setVar(self, var_str, var_type, var_value):
-        d_print("\tDATAS\tsetVar\t" + str(var_str) + " " + str(var_type) + " " + repr(var_value))
-        checkNameVar(var_str)
-        checkValueByType(var_type, var_value)
-        var = re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', var_str)
-        if var[1] == "GF":
-            self.GlobalFrame.setVar(var[2], var_type, var_value)
-        elif var[1] == "TF":
-            self.TemporaryFrame.setVar(var[2], var_type, var_value)
-        elif var[1] == "LF":
-            try:
-                self.LocalFrame[self.numLF].setVar(var[2], var_type, var_value)
-            except IndexError:
-                d_print(" DATAS setVar - error undefined frame")
-                exit(ERR_NOTDEF_FR)
+    def setVar(self, var, var_type, var_value):
+        variable = self.getVariable(var)
+        variable.type = var_type
+        variable.value = var_value
 
-    # returns type of given variable in IPPcode20 notation
-    # @err when variable string is bad or the variable is not defined
-    # @param var_str is the variable defining string from IPPcode20
+    # returns type of given variable
+    # @err when the variable is not defined
+    # @param var is the decoded variable operand
     # @return type of given variable if successful
-    def getVarType(self, var_str):
-        d_print("\tDATAS\tgetVarType\t" + var_str)
-        checkNameVar(var_str)
-        var = re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', var_str)
-        if var[1] == "GF":
-            return self.GlobalFrame.getVarType(var[2])
-        elif var[1] == "TF":
-            return self.TemporaryFrame.getVarType(var[2])
-        elif var[1] == "LF":
-            try:
-                return self.LocalFrame[self.numLF].getVarType(var[2])
-            except IndexError:
-                d_print(" DATAS getVarType - error Local frame not defined")
-                exit(ERR_NOTDEF_FR)
+    def getVarType(self, var):
+        return self.getVariable(var).type
 
-    # returns value of given variable in IPPcode20 notation
-    # @err when variable string is bad or the variable is not defined
-    # @param var_str is the variable defining string from IPPcode20
+    # returns value of given variable
+    # @err when the variable is not defined
+    # @param var is the decoded variable operand
     # @return value of given variable if successful
-    def getVarVal(self, var_str):
-        d_print("\tDATAS\tgetVarVal\t" + var_str)
-        checkNameVar(var_str)
-        var = re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', var_str)
-        if var[1] == "GF":
-            return self.GlobalFrame.getVarVal(var[2])
-        elif var[1] == "TF":
-            return self.TemporaryFrame.getVarVal(var[2])
-        elif var[1] == "LF":
-            try:
-                return self.LocalFrame[self.numLF].getVarVal(var[2])
-            except IndexError:
-                d_print(" DATAS getVarVal - error Local frame not defined")
-                exit(ERR_NOTDEF_FR)
+    def getVarVal(self, var):
+        return self.getVariable(var).value
 
-    # returns value of given variable in IPPcode20 notation if it
-    # matches expected type
-    # @err when variable string is bad or the variable is not defined or its not the expected type
-    # @param var_str is the variable defining string from IPPcode20
+    # returns value of given variable if it matches expected type
+    # @err when the variable is not defined or its not the expected type
+    # @param var is the decoded variable operand
     # @param var_type is the type we expect
-    def getVarValByType(self, var_str, var_type):
-        d_print("\tDATAS\tgetVarValByType" + var_str + " " + var_type)
-        checkNameVar(var_str)
-        var = re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', var_str)
-        if var[1] == "GF":
-            return self.GlobalFrame.getVarValByType(var[2], var_type)
-        elif var[1] == "TF":
-            return self.TemporaryFrame.getVarValByType(var[2], var_type)
-        elif var[1] == "LF":
-            return self.LocalFrame[self.numLF].getVarValByType(var[2], var_type)
-
-    # debug print that prints whole content of global frame, temporary frame and
-    # number of local frames in stack
-    # you need debug = True to make it work
-    def printStat(self):
-        print('', file=sys.stderr)
-        print('Content of frames :', file=sys.stderr)
-        print(' Global frame - table', file=sys.stderr)
-        self.GlobalFrame.printAllFrame()
-        print('', file=sys.stderr)
-        print(' Temporary frame - table', file=sys.stderr)
-        self.TemporaryFrame.printAllFrame()
-        print('', file=sys.stderr)
-        print(' Local frames : ' + str(self.numLF + 1))
+    def getVarValByType(self, var, var_type):
+        variable = self.getVariable(var)
+        if variable.type == var_type:
+            return variable.value
+        elif variable.type == '':
+            raise MissingValueError("setVar - error variable " + var.name + " no value in variable")
+        else:
+            raise OperandTypeError("setVar - error variable " + var.name + " wrong value type")
+
+    # debug print that writes whole content of global frame, temporary frame and
+    # number of local frames in stack to the debug output
+    # @param output is the debug output (OutputBuffer)
+    def printStat(self, output):
+        output.write('\n')
+        output.write('Content of frames :\n')
+        output.write(' Global frame - table\n')
+        self.GlobalFrame.printAllFrame(output)
+        output.write('\n')
+        output.write(' Temporary frame - table\n')
+        self.TemporaryFrame.printAllFrame(output)
+        output.write('\n')
+        output.write(' Local frames : ' + str(self.numLF + 1) + '\n')
         for i in range(self.numLF):
-            print(' Local frame - table' + str(i), file=sys.stderr)
-            self.LocalFrame[i].printAllFrame()
-        print('', file=sys.stderr)
+            output.write(' Local frame - table' + str(i) + '\n')
+            self.LocalFrame[i].printAllFrame(output)
+        output.write('\n')
 
 
 class StackStorage:
-    # stored similarly as the variables above. The value and type is separated
-    # to two arrays. One index to both of them presents one item
-    # stackTop variable tells how many items are in the stack and also is index to top
-    valueArray = []
-    typeArray = []
-    stackTop = -1
+    # data stack, items are stored in one array, every item is value followed by its type
+    # (so the type of the top item is the last one), the size of the array tells how many
+    # items are in the stack. Values are pushed only by the interpreter itself, they are
+    # native values of their types already and are not checked again
+    items = []
 
     def __init__(self):
-        self.valueArray = []
-        self.typeArray = []
-        self.stackTop = -1
+        self.items = []
 
     # pushes item to stack
     # @param item_value is value of the item to be pushed
     # @param item_type is type of the item to be pushed
     def stackPush(self, item_value, item_type):
-        d_print("\tSTAKS\tstackPush\t" + str(item_value) + " " + repr(item_type))
-        checkValueByType(item_type, item_value)
-        self.valueArray.append(item_value)
-        self.typeArray.append(item_type)
-        self.stackTop += 1
+        items = self.items
+        items.append(item_value)
+        items.append(item_type)
 
     # pops item out of the stack
     # @err when the stack is empty
-    # @returns top item value if successful
-    def stackPopValue(self):
-        d_print("\tSTAKS\tstackPopValue")
-        if self.stackTop >= 0:
-            self.typeArray.pop()
-            self.stackTop -= 1
-            return self.valueArray.pop()
+    # @return pair type, value of the top item if successful
+    def stackPop(self):
+        items = self.items
+        if items:
+            item_type = items.pop()
+            return item_type, items.pop()
         else:
-            d_print("STAKS stackPopValue - error nothing in stack to pop")
-            exit(ERR_NOVAL_VAR)
-
-    # returns type of the first item in the stack - not a pop !!
-    # @err when the stack is empty
-    # @return type of the top item
-    def stackTopType(self):
-        d_print("\tSTAKS\tstackTopType")
-        try:
-            return self.typeArray[self.stackTop]
-        except IndexError:
-            d_print("STAKS stackTopVal - error nothing in the stack")
-            exit(ERR_NOVAL_VAR)
+            raise MissingValueError("stackPop - error nothing in stack to pop")
 
     # returns top stack item value if it matches required type
     # @err when the stack is empty or when the item doesnt match the required type
     # @param item_type is the required item type
     # @return top item value if successful
     def stackPopValueByType(self, item_type):
-        d_print("\tSTAKS\tstackPopValue\t" + item_type)
-        if self.stackTop >= 0:
-            if self.typeArray[self.stackTop] == item_type:
-                self.typeArray.pop()
-                self.stackTop -= 1
-                return self.valueArray.pop()
+        items = self.items
+        if items:
+            if items[-1] == item_type:
+                del items[-1]
+                return items.pop()
             else:
-                d_print("STAKS stackPopValueByType - error stack top wrong value")
-                exit(ERR_BADTYPE_OP)
+                raise OperandTypeError("stackPopValueByType - error stack top wrong value")
         else:
-            d_print("STAKS stackPopValueByType - error nothing in the stack")
-            exit(ERR_NOVAL_VAR)
+            raise MissingValueError("stackPopValueByType - error nothing in the stack")
+
+    # removes all items from the stack
+    def stackClear(self):
+        self.items.clear()
 
 
 class LabelStorage:
-    # stored similarly as variables. Label names and lines are stored separately
-    # label names in array labelNames and label lines in labelLine. One label defines
-    # same index to both fields
-    labelNames = []
-    labelLines = []
+    # labels are stored in dictionary labelLines, label name is the key and
+    # line of the label is the value
+    labelLines = {}
 
     def __init__(self):
-        self.labelNames = []
-        self.labelLines = []
+        self.labelLines = {}
 
     # adds a label to the list
+    # @err when the label is already defined
     # @param label_name is name of the label
     # @param label_line is line of the label
     def addLabel(self, label_name, label_line):
-        d_print("\tLABLS\taddLabel\t" + label_name + " " + str(label_line))
         checkLabelName(label_name)
-        for i in self.labelNames:
-            if i == label_name:
-                d_print("LABLS addLabel - error label redefinition")
-                exit(ERR_SEMFAULT)
-        self.labelNames.append(label_name)
-        self.labelLines.append(label_line)
+        if label_name in self.labelLines:
+            raise SemanticError("addLabel - error label redefinition")
+        self.labelLines[label_name] = label_line
 
     # returns line of a given label name
     # @err when label is not defined
     # @param label_name is label to be searched for
     # @return label line if successful
     def getLabelLine(self, label_name):
-        d_print("\tLABLS\tgetLabelLine\t" + label_name)
-        checkLabelName(label_name)
-        for y in range(len(self.labelNames)):
-            if self.labelNames[y] == label_name:
-                return self.labelLines[y]
-        d_print("LABLS getLabelLine - error label '" + label_name + "' not found ")
-        exit(ERR_SEMFAULT)
+        try:
+            return self.labelLines[label_name]
+        except KeyError:
+            raise SemanticError("getLabelLine - error label '" + label_name + "' not found ")
+
+
+class OutputBuffer:
+    # batches texts written to the output file, so the file is written in large blocks
+    # texts are collected in array buffer, when their total length reaches limit the buffer
+    # is flushed, in line buffered mode the buffer is flushed after every new line
+    __slots__ = ('handle', 'buffer', 'size', 'limit', 'lineBuffered')
+
+    def __init__(self, handle, buffering=OUTPUT_BUFFER_SIZE):
+        self.handle = handle
+        self.buffer = []
+        self.size = 0
+        self.lineBuffered = buffering == 'line'
+        self.limit = OUTPUT_BUFFER_SIZE if self.lineBuffered else buffering
+
+    # adds text to the buffer
+    # @param text is the text to be written
+    def write(self, text):
+        self.buffer.append(text)
+        self.size += len(text)
+        if (self.size >= self.limit) or (self.lineBuffered and ('\n' in text)):
+            self.flush()
+
+    # writes content of the buffer to the output file
+    def flush(self):
+        if self.buffer:
+            self.handle.write(''.join(self.buffer))
+            self.buffer = []
+            self.size = 0
+        self.handle.flush()
+
+
+class InputReader:
+    # hands out lines of the program input (without the new line character)
+    # regular files are read by large blocks which are split into array lines, so READ
+    # does not need to call the file for every line, other inputs (terminal, pipe) are
+    # read line by line, so the program gets the line as soon as it is written
+    __slots__ = ('handle', 'blocks', 'lines', 'position', 'tail')
+
+    def __init__(self, handle):
+        self.handle = handle
+        self.blocks = isRegularFile(handle)
+        self.lines = []
+        self.position = 0
+        self.tail = ''
+
+    # returns next line of the input
+    # @return the line without new line character, None at the end of the input
+    def readLine(self):
+        if self.position == len(self.lines):
+            if not self.fill():
+                return None
+        line = self.lines[self.position]
+        self.position += 1
+        return line
+
+    # loads next lines of the input to array lines
+    # @return False at the end of the input
+    def fill(self):
+        self.position = 0
+        if not self.blocks:
+            line = self.handle.readline()
+            if line == '':
+                return False
+            self.lines = [line[:-1] if line[-1] == '\n' else line]
+            return True
+        while True:
+            block = self.handle.read(INPUT_BLOCK_SIZE)
+            if block == '':
+                # last line without new line character
+                self.lines = [self.tail] if self.tail != '' else []
+                self.tail = ''
+                return len(self.lines) > 0
+            self.lines = (self.tail + block).split('\n')
+            self.tail = self.lines.pop()
+            if self.lines:
+                return True
 
 
 class FileProcessor:
     # stores, loads, sets and translates files needed for interpret
-    # array code is array of lines of IPPcode20 and one line is array of words in IPPcode20
+    # array code is array of decoded lines of IPPcode20 (objects Instruction)
     # also it handles interpret arguments
+    # compiled program (code with resolved labels) can be stored to a file and loaded
+    # instead of the XML, cacheFile is file in the cache where compiled program of
+    # the source is stored (None when the cache is not used, it is used only with --cache)
+    # program transpiled to python (see Transpiler) can be stored and loaded the same way,
+    # linker is function link of the loaded transpiled program (None when not transpiled),
+    # loading of transpiled program executes python code in it, so the source is loaded as
+    # transpiled program only when runTranspiled is set (option --run-transpiled)
+    # input of the program is read by InputReader input
+    # output of the program goes through OutputBuffer output, debug outputs of the
+    # program (DPRINT, BREAK) through OutputBuffer errorOutput
     srcFileHandle = sys.stdin
     inFileHandle = sys.stdin
+    outFileHandle = sys.stdout
+    input = None
+    output = None
+    errorOutput = None
+    openedFiles = []
+    cacheFile = None
+    linker = None
+    runTranspiled = False
     args = None
+    argv = []
     code = []
 
     def __init__(self):
         self.srcFileHandle = sys.stdin
         self.inFileHandle = sys.stdin
+        self.outFileHandle = sys.stdout
+        self.input = None
+        self.output = None
+        self.errorOutput = None
+        self.openedFiles = []
+        self.cacheFile = None
+        self.linker = None
+        self.runTranspiled = False
         self.args = None
+        self.argv = []
         self.code = []
 
-    # goes through program arguments, saves program settings into args variable
-    # and prepares source and input files
+    # goes through program arguments and saves program settings into args variable
+    # @param argv is list of program arguments (without the program name)
     # @err when unknown argument appears, when neither of source and input is set
-    #      when help setting occurs with other arguments, when files cannot be opened
-    def setHandles(self):
-        d_print("\tFILES\tsetHandles")
+    #      when help setting occurs with other arguments
+    def parseArgs(self, argv):
         # deal wit args
-        parser = argparse.ArgumentParser(add_help=False)
-        # basic arguments
-        parser.add_argument('-h', '--help', dest='help', action='count')
-        parser.add_argument('--source', default=None)
-        parser.add_argument('--input', default=None)
-        # additional arguments
-        parser.add_argument('--stats', default=None)
-        parser.add_argument('--insts', dest='insts', action='count')
-        parser.add_argument('--vars', dest='vars', action='count')
-        parser.error = arg_err
-        self.args = parser.parse_args()
+        parser = argumentParser()
+        self.argv = argv
+        self.args = parser.parse_args(argv)
+        if self.args.trace is not None:
+            categories = self.args.trace.split(',')
+            if categories == ['all']:
+                categories = traceCategories
+            for category in categories:
+                if category not in traceCategories:
+                    raise ParamError("parseArgs - error unknown trace category " + category)
+            setTracing(categories)
         if self.args.help is not None:
             if (self.args.help == 1) & (self.args.input is None) & (self.args.insts is None) & \
-                    (self.args.source is None) & (self.args.stats is None) & (self.args.vars is None):
+                    (self.args.source is None) & (self.args.stats is None) & (self.args.vars is None) & \
+                    (self.args.trace is None) & (self.args.compile is None) & (self.args.cache is None) & \
+                    (self.args.buffer is None) & (self.args.profile is None) & \
+                    (self.args.sample is None) & (self.args.opt == 0) & \
+                    (self.args.transpile is None) & (self.args.runTranspiled is None) & \
+                    (not self.args.aot) & (not self.args.closures) & (not self.args.jit):
                 print('\n'
                       ' Interpret of XML representation of IPPcode20\n'
                       ' Options: \n'
                       ' "--help" or "-h    to print help info\n'
                       ' "--source=[file]"  to set file that the XML will be loaded from    **\n'
                       ' "--input=[file]"   to set file that the input will be loaded from  **\n'
-                      ' ** at least one of those (last two) must be set. The unset on will be read from STDIN\n')
-                exit(ERR_OK)
+                      ' ** at least one of those (last two) must be set. The unset on will be read from STDIN\n'
+                      ' "--stats=[file]"   to store statistics to file, "--insts" (number of executed instructions)\n'
+                      '                    and "--vars" (maximal number of defined variables) in order of the\n'
+                      '                    options, also when the program ends by EXIT\n'
+                      ' "--trace=[list]"   to print trace of interpret calls to STDERR, list of categories\n'
+                      '                    separated by comma (FRAME,DATAS,STAKS,LABLS,FILES,INTE,OUTF) or all\n'
+                      ' "--compile=[file]" to only compile the source and store the compiled program to file,\n'
+                      '                    compiled program can be given to --source instead of the XML\n'
+                      ' "--cache[=dir]"    to use cache of compiled programs, the source loaded from file is\n'
+                      '                    compiled once and the compiled program is used while the source\n'
+                      '                    and the interpret do not change (default directory: ippcode20 in\n'
+                      '                    $XDG_CACHE_HOME or ~/.cache)\n'
+                      ' "--buffer=[size]"  to set size of the output buffer (in characters) or "line" for output\n'
+                      '                    flushed after every line (default when the output is terminal)\n'
+                      ' "--profile=[file]" to store count and time of executed opcodes and times of subroutines\n'
+                      '                    (regions from CALL to RETURN) to file as JSON\n'
+                      ' "--sample=[file]"  to sample the executed program and store its call stacks to file in\n'
+                      '                    collapsed format of flame graph tools\n'
+                      ' "--opt=[level]"    to optimize the program, 0 - no optimization (default), 1 - folding\n'
+                      '                    of constant operations, 2 - also removing of unreachable lines and\n'
+                      '                    shortening of jumps (fewer instructions may be counted by --insts)\n'
+                      ' "--transpile=[file]" to only transpile the source to python module and store it to file,\n'
+                      '                    transpiled program is executed by --run-transpiled\n'
+                      ' "--run-transpiled=[file]" to execute program transpiled by --transpile from file\n'
+                      '                    (python code in the file is executed, used instead of --source)\n'
+                      ' "--aot"            to transpile the program to python before it is executed (not used\n'
+                      '                    with --profile)\n'
+                      ' "--closures"       to execute the program by closures made for every line when the\n'
+                      '                    program is loaded (not used with --profile and --aot)\n'
+                      ' "--jit"            to compile hot loops to python while the program is executed (not\n'
+                      '                    used with --profile, --aot and --closures)\n')
+                raise ProgramExit(ERR_OK)
             else:
-                d_print("FILES setHandles - error help used with other arguments")
-                exit(ERR_PARAM)
+                raise ParamError("parseArgs - error help used with other arguments")
+        elif (self.args.input is None) & (self.args.source is None) & (self.args.compile is None) & \
+                (self.args.transpile is None) & (self.args.runTranspiled is None):
+            raise ParamError("parseArgs - error both source and input unset")
+        if (self.args.runTranspiled is not None) & (self.args.source is not None):
+            raise ParamError("parseArgs - error source used with transpiled program")
+        if self.args.buffer is not None:
+            if self.args.buffer != 'line':
+                if re.match(r'^\d+$', self.args.buffer) is None:
+                    raise ParamError("parseArgs - error bad buffer size")
+                self.args.buffer = max(int(self.args.buffer), 1)
+        elif sys.stdout.isatty():
+            self.args.buffer = 'line'
         else:
-            if (self.args.input is None) & (self.args.source is None):
-                d_print("FILES setHandles - error both source and input unset")
-                exit(ERR_PARAM)
+            self.args.buffer = OUTPUT_BUFFER_SIZE
+
+    # prepares source, input and output files of the interpretation
+    # files given by path are opened here and closed by closeFiles
+    # @param source is path to the XML or compiled file, XML document or compiled program
+    #        in bytes or opened file
+    # @param input_file is path to the input file or opened file
+    # @param output_file is opened file the output is written to
+    # @param cache_dir is directory of the cache of compiled programs, used only when
+    #        the source is given by path (None when the cache is not used)
+    # @param buffering is size of the output buffer or 'line' for line buffered output
+    # @param error_file is opened file the debug output (DPRINT, BREAK) is written to (STDERR when None)
+    # @err when files cannot be opened
+    def setHandles(self, source, input_file, output_file, cache_dir=None, buffering=OUTPUT_BUFFER_SIZE,
+                   error_file=None):
+        if isinstance(source, bytes):
+            self.srcFileHandle = io.BytesIO(source)
+        else:
+            self.srcFileHandle = self.openFile(source, 'rb', "setHandles - error source file does not exist")
+            if (cache_dir is not None) & (not hasattr(source, 'read')):
+                self.cacheFile = os.path.join(cache_dir, self.sourceHash() + '.ippc')
+        self.inFileHandle = self.openFile(input_file, 'r', "setHandles - error input file does not exist")
+        self.input = InputReader(self.inFileHandle)
+        self.outFileHandle = output_file
+        self.output = OutputBuffer(output_file, buffering)
+        self.errorOutput = OutputBuffer(sys.stderr if error_file is None else error_file, buffering)
+
+    # opens file given by path, opened files are returned as they are
+    # @param file is path to the file or opened file
+    # @param mode is mode the file is opened in
+    # @param message is message of the error raised when the file cannot be opened
+    # @err when file cannot be opened
+    # @return opened file
+    def openFile(self, file, mode, message):
+        if hasattr(file, 'read'):
+            return file
+        try:
+            if mode == 'rb':
+                handle = open(file, mode)
             else:
-                if self.args.input is not None:
-                    try:
-                        self.inFileHandle = open(self.args.input, 'r', encoding='UTF-8')
-                    except OSError:
-                        d_print("FILES setHandles - error input file does not exist")
-                        exit(ERR_IN_FILES)
-                elif self.args.source is not None:
+                handle = open(file, mode, encoding='UTF-8')
+        except OSError:
+            raise InputFileError(message)
+        self.openedFiles.append(handle)
+        return handle
 
-                    try:
-                        self.srcFileHandle = open(self.args.source, 'r', encoding='UTF-8')
-                    except OSError:
-                        d_print("FILES setHandles - error source file does not exist")
-                        exit(ERR_IN_FILES)
+    # computes hash of the source file and the interpret, key of the source in the cache
+    # @return hash of the source as hex string
+    def sourceHash(self):
+        digest = hashlib.sha256(interpretVersion())
+        for block in iter(lambda: self.srcFileHandle.read(65536), b''):
+            digest.update(block)
+        self.srcFileHandle.seek(0)
+        return digest.hexdigest()
+
+    # loads compiled program if the source is compiled program or if there is compiled
+    # program of the source in the cache, transpiled program is loaded if runTranspiled is set
+    # @param labels is LabelStorage the labels of the program are loaded to
+    # @err when the source is compiled or transpiled program that cannot be loaded
+    # @return True if the program was loaded, False if the XML must be translated
+    def loadCompiled(self, labels):
+        source = self.srcFileHandle
+        if self.runTranspiled:
+            if source.read(len(TRANSPILED_MAGIC)) != TRANSPILED_MAGIC:
+                raise InputFileError("loadCompiled - error source is not transpiled program")
+            if not self.decodeTranspiled(source.read(), labels):
+                raise InputFileError("loadCompiled - error source transpiled by other version of interpret")
+            return True
+        if source.seekable() and isinstance(source.read(0), bytes):
+            header = source.read(len(TRANSPILED_MAGIC))
+            if header.startswith(COMPILED_MAGIC):
+                source.seek(len(COMPILED_MAGIC))
+                if not self.decodeCompiled(source.read(), labels):
+                    raise InputFileError("loadCompiled - error source compiled by other version of interpret "
+                                         "or damaged")
+                return True
+            source.seek(0)
+        if self.cacheFile is not None:
+            try:
+                with open(self.cacheFile, 'rb') as cached:
+                    if cached.read(len(COMPILED_MAGIC)) == COMPILED_MAGIC:
+                        return self.decodeCompiled(cached.read(), labels)
+            except OSError:
+                pass
+        return False
+
+    # decodes compiled program to array code and labels
+    # compiled program is version of the interpret (see interpretVersion), size of the
+    # marshalled program (8 bytes), its sha256 digest and the marshalled program, the
+    # version, size and digest are checked before the program is unmarshalled, so files
+    # of other versions and truncated or damaged files are not decoded, structure of the
+    # decoded lines is checked by the rules table (compiled program is not checked by
+    # validateProgram), the marshalled data itself is trusted like the interpret is
+    # @param data is the compiled program without header
+    # @param labels is LabelStorage the labels of the program are loaded to
+    # @return True if successful, False when the data are not valid compiled program
+    def decodeCompiled(self, data, labels):
+        version = interpretVersion()
+        payload = data[len(version) + 40:]
+        if (data[:len(version)] != version) | \
+                (data[len(version):len(version) + 8] != len(payload).to_bytes(8, 'big')) | \
+                (data[len(version) + 8:len(version) + 40] != hashlib.sha256(payload).digest()):
+            return False
+        try:
+            label_lines, lines = marshal.loads(payload)
+            code = []
+            for opcode, args, check_vars, target in lines:
+                rule = ruleTable[opcode]
+                line = Instruction(opcode)
+                line.args = [operandFromCompiled(arg) for arg in args]
+                if (len(line.args) != len(rule)) or \
+                        not all(isCompiledOperand(arg, kind) for arg, kind in zip(line.args, rule)):
+                    return False
+                line.checkVars = tuple(line.args[i] for i in check_vars)
+                if (('label' in rule) != (target is not None)) or \
+                        ((target is not None) and not (0 <= target < len(lines))):
+                    return False
+                line.target = target
+                code.append(line)
+            if not all(isinstance(name, str) and (0 <= label_line < len(lines))
+                       for name, label_line in label_lines.items()):
+                return False
+        except (EOFError, ValueError, TypeError, IndexError, KeyError, AttributeError):
+            return False
+        self.code = code
+        labels.labelLines = label_lines
+        return True
+
+    # decodes transpiled program, the program is stored in it as compiled program
+    # (variable PROGRAM) next to function link (see Transpiler)
+    # @param data is source of the transpiled program without header
+    # @param labels is LabelStorage the labels of the program are loaded to
+    # @return True if successful, False when the data are not valid transpiled program
+    def decodeTranspiled(self, data, labels):
+        namespace = dict(globals())
+        try:
+            exec(compile(data, '<transpiled>', 'exec'), namespace)
+            if not self.decodeCompiled(namespace['PROGRAM'], labels):
+                return False
+            self.linker = namespace['link']
+        except (SyntaxError, ValueError, TypeError, KeyError, NameError):
+            return False
+        return True
+
+    # encodes array code with resolved labels to compiled program
+    # @param labels is LabelStorage with labels of the program
+    # @return the compiled program without header
+    def encodeCompiled(self, labels):
+        lines = []
+        for line in self.code:
+            lines.append((line.opcode, tuple(arg.compiled() for arg in line.args),
+                          tuple(i for i, arg in enumerate(line.args) if arg in line.checkVars), line.target))
+        payload = marshal.dumps((labels.labelLines, lines))
+        return interpretVersion() + len(payload).to_bytes(8, 'big') + hashlib.sha256(payload).digest() + payload
+
+    # stores compiled program (array code with resolved labels) to a file
+    # @param labels is LabelStorage with labels of the program
+    # @param path is path of the file
+    # @err OSError when the file cannot be written
+    def storeCompiled(self, labels, path):
+        self.storeFile(COMPILED_MAGIC + self.encodeCompiled(labels), path)
+
+    # stores program transpiled to python to a file, the file is python module with
+    # the compiled program (variable PROGRAM) and function link
+    # @param labels is LabelStorage with labels of the program
+    # @param transpiled is source of function link (see Transpiler)
+    # @param path is path of the file
+    # @err OSError when the file cannot be written
+    def storeTranspiled(self, labels, transpiled, path):
+        data = TRANSPILED_MAGIC + b'PROGRAM = ' + repr(self.encodeCompiled(labels)).encode() + b'\n\n\n' + \
+            transpiled.encode('UTF-8')
+        self.storeFile(data, path)
+
+    # writes data to a file, directory of the file is created when it does not exist
+    # @param data is content of the file
+    # @param path is path of the file
+    # @err OSError when the file cannot be written
+    def storeFile(self, data, path):
+        directory = os.path.dirname(path)
+        if directory != '':
+            os.makedirs(directory, exist_ok=True)
+        # written to temporary file first, so other runs never see half written file
+        temporary = path + '.' + str(os.getpid())
+        with open(temporary, 'wb') as stored:
+            stored.write(data)
+        os.replace(temporary, path)
+
+    # stores compiled program of the source to the cache, the cache is only an optimization
+    # so failures of writing are ignored
+    # @param labels is LabelStorage with labels of the program
+    def storeCache(self, labels):
+        if self.cacheFile is not None:
+            try:
+                self.storeCompiled(labels, self.cacheFile)
+            except OSError:
+                trace('FILES', "storeCache - error cache file could not be written")
 
     # takes source file input and translates the xml format to array code
-    # @err when bad xml structure appears
-    # @return code when successful
+    # the xml is parsed as a stream, every instruction is decoded to Instruction object
+    # when its element ends and the element is freed, so the whole xml tree is never held
+    # in memory and the operands does not need to be parsed again during execution
+    # @err when the xml is not well-formed, when bad xml structure appears
     def xmlTranslate(self):
-        d_print("\tFILES\txmlTranslate")
-        xmlcode = None
-        try:
-            xmlcode = xml.parse(self.srcFileHandle).getroot()
-        except:
-            d_print("FILES xmlTranslate - error bad xml file")
-            exit(ERR_STRUCT_XML)
-        progheader = False
-        for attribute, value in xmlcode.attrib.items():
-            if (attribute == 'language') & (value == 'IPPcode20'):
-                progheader = True
-            elif (attribute != 'name') | (attribute != 'description'):
-                d_print("FILES xmlTranslate - error bad program attributes")
-                exit(ERR_STRUCT_XML)
-        if not progheader:
-            d_print("FILES xmlTranslate - error bad program attributes")
-            exit(ERR_STRUCT_XML)
+        depth = 0
+        program = None
         ins_order = 0
-        for instruction in xmlcode:
-            ins_order += 1
-            if not ((instruction.attrib['order'] == str(ins_order)) & isOpcode(instruction.attrib['opcode']) &
-                    (len(instruction.attrib) == 2)):
-                d_print("FILES xmlTranslate - error bad instruction attributes")
-                exit(ERR_STRUCT_XML)
-            self.code.append([instruction.attrib['opcode']])
-            try:
-                for i in range(len(list(instruction))):
-                    inst_arg = instruction.find("arg" + str(i + 1))
-                    arg_type = inst_arg.attrib['type']
-                    arg_text = inst_arg.text
-                    if arg_type == 'var':
-                        if checkNameVar(arg_text):
-                            self.code[ins_order - 1].append(arg_text)
-                    elif arg_type == 'label':
-                        if checkLabelName(arg_text):
-                            self.code[ins_order - 1].append(arg_text)
-                    elif arg_type == 'type':
-                        if (arg_text == 'int') | (arg_text == 'string') | (arg_text == 'bool') | (arg_text == 'float'):
-                            self.code[ins_order - 1].append(arg_text)
-                    elif arg_type == 'int':
-                        if checkValueByType('int', arg_text):
-                            self.code[ins_order - 1].append(arg_type + '@' + arg_text)
-                    elif arg_type == 'bool':
-                        if (arg_text == 'true') | (arg_text == 'false'):
-                            self.code[ins_order - 1].append(arg_type + '@' + arg_text)
-                        else:
-                            d_print("FILES xmlTranslate - err bad bool type")
-                            exit(ERR_STRUCT_XML)
-                    elif arg_type == 'string':
-                        if arg_text is None:
-                            self.code[ins_order - 1].append(arg_type + '@')
-                        elif checkValueByType(arg_type, arg_text):
-                            # arg_text = bytes(arg_text, 'utf-8').decode('unicode_escape').encode()
-                            for j, sub in enumerate(arg_text.split("\\")):
-                                if j == 0:
-                                    arg_text = sub
-                                else:
-                                    arg_text = arg_text + chr(int(sub[0:3])) + sub[3:]
-                            self.code[ins_order - 1].append(arg_type + '@' + arg_text)
-                    elif arg_type == 'nil':
-                        if arg_text == 'nil':
-                            self.code[ins_order - 1].append(arg_type + '@' + arg_text)
-                        else:
-                            d_print("FILES xmlTranslate - err bad nil type")
-                    elif arg_type == 'float':
-                        if re.match(r'^[0-9.abcdefABCDEF+\-px]*$', arg_text):
-                            self.code[ins_order - 1].append(arg_type + '@' + str(float.fromhex(arg_text)))
-                        else:
-                            d_print("FILES xmlTranslate - error bad float")
-                            exit(ERR_STRUCT_XML)
+        try:
+            for event, element in xml.iterparse(self.srcFileHandle, events=('start', 'end')):
+                if event == 'start':
+                    depth += 1
+                    if depth == 1:
+                        program = element
+                        self.checkProgram(program)
+                else:
+                    depth -= 1
+                    if depth == 1:
+                        ins_order += 1
+                        self.code.append(self.translateInstruction(element, ins_order))
+                        program.clear()
+        except xml.ParseError:
+            raise XmlFormatError("xmlTranslate - error bad xml file")
+
+    # checks attributes of the root element of the program
+    # @param program is the root element
+    # @err when bad program attributes appear
+    def checkProgram(self, program):
+        if program.attrib.get('language') != 'IPPcode20':
+            raise XmlStructureError("checkProgram - error bad program attributes")
+        for attribute in program.attrib:
+            if (attribute != 'language') & (attribute != 'name') & (attribute != 'description'):
+                raise XmlStructureError("checkProgram - error bad program attributes")
+
+    # decodes one instruction element to Instruction object
+    # @param instruction is the instruction element
+    # @param ins_order is expected order of the instruction
+    # @err when bad instruction attributes or arguments appear
+    # @return decoded Instruction
+    def translateInstruction(self, instruction, ins_order):
+        attributes = instruction.attrib
+        if not ((instruction.tag == 'instruction') & (attributes.get('order') == str(ins_order)) &
+                isOpcode(attributes.get('opcode')) & (len(attributes) == 2)):
+            raise XmlStructureError("translateInstruction - error bad instruction attributes")
+        line = Instruction(attributes['opcode'])
+        for i in range(len(instruction)):
+            inst_arg = instruction.find("arg" + str(i + 1))
+            if inst_arg is None:
+                raise XmlStructureError("translateInstruction - error bad instruction arguments")
+            line.args.append(self.translateOperand(inst_arg.attrib.get('type'), inst_arg.text))
+        return line
+
+    # decodes one instruction argument to operand object
+    # @param arg_type is value of attribute type of the argument
+    # @param arg_text is text of the argument
+    # @err when the argument is not valid
+    # @return decoded operand
+    def translateOperand(self, arg_type, arg_text):
+        if arg_text is None:
+            arg_text = ''
+        if arg_type == 'var':
+            if checkNameVar(arg_text):
+                return VarOperand(arg_text[:2], arg_text[3:])
+        elif arg_type == 'label':
+            if checkLabelName(arg_text):
+                return LabelOperand(arg_text)
+        elif arg_type == 'type':
+            if (arg_text == 'int') | (arg_text == 'string') | (arg_text == 'bool') | (arg_text == 'float'):
+                return TypeOperand(arg_text)
+            raise XmlStructureError("translateOperand - error bad type")
+        elif arg_type == 'int':
+            if checkValueByType('int', arg_text):
+                return ConstOperand(arg_type, int(arg_text))
+        elif arg_type == 'bool':
+            if (arg_text == 'true') | (arg_text == 'false'):
+                return ConstOperand(arg_type, arg_text == 'true')
+            raise XmlStructureError("translateOperand - err bad bool type")
+        elif arg_type == 'string':
+            if checkValueByType(arg_type, arg_text):
+                for j, sub in enumerate(arg_text.split("\\")):
+                    if j == 0:
+                        arg_text = sub
                     else:
-                        d_print("FILES xmlTranslate - error unknown type")
-                        exit(ERR_STRUCT_XML)
-            except IndexError:
-                d_print("FILES xmlTranslate - error bad instruction attributes")
-                exit(ERR_STRUCT_XML)
-        d_print("\tFILES\txmlTranslate\tend")
+                        arg_text = arg_text + chr(int(sub[0:3])) + sub[3:]
+                return ConstOperand(arg_type, arg_text)
+        elif arg_type == 'nil':
+            if arg_text == 'nil':
+                return ConstOperand(arg_type, NIL)
+            raise XmlStructureError("translateOperand - err bad nil type")
+        elif arg_type == 'float':
+            if floatPattern.match(arg_text):
+                try:
+                    return ConstOperand(arg_type, float.fromhex(arg_text))
+                except (ValueError, OverflowError):
+                    pass
+            raise XmlStructureError("translateOperand - error bad float")
+        raise XmlStructureError("translateOperand - error unknown type")
 
     # returns specific line of code
     # @param num is number of the line of the code (starts by 0)
     # @return line of code at index num
     def getLineCode(self, num):
-        d_print("\tFILES\tgetLineCode\t" + str(num))
         return self.code[num]
 
     # returns number of lines in the code
     # @return number of lines in the code
     def getLenCode(self):
-        d_print("\tFILES\tgetLenCode")
         return len(self.code)
 
     # makes file for stati expansion
@@ -650,778 +1368,2203 @@ class FileProcessor:
     # @param num_inst is num of executed instructions during execution
     def makeSTATIfile(self, num_var, num_inst):
         if self.args.stats is not None:
+            if (self.args.insts is None) & (self.args.vars is None):
+                raise ParamError("makeSTATIfile - error bad arguments")
             try:
-                stati_handle = open(self.args.stats, 'w', encoding='UTF-8')
-                if (self.args.insts is not None) | (self.args.vars is not None):
-                    for word in sys.argv:
+                with open(self.args.stats, 'w', encoding='UTF-8') as stati_handle:
+                    for word in self.argv:
                         if word == '--vars':
                             print(str(num_var), file=stati_handle)
                         elif word == '--insts':
                             print(str(num_inst), file=stati_handle)
-                else:
-                    d_print("FILES setHandles - error bad arguments")
-                    exit(ERR_PARAM)
             except OSError:
-                d_print("FILES makeSTATIfile - error file could not be opened")
-                exit(ERR_IN_FILES)
+                # exit code 11 (not 12) of the original STATI implementation is kept
+                raise InputFileError("makeSTATIfile - error file could not be opened")
 
     # debug function printing array of code
-    # variable debug need to be True to make it work
+    # tracing of category FILES need to be enabled to make it work
     def printCode(self):
-        d_print("\tFILES\tprintCode")
         for i in self.code:
-            d_print(i)
+            trace('FILES', str(i))
 
     # returns one line from input
+    # @return the line without new line character, None at the end of the input
     def readInput(self):
-        return self.inFileHandle.readline()
+        return self.input.readLine()
 
     # debug function that prints input in source handle
-    # variable debug need to be True to make it work
+    # tracing of category FILES need to be enabled to make it work
     def printFiles(self):
         for line in self.srcFileHandle:
-            d_print(line)
+            trace('FILES', line)
+
+    # writes everything buffered to the output files
+    def flushOutput(self):
+        if self.output is not None:
+            self.output.flush()
+            self.errorOutput.flush()
 
-    # closes opened files
+    # closes files opened by setHandles
     def closeFiles(self):
-        self.inFileHandle.close()
-        self.srcFileHandle.close()
+        for handle in self.openedFiles:
+            handle.close()
+        self.openedFiles = []
 
 
-class Interpret:
-    # the master class of whole project
-    files = FileProcessor()
-    variables = VariableStorage()
-    labels = LabelStorage()
-    stack = StackStorage()
-    ProgCounter = 0
-    CallStack = []
-    ExecutedInstructions = 0
-    DefinedVars = 0
+class Profiler:
+    # collects times of the executed instructions (see Interpret.executeProfiled)
+    # opcodes is dictionary, opcode is the key and pair [count, time] is the value
+    # routines is dictionary, name of the subroutine (label of CALL, 'main' for the code
+    # outside of subroutines) is the key and triplet [calls, inclusive time, exclusive time]
+    # is the value, regions is stack of subroutines being executed, every item is
+    # triplet [name, exclusive time, inclusive time of called subroutines]
+    opcodes = {}
+    routines = {}
+    regions = []
+    active = {}
 
     def __init__(self):
-        self.files = FileProcessor()
-        self.variables = VariableStorage()
-        self.labels = LabelStorage()
-        self.stack = StackStorage()
-        self.ProgCounter = 0
-        self.CallStack = []
-        self.ExecutedInstructions = 0
-        self.DefinedVars = 0
+        self.opcodes = {}
+        self.routines = {}
+        self.regions = []
+        self.active = {}
+        self.enter('main')
 
-    # executes interpretation
-    # @err all possible errors listed above
-    def execute(self):
-        self.files.setHandles()
-        self.files.xmlTranslate()
-        self.scanForLabels()
-        while self.ProgCounter < self.files.getLenCode():
-            line = self.files.getLineCode(self.ProgCounter)
-            d_print(line)
-            self.checkLineRules(line)
-            if line[0] == 'MOVE':  # MOVE <var> <symbol>
-                self.variables.setVar(line[1], self.getSymbolType(line[2]), self.getSymbolValue(line[2]))
-            elif line[0] == 'CREATEFRAME':  # CREATEFRAME
-                self.variables.createTempFrame()
-            elif line[0] == 'PUSHFRAME':  # PUSHFRAME
-                self.variables.pushLocFrame()
-            elif line[0] == 'POPFRAME':  # POPFRAME
-                self.variables.popLocFrame()
-            elif line[0] == 'DEFVAR':  # DEFVAR <var>
-                # already done by checker - here just test
-                self.DefinedVars += 1
-            elif line[0] == 'CALL':  # CALL <label>
-                self.CallStack.append(self.ProgCounter + 1)
-                self.ProgCounter = self.labels.getLabelLine(line[1])
-            elif line[0] == 'RETURN':  # RETURN
-                if len(self.CallStack) > 0:
-                    self.ProgCounter = self.CallStack.pop(-1) - 1
-                else:
-                    d_print("INTE execute - error poping from empty call stack")
-                    exit(ERR_NOVAL_VAR)
-            elif line[0] == 'PUSHS':  # PUSHS <symb>
-                self.stack.stackPush(self.getSymbolValue(line[1]), self.getSymbolType(line[1]))
-            elif line[0] == 'POPS':  # POPS <var>
-                self.variables.setVar(line[1], self.stack.stackTopType(), self.stack.stackPopValue())
-            elif (line[0] == 'ADD') | (line[0] == 'SUB') | (line[0] == 'MUL') | (line[0] == 'IDIV') | \
-                    (line[0] == 'DIV') | (line[0] == 'DIVS') | (line[0] == 'ADDS') | (line[0] == 'SUBS') | \
-                    (line[0] == 'MULS') | (line[0] == 'IDIVS'):
-                # ADD <var> <symb1> <symb2>       ADDS
-                # SUB <var> <symb1> <symb2>       SUBS
-                # MUL <var> <symb1> <symb2>       MULS
-                # IDIV <var> <symb1 <symb2>       IDIVS
-                self.doArithmetic(line)
-            elif (line[0] == 'LT') | (line[0] == 'GT') | (line[0] == 'EQ') | \
-                    (line[0] == 'LTS') | (line[0] == 'GTS') | (line[0] == 'EQS'):
-                # LT <var> <symb1> <symb2>        LTS
-                # GT <var> <symb1> <symb2>        GTS
-                # EQ <var> <symb1> <symb2>        EQS
-                self.doCompare(line)
-            elif (line[0] == 'AND') | (line[0] == 'OR') | (line[0] == 'NOT') | \
-                    (line[0] == 'ANDS') | (line[0] == 'ORS') | (line[0] == 'NOTS'):
-                # AND <var> <symb1> <symb2>       ANDS
-                # OR <var> <symb1 <symb2>         ORS
-                # NOT <var> <symb>                NOTS
-                self.doLogic(line)
-            elif line[0] == 'INT2CHAR':  # INT2CHAR <var> <symb>
-                try:
-                    self.variables.setVar(line[1], 'string', chr(int(self.getSymbolValueByType(line[2], 'int'))))
-                except ValueError:
-                    d_print("INTE execute - error INT2CHAR bad integer")
-                    exit(ERR_STRFAULT)
-            elif line[0] == 'INT2CHARS':  # INT2CHARS
-                symb = self.stack.stackPopValueByType('int')
-                try:
-                    self.stack.stackPush(chr(int(symb)), 'string')
-                except ValueError:
-                    d_print("INTE execute - error INT2CHARS bad integer")
-                    exit(ERR_STRFAULT)
-            elif (line[0] == 'INT2FLOAT') | (line[0] == 'INT2FLOATS'):
-                if line[0] == 'INT2FLOAT':
-                    symb = self.getSymbolValueByType(line[2], 'int')
-                    self.variables.setVar(line[1], 'float', str(float(int(symb))))
-                else:
-                    symb = self.stack.stackPopValueByType('int')
-                    self.stack.stackPush(str(float(int(symb))), 'float')
-            elif (line[0] == 'FLOAT2INT') | (line[0] == 'FLOAT2INTS'):
-                if line[0] == 'FLOAT2INT':
-                    symb = self.getSymbolValueByType(line[2], 'float')
-                    self.variables.setVar(line[1], 'int', str(int(float(symb))))
-                else:
-                    symb = self.stack.stackPopValueByType('float')
-                    self.stack.stackPush(str(int(float(symb))), 'int')
-            elif (line[0] == 'STRI2INT') | (line[0] == 'STRI2INTS'):
-                # STRI2INT <var> <symb1> <symb2>   STRI2INTS
-                if line[0] == 'STRI2INT':
-                    symb1 = self.getSymbolValueByType(line[2], 'string')
-                    symb2 = self.getSymbolValueByType(line[3], 'int')
-                else:
-                    symb2 = self.stack.stackPopValueByType('int')
-                    symb1 = self.stack.stackPopValueByType('string')
-                if (re.match(r'^-\d+$', symb2) is not None) | (len(symb1) <= int(symb2)):
-                    d_print("INTE execute - error STRI2INT bad integer argument")
-                    exit(ERR_STRFAULT)
-                if line[0] == 'STRI2INT':
-                    self.variables.setVar(line[1], 'int', str(ord(symb1[int(symb2)])))
-                else:
-                    self.stack.stackPush(str(ord(symb1[int(symb2)])), 'int')
-            elif line[0] == 'READ':  # READ <var> <type>
-                line_type = line[2]
-                inputdata = self.files.readInput()
-                if (line_type != 'int') & (line_type != 'bool') & \
-                        (line_type != 'string') & (line_type != 'float'):
-                    d_print('INTE execute - error bad READ type')
-                    exit(ERR_STRUCT_XML)
-                elif inputdata == '':
-                    self.variables.setVar(line[1], 'nil', 'nil')
-                elif line_type == 'bool':
-                    inputdata = inputdata[:-1]
-                    if inputdata.lower() == 'true':
-                        self.variables.setVar(line[1], 'bool', 'true')
-                    else:
-                        self.variables.setVar(line[1], 'bool', 'false')
-                else:
-                    inputdata = inputdata[:-1]
-                    if (line_type == 'int' and re.match(r'^[-]?\d+$', inputdata) is not None) or \
-                            (line_type == 'string'):
-                        self.variables.setVar(line[1], line_type, inputdata)
-                    elif line_type == 'float' and re.match(r'^[0-9.abcdefABCDEF+\-px]*$', inputdata) is not None:
-                        self.variables.setVar(line[1], 'float', str(float.fromhex(inputdata)))
-                    else:
-                        self.variables.setVar(line[1], 'nil', 'nil')
-            elif line[0] == 'WRITE':  # WRITE <symb>
-                symbtype = self.getSymbolType(line[1])
-                symbval = self.getSymbolValueByType(line[1], symbtype)
-                if symbtype == 'nil':
-                    print('', end='')
-                elif symbtype == 'float':
-                    print(str(float.hex(float(symbval))), end='')
-                else:
-                    print(symbval, end='')
-            elif line[0] == 'CONCAT':  # CONCAT <var> <symb1> <symb2>
-                symb1 = self.getSymbolValueByType(line[2], 'string')
-                symb2 = self.getSymbolValueByType(line[3], 'string')
-                if symb1 is None:
-                    self.variables.setVar(line[1], 'string', symb2)
-                if symb2 is None:
-                    self.variables.setVar(line[1], 'string', symb1)
-                if (symb2 is not None) & (symb1 is not None):
-                    self.variables.setVar(line[1], 'string', symb1 + symb2)
-            elif line[0] == 'STRLEN':  # STRLEN <var> <symb>
-                symb = self.getSymbolValueByType(line[2], 'string')
-                self.variables.setVar(line[1], 'int', str(len(symb)))
-                pass
-            elif line[0] == 'GETCHAR':  # GETCHAR <var> <symb1> <symb2>
-                symb1 = self.getSymbolValueByType(line[2], 'string')
-                symb2 = self.getSymbolValueByType(line[3], 'int')
-                if int(symb2) < 0 or int(symb2) >= len(symb1):
-                    d_print("INTE execute - error GETCHAR bad integer argument")
-                    exit(ERR_STRFAULT)
-                else:
-                    self.variables.setVar(line[1], 'string', symb1[int(symb2)])
-            elif line[0] == 'SETCHAR':  # SETCHAR <var> <symb1> <symb2>
-                if self.variables.getVarType(line[1]) == 'undef':
-                    d_print("INTE execute - error undefined variable")
-                    exit(ERR_NOVAL_VAR)
-                varvalue = self.variables.getVarValByType(line[1], 'string')
-                symb1 = self.getSymbolValueByType(line[2], 'int')
-                symb2 = self.getSymbolValueByType(line[3], 'string')
-                if symb2 == '':
-                    d_print("INTE execute - error empty string")
-                    exit(ERR_STRFAULT)
-                if (re.match(r'^-\d+$', symb1) is not None) | (len(varvalue) <= int(symb1)):
-                    d_print("INTE execute - error SETCHAR bad integer argument")
-                    exit(ERR_STRFAULT)
-                varvalue = list(varvalue)
-                varvalue[int(symb1)] = symb2[0]
-                varvalue = "".join(varvalue)
-                self.variables.setVar(line[1], 'string', varvalue)
-            elif line[0] == 'TYPE':  # TYPE <var> <symb>
-                if checkType(self.getSymbolTypeUndefA(line[2])):
-                    symbtype = self.getSymbolTypeUndefA(line[2])
-                    if symbtype == 'undef':
-                        self.variables.setVar(line[1], 'string', '')
-                    else:
-                        self.variables.setVar(line[1], 'string', symbtype)
-            elif line[0] == 'LABEL':  # LABEL <label>
-                # already set by scan labels function
-                self.labels.getLabelLine(line[1])
-            elif line[0] == 'JUMP':  # JUMP <label>
-                self.ProgCounter = self.labels.getLabelLine(line[1])
-            elif (line[0] == 'JUMPIFEQ') | (line[0] == 'JUMPIFEQS'):
-                # JUMPIFEQ <label> <symb1> <symb2>   JUMPIFEQS
-                if line[0] == 'JUMPIFEQ':
-                    symb1type = self.getSymbolType(line[2])
-                    symb2type = self.getSymbolType(line[3])
-                    symb1val = self.getSymbolValue(line[2])
-                    symb2val = self.getSymbolValue(line[3])
-                else:
-                    symb2type = self.stack.stackTopType()
-                    symb2val = self.stack.stackPopValue()
-                    symb1type = self.stack.stackTopType()
-                    symb1val = self.stack.stackPopValue()
-                if symb1type == symb2type:
-                    if symb1val == symb2val:
-                        self.ProgCounter = self.labels.getLabelLine(line[1])
-                elif (symb1type != 'nil') & (symb2type != 'nil'):
-                    d_print("INTE execute - error JUMPIFEQ bad argument types  [" + str(symb1type) + "] [" + str(
-                        symb2type) + "]")
-                    exit(ERR_BADTYPE_OP)
-            elif (line[0] == 'JUMPIFNEQ') | (line[0] == 'JUMPIFNEQS'):
-                # JUMPIFNEQ <label> <symb1> <symb2>    JUMPIFNEQS
-                if line[0] == 'JUMPIFNEQ':
-                    symb1type = self.getSymbolType(line[2])
-                    symb2type = self.getSymbolType(line[3])
-                    symb1val = self.getSymbolValue(line[2])
-                    symb2val = self.getSymbolValue(line[3])
-                else:
-                    symb2type = self.stack.stackTopType()
-                    symb2val = self.stack.stackPopValue()
-                    symb1type = self.stack.stackTopType()
-                    symb1val = self.stack.stackPopValue()
-                if symb1type == symb2type:
-                    if symb1val != symb2val:
-                        self.ProgCounter = self.labels.getLabelLine(line[1])
-                elif (symb1type != 'nil') & (symb2type != 'nil'):
-                    d_print("INTE execute - error JUMPIFEQ bad argument types [" + symb1type + "] [" + symb2type + "]")
-                    exit(ERR_BADTYPE_OP)
-                else:
-                    self.ProgCounter = self.labels.getLabelLine(line[1])
-            elif line[0] == 'EXIT':  # EXIT <symb>
-                symb = self.getSymbolValueByType(line[1], 'int')
-                if (int(symb) >= 0) & (int(symb) <= 49):
-                    exit(int(symb))
-                else:
-                    d_print("INTE execute - error EXIT bad integer value")
-                    exit(ERR_BADVAL_OP)
-            elif line[0] == 'DPRINT':  # DPRINT <symb>
-                symb = self.getSymbolValue(line[1])
-                print(symb, file=sys.stderr)
-            elif line[0] == 'BREAK':  # BREAK
-                print('', file=sys.stderr)
-                print('++ BREAK INTERPRET STATUS ++', file=sys.stderr)
-                print('', file=sys.stderr)
-                print('num of completed instructions : ' + str(self.ExecutedInstructions), file=sys.stderr)
-                print('num of defined variables : ' + str(self.DefinedVars), file=sys.stderr)
-                self.variables.printStat()
-            elif line[0] == 'CLEARS':  # CLEARS
-                self.stack = StackStorage()
-            else:
-                d_print("INTE execute - error unknown opcode " + line[0])
-                exit(ERR_INTERNAL)
-            self.ExecutedInstructions += 1
-            self.ProgCounter += 1
-        self.files.makeSTATIfile(self.DefinedVars, self.ExecutedInstructions)
-        exit(ERR_OK)
+    # records one executed instruction
+    # @param opcode is opcode of the instruction
+    # @param elapsed is time the instruction was executed for
+    def record(self, opcode, elapsed):
+        try:
+            stat = self.opcodes[opcode]
+        except KeyError:
+            stat = self.opcodes[opcode] = [0, 0.0]
+        stat[0] += 1
+        stat[1] += elapsed
+        self.regions[-1][1] += elapsed
 
-    # scans code for labels and sets them into label storage
-    # @err when the label name in the code does not match IPPcode20 notation
-    def scanForLabels(self):
-        d_print("\tINTE\tscanForLabels")
-        for i in range(self.files.getLenCode()):
-            line = self.files.getLineCode(i)
-            if (line[0] == 'LABEL') & (len(line) == 2):
-                d_print("setting label '" + line[1] + "' at line :" + str(i))
-                self.labels.addLabel(line[1], i)
-
-    # checks if line of code matches the rules writen in the rule table above
-    # for 'var' it checks if the param is defined
-    # for 'symb' it checks if its a variable (then the same check as above)
-    #   or constant (then checks its notation and type).
-    # for 'label' it checks if its defined and if it have correct notation
-    # for 'type' it checks it its 'int', 'bool', 'nil' or 'string'
-    # for 'undefvar' (only in DEFVAR) it tries creates the variable
-    def checkLineRules(self, line_array):
-        d_print("\tINTE\tcheckLineRules\t" + str(line_array))
-        for rule_line in rules:
-            if line_array[0] == rule_line[0]:
-                if len(line_array) != len(rule_line):
-                    d_print("INTE checkLineRules - error bad opcode arguments")
-                    exit(ERR_STRUCT_XML)
-                for i in range(len(rule_line) - 1):
-                    if rule_line[i + 1] == 'var':
-                        self.variables.getVarType(line_array[i + 1])
-                    elif rule_line[i + 1] == 'und_symb':
-                        self.getSymbolTypeUndefA(line_array[i + 1])
-                    elif rule_line[i + 1] == 'symb':
-                        if re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', line_array[i + 1]) is not None:
-                            self.variables.getVarType(line_array[i + 1])
-                        elif re.match(r'^(\w+)@([\S]+)$', line_array[i + 1]):
-                            symbol = re.match(r'^(\w+)@([\S]+)$', line_array[i + 1])
-                            checkType(symbol[1])
-                            checkValueByType(symbol[1], symbol[2])
-                    elif rule_line[i + 1] == 'label':
-                        self.labels.getLabelLine(line_array[i + 1])
-                    elif rule_line[i + 1] == 'type':
-                        if (line_array[i + 1] != 'int') & (line_array[i + 1] != 'bool') & \
-                                (line_array[i + 1] != 'string') & (line_array[i + 1] != 'nil') & \
-                                (line_array[i + 1] != 'float'):
-                            d_print("INTE checkLineRules - error bad type")
-                            exit(ERR_STRUCT_XML)
-                    elif rule_line[i + 1] == 'undefvar':
-                        self.variables.createVar(line_array[i + 1])
-                    else:
-                        d_print("INTE checkLineRules - error bug in rules table")
-                        exit(ERR_INTERNAL)
-        d_print("\tINTE\tcheckLineRules\tend")
+    # starts region of subroutine (executed CALL)
+    # @param name is label of the subroutine
+    def enter(self, name):
+        if name not in self.routines:
+            self.routines[name] = [0, 0.0, 0.0]
+        self.routines[name][0] += 1
+        self.active[name] = self.active.get(name, 0) + 1
+        self.regions.append([name, 0.0, 0.0])
 
-    # returns type of symbol
-    # @err when symbol is variable and its not defined
-    # @err when symbol have bad notation
-    # @param symbol_string is string in IPPcode20 notation of symbol (variable or constant)
-    # @return symbol type if successful
-    def getSymbolType(self, symbol_string):
-        d_print("\tINTE\tgetSymbolType\t" + repr(symbol_string))
-        if re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', symbol_string) is not None:
-            vartype = self.variables.getVarType(symbol_string)
-            if vartype == 'undef':
-                d_print("INTE getSymbolType - error not set variable")
-                exit(ERR_NOVAL_VAR)
-            return vartype
-        elif re.match(r'^(\w+)@([\S]+)$', symbol_string) is not None:
-            symbol = re.match(r'^(\w+)@([\S]+)$', symbol_string)
-            return symbol[1]
-        elif re.match(r'^string@.*', symbol_string):
-            return 'string'
-        else:
-            d_print("INTE getSymbolType - error not a symbol " + repr(symbol_string))
-            exit(ERR_STRUCT_XML)
-
-    def getSymbolTypeUndefA(self, symbol_string):
-        d_print("\tINTE\tgetSymbolTypeUndefA\t" + repr(symbol_string))
-        if re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', symbol_string) is not None:
-            return self.variables.getVarType(symbol_string)
-        elif re.match(r'^(\w+)@([\S]+)$', symbol_string) is not None:
-            symbol = re.match(r'^(\w+)@([\S]+)$', symbol_string)
-            return symbol[1]
-        elif re.match(r'^string@.*', symbol_string):
-            return 'string'
-        else:
-            d_print("INTE getSymbolTypeUndefA - error not a symbol " + symbol_string)
-            exit(ERR_STRUCT_XML)
+    # ends region of the last entered subroutine (executed RETURN)
+    # inclusive time of recursive subroutine is counted only by its outermost region
+    def leave(self):
+        name, exclusive, children = self.regions.pop()
+        inclusive = exclusive + children
+        routine = self.routines[name]
+        routine[2] += exclusive
+        self.active[name] -= 1
+        if self.active[name] == 0:
+            routine[1] += inclusive
+        if self.regions:
+            self.regions[-1][2] += inclusive
 
-    # returns value of symbol
-    # @err when symbol is variable and its not defined
-    # @err when symbol have bad notation
-    # @param symbol_string is string in IPPcode20 notation of symbol (variable or constant)
-    # @return symbol value if successful
-    def getSymbolValue(self, symbol_string):
-        d_print("\tINTE\tgetSymbolValue\t" + repr(symbol_string))
-        if re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', symbol_string) is not None:
-            varval = self.variables.getVarVal(symbol_string)
-            if varval == 'undef':
-                d_print("INTE getSymbolType - error not set variable")
-                exit(ERR_NOVAL_VAR)
-            return varval
-        elif re.match(r'^string@.*', symbol_string) is not None:
-            return symbol_string[7:]
-        elif re.match(r'^(\w+)@([\S]+)$', symbol_string) is not None:
-            symbol = re.match(r'^(\w+)@([\S]+)$', symbol_string)
-            return symbol[2]
-        else:
-            d_print("INTE getSymbolValue - error not a symbol")
-            exit(ERR_STRUCT_XML)
+    # ends all regions still being executed (end of the program, EXIT, error)
+    def finish(self):
+        while self.regions:
+            self.leave()
 
-    # returns value of symbol if it have expected type
-    # @err when symbol is variable and its not defined
-    # @err when symbol have bad notation
-    # @err when the symbol does not match the expected type
-    # @param symbol_string is string in IPPcode20 notation of symbol (variable or constant)
-    # @return symbol value if successful
-    def getSymbolValueByType(self, symbol_string, symbol_type):
-        d_print("\tINTE\tgetSymbolValueByType\t" + repr(symbol_string) + " " + str(symbol_type))
-        if symbol_type == self.getSymbolType(symbol_string):
-            return self.getSymbolValue(symbol_string)
-        else:
-            d_print("INTE getSymbolValueByType - error type of symbol not matching expected type")
-            exit(ERR_BADTYPE_OP)
-
-    # executes arithmetical operations based of the code line
-    # can operate on line (from symbols) or from stack (opcodes ending with S)
-    # @err when dividing by zero
-    # @err when symbols are not integers
-    # @param  line_array is the line of code split into array by words
-    def doArithmetic(self, line_array):
-        d_print("\tINTE\tdoArithmetic\t" + str(line_array))
-        arithmetic_type = line_array[0]
-        if (arithmetic_type == 'ADDS') | (arithmetic_type == 'SUBS') | \
-                (arithmetic_type == 'MULS') | (arithmetic_type == 'IDIVS') | (arithmetic_type == 'DIVS'):
-            type_symb = self.stack.stackTopType()
-            symbol1val = self.stack.stackPopValueByType(type_symb)
-            symbol2val = self.stack.stackPopValueByType(type_symb)
+    # makes report of the collected times, opcodes and subroutines are sorted by time
+    # @return dictionary with the report
+    def report(self):
+        opcodes = sorted(self.opcodes.items(), key=lambda item: -item[1][1])
+        routines = sorted(self.routines.items(), key=lambda item: -item[1][2])
+        return {
+            'instructions': sum(stat[0] for opcode, stat in opcodes),
+            'time': sum(stat[1] for opcode, stat in opcodes),
+            'opcodes': {opcode: {'count': stat[0], 'time': stat[1]} for opcode, stat in opcodes},
+            'routines': {name: {'calls': stat[0], 'inclusive': stat[1], 'exclusive': stat[2]}
+                         for name, stat in routines}
+        }
+
+    # stores the report as JSON file
+    # @param path is path of the file
+    # @err when the file cannot be written
+    def store(self, path):
+        self.finish()
+        try:
+            with open(path, 'w', encoding='UTF-8') as profile:
+                json.dump(self.report(), profile, indent=2)
+        except OSError:
+            raise OutputFileError("store - error profile file could not be opened")
+
+
+class Sampler:
+    # sampling profiler, thread that takes position of the executed program (ProgCounter
+    # and CallStack of the Interpret) every SAMPLE_INTERVAL seconds, the execution itself
+    # is not slowed down by measuring every instruction
+    # samples is dictionary, pair of program counter and tuple of the call stack is the key
+    # and number of samples of that position is the value
+    program = None
+    samples = {}
+    thread = None
+    stopped = None
+
+    def __init__(self, program):
+        self.program = program
+        self.samples = {}
+        self.thread = None
+        self.stopped = threading.Event()
+
+    # starts the sampling thread
+    def start(self):
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    # stops the sampling thread
+    def stop(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.thread.join()
+            self.thread = None
+
+    # body of the sampling thread
+    def sample(self):
+        program = self.program
+        samples = self.samples
+        while not self.stopped.wait(SAMPLE_INTERVAL):
+            position = (program.ProgCounter, tuple(program.CallStack))
+            samples[position] = samples.get(position, 0) + 1
+
+    # converts samples to collapsed stacks (format of flame graph tools)
+    # every stack starts by 'main' followed by labels of the called subroutines,
+    # nearest label before the sampled instruction (if it is not the subroutine itself)
+    # and opcode of the sampled instruction
+    # @return dictionary, stack of names separated by ';' is the key and number of samples is the value
+    def collapse(self):
+        code = self.program.files.code
+        label_lines = sorted((line, name) for name, line in self.program.labels.labelLines.items())
+        starts = [line for line, name in label_lines]
+        stacks = {}
+        for (counter, calls), count in self.samples.items():
+            if counter >= len(code):
+                continue
+            names = ['main']
+            for return_line in calls:
+                names.append(code[return_line - 1].args[0].name)
+            block = bisect.bisect_right(starts, counter) - 1
+            if (block >= 0) and (label_lines[block][1] != names[-1]):
+                names.append(label_lines[block][1])
+            names.append(code[counter].opcode)
+            stack = ';'.join(names)
+            stacks[stack] = stacks.get(stack, 0) + count
+        return stacks
+
+    # stores the collapsed stacks to file, one stack and its count per line
+    # @param path is path of the file
+    # @err when the file cannot be written
+    def store(self, path):
+        self.stop()
+        try:
+            with open(path, 'w', encoding='UTF-8') as collapsed:
+                for stack, count in sorted(self.collapse().items()):
+                    print(stack + ' ' + str(count), file=collapsed)
+        except OSError:
+            raise OutputFileError("store - error sample file could not be opened")
+
+
+class Optimizer:
+    # optimizes loaded and checked program (array code of FileProcessor and labels)
+    # level 1 folds lines with constant operands (foldableOpcodes and conditional jumps)
+    # level 2 also shortens chains of jumps, removes jumps to the next line and removes
+    # lines which cannot be reached
+    # lines which would end with error are never folded nor removed, so the error occurs
+    # at the same line, only number of executed instructions can be lower
+    # noops are lines of conditional jumps that are never taken, they are removed on level 2
+    code = []
+    labels = None
+    noops = set()
+    scratch = None  # < empty interpret the folded lines are computed on (made by first fold)
+    result = None  # < variable of the scratch interpret the folded lines write to
+
+    def __init__(self, code, labels):
+        self.code = code
+        self.labels = labels
+        self.noops = set()
+        self.scratch = None
+        self.result = None
+
+    # optimizes the program
+    # @param level is the optimization level (0 does nothing)
+    # @return optimized array code
+    def optimize(self, level):
+        if level >= 1:
+            for line in self.code:
+                if line.opcode in foldableOpcodes:
+                    self.foldLine(line)
+                elif (line.opcode == 'JUMPIFEQ') | (line.opcode == 'JUMPIFNEQ'):
+                    self.foldJump(line, level)
+        if level >= 2:
+            for line in self.code:
+                if (line.target is not None) & (line.opcode != 'CALL'):
+                    self.threadJump(line)
+            # removed lines can make other jumps point to the next line
+            length = len(self.code) + 1
+            while len(self.code) < length:
+                length = len(self.code)
+                self.removeLines()
+        return self.code
+
+    # replaces line with constant operands by MOVE of its result, the result is computed
+    # by the handler of the line on empty interpret, so it is the same as at runtime
+    # @param line is the decoded line of code
+    def foldLine(self, line):
+        if any(arg.kind != 'const' for arg in line.args[1:]):
+            return
+        if self.scratch is None:
+            self.scratch = Interpret()
+            self.result = VarOperand('GF', 'result')
+            self.scratch.variables.createVar(self.result)
+        folded = Instruction(line.opcode)
+        folded.args = [self.result] + line.args[1:]
+        # value of the previous fold must not be taken as the appended value by CONCAT
+        self.scratch.variables.getVariable(self.result).value = None
+        try:
+            getattr(self.scratch, handlers[line.opcode])(folded)
+        except InterpretError:
+            return
+        variable = self.scratch.variables.getVariable(self.result)
+        line.opcode = 'MOVE'
+        line.args = [line.args[0], ConstOperand(variable.type, variable.value)]
+
+    # replaces conditional jump with constant operands by JUMP when the jump is always
+    # taken, jump that is never taken is added to noops on level 2
+    # @param line is the decoded line of code
+    # @param level is the optimization level
+    def foldJump(self, line, level):
+        if (line.args[1].kind != 'const') | (line.args[2].kind != 'const'):
+            return
+        try:
+            equal = symbolsEqual(line.args[1].type, line.args[1].value, line.args[2].type, line.args[2].value)
+        except InterpretError:
+            return
+        if equal == (line.opcode == 'JUMPIFEQ'):
+            line.opcode = 'JUMP'
+            line.args = line.args[:1]
+        elif level >= 2:
+            self.noops.add(line)
+
+    # returns first line after the label which is not a label
+    # @param target is line of the label
+    # @return line executed after jump to the label
+    def landing(self, target):
+        line = target + 1
+        while (line < len(self.code)) and (self.code[line].opcode == 'LABEL'):
+            line += 1
+        return line
+
+    # changes target of the jump to the end of chain of unconditional jumps
+    # @param line is the decoded line of code
+    def threadJump(self, line):
+        visited = {line.target}
+        landing = self.landing(line.target)
+        while (landing < len(self.code)) and (self.code[landing].opcode == 'JUMP') and \
+                (self.code[landing].target not in visited):
+            line.target = self.code[landing].target
+            visited.add(line.target)
+            landing = self.landing(line.target)
+        line.args[0] = LabelOperand(self.code[line.target].args[0].name)
+
+    # finds lines that can be executed, starting by the first line
+    # @return set of reachable lines
+    def reachableLines(self):
+        reachable = set()
+        pending = [0]
+        while pending:
+            i = pending.pop()
+            if (i >= len(self.code)) or (i in reachable):
+                continue
+            reachable.add(i)
+            line = self.code[i]
+            if line in self.noops:
+                pending.append(i + 1)
+                continue
+            if line.target is not None:
+                pending.append(line.target)
+            if line.opcode not in ('JUMP', 'EXIT', 'RETURN'):
+                # CALL continues by the next line after RETURN
+                pending.append(i + 1)
+        return reachable
+
+    # removes unreachable lines, no-op lines and jumps to the next line
+    # lines are renumbered, targets and labels are updated
+    def removeLines(self):
+        reachable = self.reachableLines()
+        kept = []
+        for i in range(len(self.code)):
+            line = self.code[i]
+            if (i not in reachable) or (line in self.noops):
+                continue
+            if (line.opcode == 'JUMP') and (self.landing(line.target) == self.landing(i)):
+                continue
+            kept.append(i)
+        new_lines = {old: new for new, old in enumerate(kept)}
+        code = []
+        for i in kept:
+            line = self.code[i]
+            if line.target is not None:
+                line.target = new_lines[line.target]
+            code.append(line)
+        self.labels.labelLines = {name: new_lines[line] for name, line in self.labels.labelLines.items()
+                                  if line in new_lines}
+        self.code = code
+
+
+class Transpiler:
+    # transpiles loaded and checked program (array code of FileProcessor) to source of
+    # python function link(program, lines), which binds the program to Interpret program
+    # and returns dictionary of functions of basic blocks, first line of the block is the key
+    # every function executes its block and returns line executed next, so the program
+    # runs without the interpret loop (see Interpret.executeTranspiled)
+    # variables used in the block are looked up once and kept in python locals until
+    # frames change, frequent opcodes are written directly as python code and the other
+    # ones call their handlers, errors are raised in the same order and with the same
+    # codes as by Interpret.execute
+    # source is array of lines of the generated function body, bindings are names bound
+    # by link (handlers, lines and constants), cached is dictionary of variables already
+    # looked up in the block, key is pair frame and name and value is name of the local,
+    # pending is number of executed lines not added to ExecutedInstructions yet
+    code = []
+    source = []
+    bindings = {}
+    cached = {}
+    indent = ''
+    pending = 0
+    number = 0
+    start = 0
+
+    def __init__(self, code):
+        self.code = code
+        self.source = []
+        self.bindings = {}
+        self.cached = {}
+        self.indent = ''
+        self.pending = 0
+        self.number = 0
+        self.start = 0
+
+    # transpiles the whole program
+    # @return python source with function link
+    def transpile(self):
+        starts = self.blockStarts()
+        for i in range(len(starts) - 1):
+            self.transpileBlock(starts[i], starts[i + 1])
+        body = self.source
+        self.source = ['def link(program, lines):',
+                       '    variables = program.variables',
+                       '    GF = variables.GlobalFrame',
+                       '    LF = VarOperand(\'LF\', \'\')',
+                       '    call_stack = program.CallStack',
+                       '    write = program.files.output.write']
+        for name, value in self.bindings.items():
+            self.source.append('    ' + name + ' = ' + value)
+        self.source += body
+        self.source.append('')
+        self.source.append('    return {' + ', '.join(str(start) + ': block_' + str(start)
+                                                    for start in starts[:-1]) + '}')
+        return '\n'.join(self.source) + '\n'
+
+    # finds first lines of the basic blocks - the first line, lines after labels (jumps
+    # continue after the label line), lines after CALL (return addresses) and lines
+    # after unconditional jumps
+    # @return sorted list of the first lines, the last item is the end of the program
+    def blockStarts(self):
+        starts = {0, len(self.code)}
+        for i, line in enumerate(self.code):
+            if line.target is not None:
+                starts.add(line.target + 1)
+            if line.opcode in ('CALL', 'JUMP', 'RETURN', 'EXIT'):
+                starts.add(i + 1)
+        return sorted(start for start in starts if start <= len(self.code))
+
+    # transpiles one basic block to nested function of link, block with a jump to its
+    # own start is a loop
+    # @param start is the first line of the block
+    # @param end is the first line after the block
+    def transpileBlock(self, start, end):
+        self.start = start
+        self.cached = {}
+        self.pending = 0
+        self.source.append('')
+        self.source.append('    def block_' + str(start) + '():')
+        loop = any((line.target == start - 1) & (line.opcode.startswith('JUMP'))
+                   for line in self.code[start:end])
+        if loop:
+            self.source.append('        while True:')
+            self.indent = ' ' * 12
         else:
-            type_symb = self.getSymbolType(line_array[2])
-            symbol1val = self.getSymbolValueByType(line_array[2], type_symb)
-            symbol2val = self.getSymbolValueByType(line_array[3], type_symb)
-        if arithmetic_type == 'ADD':
-            if type_symb == 'int':
-                self.variables.setVar(line_array[1], 'int', str(int(symbol1val) + int(symbol2val)))
-            else:
-                self.variables.setVar(line_array[1], 'float', str(float(symbol1val) + float(symbol2val)))
-        elif arithmetic_type == 'ADDS':
-            if type_symb == 'int':
-                self.stack.stackPush(str(int(symbol1val) + int(symbol2val)), 'int')
-            else:
-                self.stack.stackPush(str(float(symbol1val) + float(symbol2val)), 'float')
-        elif arithmetic_type == 'SUB':
-            if type_symb == 'int':
-                self.variables.setVar(line_array[1], 'int', str(int(symbol1val) - int(symbol2val)))
+            self.indent = ' ' * 8
+        for i in range(start, end):
+            self.transpileLine(i, self.code[i])
+        if self.code[end - 1].opcode not in ('CALL', 'JUMP', 'RETURN', 'EXIT'):
+            self.flushCount()
+            self.emit('return ' + str(end))
+
+    # transpiles one line of the block
+    # @param i is number of the line
+    # @param line is the decoded line of code
+    def transpileLine(self, i, line):
+        opcode = line.opcode
+        args = line.args
+        self.source.append(self.indent + '# ' + str(i) + ' ' + repr(str(line).rstrip())[1:-1])
+        for var in line.checkVars:
+            self.variable(var)
+        self.pending += 1
+        if opcode == 'LABEL':
+            pass
+        elif opcode == 'MOVE':
+            symb_type, symb = self.symbol(i, args[1], True)
+            self.setVariable(args[0], symb_type, symb)
+        elif opcode == 'DEFVAR':
+            self.emit(self.frame(args[0]) + '.createVar(' + repr(args[0].name) + ')')
+            self.emit('program.DefinedVars += 1')
+        elif opcode in ('CREATEFRAME', 'PUSHFRAME', 'POPFRAME'):
+            self.emit(self.handler(line) + '(' + self.line(i) + ')')
+            self.cached = {key: name for key, name in self.cached.items() if key[0] == 'GF'}
+        elif opcode in ('ADD', 'SUB', 'MUL', 'IDIV', 'DIV'):
+            type1, symb1 = self.symbol(i, args[1], False)
+            type2, symb2 = self.symbol(i, args[2], False)
+            if isLiteral(type1) & isLiteral(type2):
+                self.check(i, type1 != type2, 'OperandTypeError', 'types not matching')
             else:
-                self.variables.setVar(line_array[1], 'float', str(float(symbol1val) - float(symbol2val)))
-        elif arithmetic_type == 'SUBS':
-            if type_symb == 'int':
-                self.stack.stackPush(str(int(symbol2val) - int(symbol1val)), 'int')
+                self.check(i, type2 + ' != ' + type1, 'OperandTypeError', 'types not matching')
+            if opcode in ('ADD', 'SUB', 'MUL'):
+                self.checkType(i, type1, ('int', 'float'))
+                operator = {'ADD': ' + ', 'SUB': ' - ', 'MUL': ' * '}[opcode]
+                self.setVariable(args[0], type1, symb1 + operator + symb2)
             else:
-                self.stack.stackPush(str(float(symbol2val) - float(symbol1val)), 'float')
-        elif arithmetic_type == 'MUL':
-            if type_symb == 'int':
-                self.variables.setVar(line_array[1], 'int', str(int(symbol1val) * int(symbol2val)))
+                function = 'arithmeticIdiv' if opcode == 'IDIV' else 'arithmeticDiv'
+                self.emit('t0, x0 = ' + function + '(' + type1 + ', ' + symb1 + ', ' + symb2 + ')')
+                self.setVariable(args[0], 't0', 'x0')
+        elif opcode in ('LT', 'GT', 'EQ'):
+            type1, symb1 = self.symbol(i, args[1], True)
+            type2, symb2 = self.symbol(i, args[2], True)
+            operator = {'LT': ' < ', 'GT': ' > ', 'EQ': ' == '}[opcode]
+            if (isLiteral(type1) & (type1 != '\'nil\'')) | (isLiteral(type2) & (type2 != '\'nil\'')):
+                self.emit('if ' + type1 + ' == ' + type2 + ':')
             else:
-                self.variables.setVar(line_array[1], 'float', str(float(symbol1val) * float(symbol2val)))
-        elif arithmetic_type == 'MULS':
-            if type_symb == 'int':
-                self.stack.stackPush(str(int(symbol1val) * int(symbol2val)), 'int')
+                self.emit('if ' + type1 + ' == ' + type2 + ' and ' + type1 + ' != \'nil\':')
+            self.emit('    x0 = ' + symb1 + operator + symb2)
+            self.emit('else:')
+            self.emit('    x0 = compareSymbols(' + repr(opcode) + ', ' + type1 + ', ' + symb1 + ', ' +
+                      type2 + ', ' + symb2 + ')')
+            self.setVariable(args[0], '\'bool\'', 'x0')
+        elif opcode in ('AND', 'OR'):
+            symb1 = self.typedSymbol(i, args[1], 'bool')
+            symb2 = self.typedSymbol(i, args[2], 'bool')
+            self.setVariable(args[0], '\'bool\'', symb1 + ' ' + opcode.lower() + ' ' + symb2)
+        elif opcode == 'NOT':
+            self.setVariable(args[0], '\'bool\'', 'not ' + self.typedSymbol(i, args[1], 'bool'))
+        elif opcode == 'INT2FLOAT':
+            self.setVariable(args[0], '\'float\'', 'float(' + self.typedSymbol(i, args[1], 'int') + ')')
+        elif opcode == 'FLOAT2INT':
+            self.setVariable(args[0], '\'int\'', 'int(' + self.typedSymbol(i, args[1], 'float') + ')')
+        elif opcode == 'INT2CHAR':
+            self.setVariable(args[0], '\'string\'', 'intToChar(' + self.typedSymbol(i, args[1], 'int') + ')')
+        elif opcode == 'STRI2INT':
+            symb1 = self.typedSymbol(i, args[1], 'string')
+            symb2 = self.typedSymbol(i, args[2], 'int')
+            self.setVariable(args[0], '\'int\'', 'stringOrdinal(' + symb1 + ', ' + symb2 + ')')
+        elif opcode == 'WRITE':
+            if args[0].kind == 'const':
+                self.emit('write(' + repr(valueToString(args[0].type, args[0].value)) + ')')
             else:
-                self.stack.stackPush(str(float(symbol1val) * float(symbol2val)), 'float')
-        elif (arithmetic_type == 'IDIV') & (type_symb == 'int'):
-            if symbol2val != '0':
-                self.variables.setVar(line_array[1], 'int', str(int(int(symbol1val) / int(symbol2val))))
+                symb_type, symb = self.symbol(i, args[0], False)
+                self.emit('write(valueToString(' + symb_type + ', ' + symb + '))')
+        elif opcode == 'PUSHS':
+            symb_type, symb = self.symbol(i, args[0], True)
+            self.emit('program.stack.stackPush(' + symb + ', ' + symb_type + ')')
+        elif opcode == 'POPS':
+            self.emit('t0, x0 = program.stack.stackPop()')
+            self.setVariable(args[0], 't0', 'x0')
+        elif opcode == 'JUMP':
+            self.flushCount()
+            self.jump(line.target)
+        elif opcode in ('JUMPIFEQ', 'JUMPIFNEQ'):
+            type1, symb1 = self.symbol(i, args[1], True)
+            type2, symb2 = self.symbol(i, args[2], True)
+            self.flushCount()
+            self.emit('if ' + type1 + ' == ' + type2 + ':')
+            self.emit('    x0 = ' + symb1 + ' == ' + symb2)
+            self.emit('else:')
+            self.emit('    x0 = symbolsEqual(' + type1 + ', ' + symb1 + ', ' + type2 + ', ' + symb2 + ')')
+            self.emit(('if x0:' if opcode == 'JUMPIFEQ' else 'if not x0:'))
+            self.jump(line.target, '    ')
+        elif opcode in ('JUMPIFEQS', 'JUMPIFNEQS'):
+            self.flushCount()
+            self.emit(('if ' if opcode == 'JUMPIFEQS' else 'if not ') + 'symbolsEqual(*program.popCompareOperands()):')
+            self.jump(line.target, '    ')
+        elif opcode == 'CALL':
+            self.flushCount()
+            self.emit('call_stack.append(' + str(i + 1) + ')')
+            self.emit('return ' + str(line.target + 1))
+        elif opcode == 'RETURN':
+            self.flushCount()
+            self.check(i, 'not call_stack', 'MissingValueError', 'poping from empty call stack')
+            self.emit('return call_stack.pop()')
+        else:
+            if opcode in ('EXIT', 'BREAK'):
+                # the line is not counted yet when it is executed
+                self.pending -= 1
+                self.flushCount()
+                self.pending += 1
+            self.emit(self.handler(line) + '(' + self.line(i) + ')')
+
+    # adds line of the generated code to the current block
+    # @param text is the line of code (without indentation)
+    def emit(self, text):
+        self.source.append(self.indent + text)
+
+    # adds executed lines not counted yet to ExecutedInstructions
+    def flushCount(self):
+        if self.pending > 0:
+            self.emit('program.ExecutedInstructions += ' + str(self.pending))
+            self.pending = 0
+
+    # generates jump to the label, execution continues by the line after the label,
+    # jump to the start of the block continues the loop
+    # @param target is line of the label
+    # @param indent is indentation added to the current one
+    def jump(self, target, indent=''):
+        if target + 1 == self.start:
+            self.emit(indent + 'continue')
+        else:
+            self.emit(indent + 'return ' + str(target + 1))
+
+    # generates raising of the error when the condition holds
+    # @param i is number of the line
+    # @param condition is python expression of the condition, or bool when the condition
+    #        is known before the execution
+    # @param error is name of the error class
+    # @param message is message of the error
+    def check(self, i, condition, error, message):
+        raise_error = 'raise ' + error + '("transpiled line ' + str(i) + ' - error ' + message + '")'
+        if condition is True:
+            self.emit(raise_error)
+        elif condition is not False:
+            self.emit('if ' + condition + ':')
+            self.emit('    ' + raise_error)
+
+    # returns expression of the frame of the variable
+    # @param var is the decoded variable operand
+    # @return python expression
+    def frame(self, var):
+        if var.frame == 'GF':
+            return 'GF'
+        elif var.frame == 'TF':
+            return 'variables.TemporaryFrame'
+        return 'variables.getFrame(LF)'
+
+    # returns local holding the variable (object Variable), the variable is looked up
+    # when it is not cached in the block yet
+    # @param var is the decoded variable operand
+    # @return name of the local
+    def variable(self, var):
+        key = (var.frame, var.name)
+        if key not in self.cached:
+            self.number += 1
+            self.cached[key] = 'v' + str(self.number)
+            self.emit(self.cached[key] + ' = ' + self.frame(var) + '.getVar(' + repr(var.name) + ')')
+        return self.cached[key]
+
+    # generates setting of the variable
+    # @param var is the decoded variable operand
+    # @param var_type is python expression of the type
+    # @param value is python expression of the value
+    def setVariable(self, var, var_type, value):
+        variable = self.variable(var)
+        self.emit(variable + '.value = ' + value)
+        self.emit(variable + '.type = ' + var_type)
+
+    # returns expressions of type and value of the symbol, value of variable is checked
+    # to be set (as by Interpret.getSymbolType)
+    # @param i is number of the line
+    # @param symbol is decoded operand (variable or constant)
+    # @param text is True when StrBuf value must be converted to str (as by getSymbolValue)
+    # @return pair of python expressions of the type and the value
+    def symbol(self, i, symbol, text):
+        if symbol.kind == 'const':
+            if symbol.type in ('int', 'bool', 'string'):
+                return repr(symbol.type), repr(symbol.value)
+            elif symbol.type == 'nil':
+                return '\'nil\'', 'NIL'
+            # float constants (inf, nan) have no python literal
+            j = self.code[i].args.index(symbol)
+            name = 'const_' + str(i) + '_' + str(j)
+            self.bindings[name] = 'lines[' + str(i) + '].args[' + str(j) + '].value'
+            return repr(symbol.type), name
+        variable = self.variable(symbol)
+        self.number += 1
+        symb_type, symb = 't' + str(self.number), 'x' + str(self.number)
+        self.emit(symb_type + ' = ' + variable + '.type')
+        self.check(i, symb_type + ' == \'undef\'', 'MissingValueError', 'not set variable')
+        self.emit(symb + ' = ' + variable + '.value')
+        if text:
+            self.emit('if ' + symb + '.__class__ is StrBuf:')
+            self.emit('    ' + symb + ' = ' + symb + '.text()')
+        return symb_type, symb
+
+    # returns expression of value of the symbol, that must be of given type (as by
+    # Interpret.getSymbolValueByType)
+    # @param i is number of the line
+    # @param symbol is decoded operand (variable or constant)
+    # @param symbol_type is the expected type
+    # @return python expression of the value
+    def typedSymbol(self, i, symbol, symbol_type):
+        symb_type, symb = self.symbol(i, symbol, True)
+        self.checkType(i, symb_type, (symbol_type,))
+        return symb
+
+    # generates check that the symbol is of one of the types
+    # @param i is number of the line
+    # @param symb_type is python expression of type of the symbol
+    # @param types is tuple of the allowed types
+    def checkType(self, i, symb_type, types):
+        if isLiteral(symb_type):
+            self.check(i, symb_type not in [repr(allowed) for allowed in types], 'OperandTypeError', 'bad type')
+        else:
+            self.check(i, ' and '.join(symb_type + ' != ' + repr(allowed) for allowed in types),
+                       'OperandTypeError', 'bad type')
+
+    # returns name of the handler of the line bound by link
+    # @param line is the decoded line of code
+    # @return name of the handler
+    def handler(self, line):
+        name = handlers[line.opcode]
+        self.bindings[name] = 'program.' + name
+        return name
+
+    # returns name of the line bound by link
+    # @param i is number of the line
+    # @return name of the line
+    def line(self, i):
+        name = 'line_' + str(i)
+        self.bindings[name] = 'lines[' + str(i) + ']'
+        return name
+
+
+class ClosureCompiler:
+    # turns every line of loaded and checked program to python closure with its operands,
+    # frames and jump target already bound, every closure executes its line and returns
+    # line executed next (see Interpret.executeClosures)
+    # closures of opcodes in the closureMakers table are made by the method of the table,
+    # closures of the other opcodes call their handlers
+    # variables of the line are looked up first (as by Interpret.checkLineVars), so the
+    # errors are raised in the same order and with the same codes as by Interpret.execute
+    program = None
+
+    def __init__(self, program):
+        self.program = program
+
+    # makes closures of the whole program
+    # @return array of closures, index is line of the code
+    def compile(self):
+        closures = []
+        for i, line in enumerate(self.program.files.code):
+            maker = closureMakers.get(line.opcode)
+            if maker is None:
+                closures.append(self.closeHandler(i, line))
             else:
-                d_print("INTE doArithmetic - error zero division")
-                exit(ERR_BADVAL_OP)
-        elif (arithmetic_type == 'IDIVS') & (type_symb == 'int'):
-            if symbol2val != '0':
-                self.stack.stackPush(str(int(int(symbol2val) / int(symbol1val))), 'int')
+                closures.append(getattr(self, maker)(i, line))
+        return closures
+
+    # returns function, that returns object holding type and value of the operand, for
+    # variable it is its Variable (looked up on every call), constant is returned as it is
+    # @err (of the returned function) when the frame or variable is not defined
+    # @param operand is decoded operand (variable or constant)
+    # @return the function
+    def accessor(self, operand):
+        if operand.kind == 'const':
+            return lambda: operand
+        variables = self.program.variables
+        if (operand.frame == 'GF') & (operand.slot is not None):
+            global_slots = variables.GlobalFrame.slots
+            slot = operand.slot
+            name = operand.name
+
+            def globalVariable():
+                variable = global_slots[slot]
+                if variable is None:
+                    raise UndefinedVariableError("globalVariable - error variable " + name + " not defined")
+                return variable
+            return globalVariable
+        return lambda: variables.getVariable(operand)
+
+    # LABEL <label>
+    def closeLabel(self, i, line):
+        following = i + 1
+        return lambda: following
+
+    # MOVE <var> <symb>
+    def closeMove(self, i, line):
+        following = i + 1
+        destination = self.accessor(line.args[0])
+        source = self.accessor(line.args[1])
+
+        def move():
+            variable = destination()
+            symbol = source()
+            if symbol.type == 'undef':
+                raise MissingValueError("move - error not set variable")
+            value = symbol.value
+            if value.__class__ is StrBuf:
+                value = value.text()
+            variable.type = symbol.type
+            variable.value = value
+            return following
+        return move
+
+    # DEFVAR <var>
+    def closeDefVar(self, i, line):
+        following = i + 1
+        program = self.program
+        var = line.args[0]
+
+        def defVar():
+            program.variables.createVar(var)
+            program.DefinedVars += 1
+            return following
+        return defVar
+
+    # ADD, SUB, MUL, IDIV, DIV <var> <symb1> <symb2>
+    def closeArithmetic(self, i, line):
+        following = i + 1
+        destination = self.accessor(line.args[0])
+        source1 = self.accessor(line.args[1])
+        source2 = self.accessor(line.args[2])
+        opcode = line.opcode
+
+        # operands of the kernels are numbers, so they are never StrBuf
+        def arithmetic():
+            variable = destination()
+            symbol1 = source1()
+            symbol2 = source2()
+            kernel = operationKernels.get((opcode, symbol1.type, symbol2.type))
+            if kernel is None:
+                variable.type, variable.value = operateSymbols(opcode, *symbolValues(symbol1, symbol2))
             else:
-                d_print("INTE doArithmetic - error zero division")
-                exit(ERR_BADVAL_OP)
-        elif (arithmetic_type == 'DIV') & (type_symb == 'float'):
-            if symbol2val != '0.0':
-                self.variables.setVar(line_array[1], 'float', str(float(symbol1val) / float(symbol2val)))
+                variable.value = kernel[1](symbol1.value, symbol2.value)
+                variable.type = kernel[0]
+            return following
+        return arithmetic
+
+    # LT, GT, EQ <var> <symb1> <symb2>
+    def closeCompare(self, i, line):
+        following = i + 1
+        destination = self.accessor(line.args[0])
+        source1 = self.accessor(line.args[1])
+        source2 = self.accessor(line.args[2])
+        relation = line.opcode
+
+        def compare():
+            variable = destination()
+            variable.type, variable.value = operateSymbols(relation, *symbolValues(source1(), source2()))
+            return following
+        return compare
+
+    # AND, OR <var> <symb1> <symb2>
+    def closeLogic(self, i, line):
+        following = i + 1
+        destination = self.accessor(line.args[0])
+        source1 = self.accessor(line.args[1])
+        source2 = self.accessor(line.args[2])
+        conjunction = line.opcode == 'AND'
+
+        def logic():
+            variable = destination()
+            symbol1 = source1()
+            symbol2 = source2()
+            value1 = boolValue(symbol1)
+            value2 = boolValue(symbol2)
+            variable.value = (value1 and value2) if conjunction else (value1 or value2)
+            variable.type = 'bool'
+            return following
+        return logic
+
+    # NOT <var> <symb>
+    def closeNot(self, i, line):
+        following = i + 1
+        destination = self.accessor(line.args[0])
+        source = self.accessor(line.args[1])
+
+        def negation():
+            variable = destination()
+            variable.value = not boolValue(source())
+            variable.type = 'bool'
+            return following
+        return negation
+
+    # WRITE <symb>
+    def closeWrite(self, i, line):
+        following = i + 1
+        output = self.program.files.output
+        source = self.accessor(line.args[0])
+
+        def write():
+            symbol = source()
+            if symbol.type == 'undef':
+                raise MissingValueError("write - error not set variable")
+            output.write(valueToString(symbol.type, symbol.value))
+            return following
+        return write
+
+    # PUSHS <symb>
+    def closePushs(self, i, line):
+        following = i + 1
+        stack = self.program.stack
+        source = self.accessor(line.args[0])
+
+        def pushs():
+            symbol = source()
+            if symbol.type == 'undef':
+                raise MissingValueError("pushs - error not set variable")
+            value = symbol.value
+            if value.__class__ is StrBuf:
+                value = value.text()
+            stack.stackPush(value, symbol.type)
+            return following
+        return pushs
+
+    # POPS <var>
+    def closePops(self, i, line):
+        following = i + 1
+        stack = self.program.stack
+        destination = self.accessor(line.args[0])
+
+        def pops():
+            variable = destination()
+            variable.type, variable.value = stack.stackPop()
+            return following
+        return pops
+
+    # JUMP <label>
+    def closeJump(self, i, line):
+        landing = line.target + 1
+        return lambda: landing
+
+    # JUMPIFEQ, JUMPIFNEQ <label> <symb1> <symb2>
+    def closeJumpIf(self, i, line):
+        following = i + 1
+        landing = line.target + 1
+        source1 = self.accessor(line.args[1])
+        source2 = self.accessor(line.args[2])
+        jump_equal = line.opcode == 'JUMPIFEQ'
+
+        def jumpIf():
+            if symbolsEqual(*symbolValues(source1(), source2())) == jump_equal:
+                return landing
+            return following
+        return jumpIf
+
+    # JUMPIFEQS, JUMPIFNEQS <label>
+    def closeJumpIfStack(self, i, line):
+        following = i + 1
+        landing = line.target + 1
+        program = self.program
+        jump_equal = line.opcode == 'JUMPIFEQS'
+
+        def jumpIfStack():
+            if symbolsEqual(*program.popCompareOperands()) == jump_equal:
+                return landing
+            return following
+        return jumpIfStack
+
+    # CALL <label>
+    def closeCall(self, i, line):
+        following = i + 1
+        landing = line.target + 1
+        call_stack = self.program.CallStack
+
+        def call():
+            call_stack.append(following)
+            return landing
+        return call
+
+    # RETURN
+    def closeReturn(self, i, line):
+        call_stack = self.program.CallStack
+
+        def ret():
+            if call_stack:
+                return call_stack.pop()
+            raise MissingValueError("execute - error poping from empty call stack")
+        return ret
+
+    # other opcodes, the closure checks variables of the line and calls its handler
+    def closeHandler(self, i, line):
+        following = i + 1
+        program = self.program
+        handler = getattr(program, handlers[line.opcode])
+        if not line.checkVars:
+            def execute():
+                handler(line)
+                return following
+            return execute
+
+        def checkedExecute():
+            program.checkLineVars(line)
+            handler(line)
+            return following
+        return checkedExecute
+
+
+class TraceJit:
+    # trace based just in time compiler of hot loops (see Interpret.executeJit)
+    # counters is dictionary, header of the loop (line after label of backward jump) is
+    # the key and number of the backward jumps to it is the value, header of loop that
+    # cannot be traced has counter None
+    # when the counter reaches JIT_THRESHOLD, lines executed until the header is reached
+    # again are recorded with types of their operands (see record) and the trace is
+    # compiled to python function (see compileTrace), traces is dictionary, header is the
+    # key and the function is the value
+    # the function executes the loop while the recorded path is taken and types of the
+    # variables are the recorded ones (guards), otherwise it returns line the interpret
+    # continues at, so the rest of the program is executed by Interpret.execute loop
+    # source, bound, names, known and pending are state of compileTrace - lines of the
+    # generated code, objects bound to the function, locals of the variables (pair frame
+    # and name is the key), known types of the variables and lines not counted yet
+    program = None
+    counters = {}
+    traces = {}
+    source = []
+    bound = []
+    names = {}
+    known = {}
+    pending = 0
+
+    def __init__(self, program):
+        self.program = program
+        self.counters = {}
+        self.traces = {}
+        self.source = []
+        self.bound = []
+        self.names = {}
+        self.known = {}
+        self.pending = 0
+
+    # called by the interpret after backward jump, executes the trace of the loop or
+    # counts the jump and records and compiles the trace when the loop is hot
+    # @param line is the executed jump
+    def backwardJump(self, line):
+        program = self.program
+        header = program.ProgCounter
+        trace_function = self.traces.get(header)
+        if trace_function is not None:
+            program.ProgCounter = trace_function()
+            return
+        if line.opcode not in ('JUMP', 'JUMPIFEQ', 'JUMPIFNEQ', 'JUMPIFEQS', 'JUMPIFNEQS'):
+            return
+        count = self.counters.get(header, 0)
+        if count is None:
+            return
+        if count < JIT_THRESHOLD:
+            self.counters[header] = count + 1
+            return
+        self.counters[header] = None
+        recorded = self.record(header)
+        if recorded is not None:
+            trace('INTE', "backwardJump - compiling trace of loop at line " + str(header))
+            self.traces[header] = self.compileTrace(header, recorded)
+
+    # executes lines until the header of the loop is reached again and records them
+    # @param header is line of the loop header
+    # @err all possible errors of the executed lines
+    # @return list of pairs line number and tuple of operand types of the line (None for
+    #         labels and types), None when the loop cannot be traced
+    def record(self, header):
+        program = self.program
+        code = program.files.code
+        recorded = []
+        while len(recorded) < JIT_TRACE_LENGTH:
+            counter = program.ProgCounter
+            if (counter >= len(code)) or (code[counter].opcode in untraceableOpcodes):
+                return None
+            line = code[counter]
+            if line.checkVars:
+                program.checkLineVars(line)
+            recorded.append((counter, tuple(program.getSymbolTypeUndefA(arg) if arg.kind in ('var', 'const')
+                                            else None for arg in line.args)))
+            line.handler(line)
+            program.ExecutedInstructions += 1
+            program.ProgCounter += 1
+            if program.ProgCounter == header:
+                return recorded
+        return None
+
+    # compiles recorded trace to python function, the first iteration is peeled off, so
+    # the loop itself does not check types known from the previous iteration
+    # @param header is line of the loop header
+    # @param recorded is the recorded trace (see record)
+    # @return the function, it returns line the interpret continues at
+    def compileTrace(self, header, recorded):
+        code = self.program.files.code
+        self.source = []
+        self.bound = [self.program, code, self.program.variables]
+        self.names = {}
+        global_entry = []
+        entry = []
+        for i, types in recorded:
+            for arg in code[i].args:
+                if (arg.kind == 'var') and ((arg.frame, arg.name) not in self.names):
+                    if arg.frame == 'GF':
+                        global_entry.append('        ' + self.bindVariable(arg))
+                    else:
+                        entry.append('            ' + self.bindVariable(arg))
+        self.traceBody(recorded, {}, ' ' * 8)
+        peeled = self.source
+        # types known at the start of every iteration of the loop
+        loop_known = dict(self.known)
+        while True:
+            self.source = []
+            self.traceBody(recorded, dict(loop_known), ' ' * 12)
+            stable = {key: var_type for key, var_type in loop_known.items() if self.known.get(key) == var_type}
+            if stable == loop_known:
+                break
+            loop_known = stable
+        loop = self.source + [' ' * 12 + 'continue']
+        self.source = ['def make(bound):',
+                       '    program = bound[0]',
+                       '    variables = bound[2]',
+                       '    write = program.files.output.write']
+        for index in range(3, len(self.bound)):
+            self.source.append('    b' + str(index) + ' = bound[' + str(index) + ']')
+        self.source.append('')
+        self.source.append('    def loop():')
+        self.source += global_entry
+        if entry:
+            self.source.append('        try:')
+            self.source += entry
+            self.source.append('        except InterpretError:')
+            self.source.append('            return ' + str(header))
+        self.source += peeled
+        self.source.append('        while True:')
+        self.source += loop
+        self.source.append('    return loop')
+        namespace = dict(globals())
+        exec(compile('\n'.join(self.source) + '\n', '<trace>', 'exec'), namespace)
+        return namespace['make'](self.bound)
+
+    # returns statement looking up the variable at the entry of the trace, variables of
+    # global frame are looked up only once (the frame is never replaced nor its variables
+    # removed), local and temporary frames cannot change in the trace (untraceableOpcodes)
+    # @param var is the decoded variable operand
+    # @return the statement
+    def bindVariable(self, var):
+        name = 'v' + str(len(self.names))
+        self.names[(var.frame, var.name)] = name
+        if var.frame == 'GF':
+            return name + ' = ' + self.bind(self.program.variables.GlobalFrame.getVar(var.name))
+        elif var.frame == 'TF':
+            return name + ' = variables.TemporaryFrame.getVar(' + repr(var.name) + ')'
+        return name + ' = variables.getFrame(' + self.bind(var) + ').getVar(' + repr(var.name) + ')'
+
+    # binds object to the generated function
+    # @param value is the object
+    # @return name of the object in the generated function
+    def bind(self, value):
+        self.bound.append(value)
+        return 'b' + str(len(self.bound) - 1)
+
+    # generates one iteration of the loop
+    # @param recorded is the recorded trace
+    # @param known is dictionary of types known at the start of the iteration
+    # @param indent is indentation of the generated code
+    def traceBody(self, recorded, known, indent):
+        code = self.program.files.code
+        self.known = known
+        self.pending = 0
+        for position, (i, types) in enumerate(recorded):
+            following = recorded[position + 1][0] if position + 1 < len(recorded) else recorded[0][0]
+            self.traceLine(i, code[i], types, following, indent)
+        if self.pending > 0:
+            self.source.append(indent + 'program.ExecutedInstructions += ' + str(self.pending))
+
+    # generates one line of the trace
+    # @param i is number of the line
+    # @param line is the decoded line of code
+    # @param types is tuple of recorded types of the operands
+    # @param following is line executed after the line in the trace
+    # @param indent is indentation of the generated code
+    def traceLine(self, i, line, types, following, indent):
+        opcode = line.opcode
+        args = line.args
+        self.source.append(indent + '# ' + str(i) + ' ' + repr(str(line).rstrip())[1:-1])
+        if opcode in ('MOVE', 'ADD', 'SUB', 'MUL', 'LT', 'GT', 'EQ', 'AND', 'OR', 'NOT') and \
+                traceResultType(opcode, types[1:]) is not None:
+            symbols = [self.traceSymbol(i, arg, types[j + 1], indent) for j, arg in enumerate(args[1:])]
+            self.pending += 1
+            result_type = traceResultType(opcode, types[1:])
+            if opcode == 'MOVE':
+                value = symbols[0]
+            elif opcode in ('ADD', 'SUB', 'MUL'):
+                value = symbols[0] + {'ADD': ' + ', 'SUB': ' - ', 'MUL': ' * '}[opcode] + symbols[1]
+            elif opcode == 'NOT':
+                value = 'not ' + symbols[0]
+            elif opcode in ('AND', 'OR'):
+                value = symbols[0] + ' ' + opcode.lower() + ' ' + symbols[1]
+            elif (types[1] == types[2]) & (types[1] != 'nil'):
+                value = symbols[0] + {'LT': ' < ', 'GT': ' > ', 'EQ': ' == '}[opcode] + symbols[1]
             else:
-                d_print("INTE doArithmetic - error zero division")
-                exit(ERR_BADVAL_OP)
-        elif (arithmetic_type == 'DIVS') & (type_symb == 'float'):
-            if symbol2val != '0.0':
-                self.stack.stackPush(str(float(symbol2val) / float(symbol1val)), 'float')
+                value = 'compareSymbols(' + repr(opcode) + ', ' + repr(types[1]) + ', ' + symbols[0] + ', ' + \
+                        repr(types[2]) + ', ' + symbols[1] + ')'
+            variable = self.names[(args[0].frame, args[0].name)]
+            self.source.append(indent + variable + '.value = ' + value)
+            self.source.append(indent + variable + '.type = ' + repr(result_type))
+            self.known[(args[0].frame, args[0].name)] = result_type
+        elif opcode in ('JUMPIFEQ', 'JUMPIFNEQ'):
+            symbol1 = self.traceSymbol(i, args[1], types[1], indent)
+            symbol2 = self.traceSymbol(i, args[2], types[2], indent)
+            if types[1] == types[2]:
+                condition = symbol1 + ' == ' + symbol2
             else:
-                d_print("INTE doArithmetic - error zero division")
-                exit(ERR_BADVAL_OP)
+                condition = 'symbolsEqual(' + repr(types[1]) + ', ' + symbol1 + ', ' + repr(types[2]) + ', ' + \
+                            symbol2 + ')'
+            self.traceBranch(i, line, opcode == 'JUMPIFEQ', condition, following, indent)
+        elif opcode in ('JUMPIFEQS', 'JUMPIFNEQS'):
+            self.traceBranch(i, line, opcode == 'JUMPIFEQS', 'symbolsEqual(*program.popCompareOperands())',
+                             following, indent)
+        elif opcode == 'WRITE' and args[0].kind == 'const':
+            self.pending += 1
+            self.source.append(indent + 'write(' + repr(valueToString(args[0].type, args[0].value)) + ')')
+        elif opcode == 'WRITE':
+            symbol = self.traceSymbol(i, args[0], types[0], indent)
+            self.pending += 1
+            self.source.append(indent + 'write(valueToString(' + repr(types[0]) + ', ' + symbol + '))')
+        elif opcode in ('LABEL', 'JUMP'):
+            self.pending += 1
         else:
-            d_print("INTE doArithmetic - error bad types")
-            exit(ERR_BADTYPE_OP)
-
-    # executes comparision operations based of the code line
-    # can operate from line (variables and constants) or with stack (variants with S)
-    # @err when the operand is nor EQ and nil type occurs
-    # @err when writing to undefined variable
-    # @param line_array is the line of code split into array by words
-    def doCompare(self, line_array):
-        d_print("\tINTE\tdoCompare\t" + str(line_array))
-        comparision_type = line_array[0]
-        if (comparision_type == 'EQS') | (comparision_type == 'GTS') | (comparision_type == 'LTS'):
-            symb2type = self.stack.stackTopType()
-            symb2value = self.stack.stackPopValue()
-            symb1type = self.stack.stackTopType()
-            symb1value = self.stack.stackPopValue()
+            # the handler looks up the variables itself, their types are not known after it
+            self.pending += 1
+            self.source.append(indent + self.bind(getattr(self.program, handlers[opcode])) + '(' +
+                               self.bind(line) + ')')
+            for arg in args:
+                if arg.kind == 'var':
+                    self.known.pop((arg.frame, arg.name), None)
+
+    # generates conditional jump of the trace, the trace is left when the jump does not
+    # go the recorded way
+    # @param i is number of the line
+    # @param line is the decoded line of code
+    # @param jump_equal is True when the line jumps if the condition holds
+    # @param condition is python expression of the condition
+    # @param following is line executed after the line in the trace
+    # @param indent is indentation of the generated code
+    def traceBranch(self, i, line, jump_equal, condition, following, indent):
+        self.pending += 1
+        self.source.append(indent + 'program.ExecutedInstructions += ' + str(self.pending))
+        self.pending = 0
+        taken = following == line.target + 1
+        if taken == jump_equal:
+            self.source.append(indent + 'if not ' + condition + ':')
         else:
-            symb1type = self.getSymbolType(line_array[2])
-            symb1value = self.getSymbolValue(line_array[2])
-            symb2type = self.getSymbolType(line_array[3])
-            symb2value = self.getSymbolValue(line_array[3])
-        if (symb1type == 'nil') | (symb2type == 'nil'):
-            if symb1type == symb2type:
-                if comparision_type == 'EQ':
-                    self.variables.setVar(line_array[1], 'bool', 'true')
-                elif comparision_type == 'EQS':
-                    self.stack.stackPush('true', 'bool')
+            self.source.append(indent + 'if ' + condition + ':')
+        self.source.append(indent + '    return ' + str(i + 1 if taken else line.target + 1))
+
+    # returns expression of value of the symbol, for variable with type not known yet it
+    # generates guard, that leaves the trace before the line when the type is not the
+    # recorded one (the interpret then executes the line and raises possible errors)
+    # @param i is number of the line
+    # @param symbol is decoded operand (variable or constant)
+    # @param symbol_type is the recorded type
+    # @param indent is indentation of the generated code
+    # @return python expression of the value
+    def traceSymbol(self, i, symbol, symbol_type, indent):
+        if symbol.kind == 'const':
+            if symbol.type in ('int', 'bool', 'string'):
+                return repr(symbol.value)
+            return self.bind(symbol.value)
+        key = (symbol.frame, symbol.name)
+        variable = self.names[key]
+        if self.known.get(key) != symbol_type:
+            self.source.append(indent + 'if ' + variable + '.type != ' + repr(symbol_type) + ':')
+            if self.pending > 0:
+                self.source.append(indent + '    program.ExecutedInstructions += ' + str(self.pending))
+            self.source.append(indent + '    return ' + str(i))
+            self.known[key] = symbol_type
+        if symbol_type == 'string':
+            return 'str(' + variable + '.value)'
+        return variable + '.value'
+
+
+class Interpret:
+    # the master class of whole project
+    # when profiler is set, the program is executed by executeProfiled
+    # when sampler is set, it samples the program during the execution
+    # optimization is level of the Optimizer used after the program is loaded
+    # when transpiled is set, the program is transpiled to python (see Transpiler) and
+    # executed by executeTranspiled, blocks are functions of its basic blocks
+    # when threaded is set, lines are turned to closures (see ClosureCompiler) and the
+    # program is executed by executeClosures
+    # when jit is set, hot loops are compiled by traceJit (see TraceJit) and the program
+    # is executed by executeJit
+    files = FileProcessor()
+    variables = VariableStorage()
+    labels = LabelStorage()
+    stack = StackStorage()
+    ProgCounter = 0
+    CallStack = []
+    ExecutedInstructions = 0
+    DefinedVars = 0
+    profiler = None
+    sampler = None
+    optimization = 0
+    transpiled = False
+    blocks = None
+    threaded = False
+    closures = None
+    jit = False
+    traceJit = None
+
+    def __init__(self):
+        self.files = FileProcessor()
+        self.variables = VariableStorage()
+        self.labels = LabelStorage()
+        self.stack = StackStorage()
+        self.ProgCounter = 0
+        self.CallStack = []
+        self.ExecutedInstructions = 0
+        self.DefinedVars = 0
+        self.profiler = None
+        self.sampler = None
+        self.optimization = 0
+        self.transpiled = False
+        self.blocks = None
+        self.threaded = False
+        self.closures = None
+        self.jit = False
+        self.traceJit = None
+
+    # sets the way the program is optimized and executed by parsed interpret arguments
+    # @param args are the parsed arguments (see argumentParser)
+    def setOptions(self, args):
+        self.optimization = args.opt
+        self.transpiled = args.aot
+        self.threaded = args.closures
+        self.jit = args.jit
+        if args.profile is not None:
+            self.profiler = Profiler()
+
+    # loads and executes program, does not touch program arguments nor exits the process
+    # @param source is path to the XML or compiled file, XML document or compiled program
+    #        in bytes or opened file
+    # @param input_file is path to the input file or opened file (STDIN when None)
+    # @param output_file is opened file the output is written to (STDOUT when None)
+    # @param cache_dir is directory of the cache of compiled programs (None when not used)
+    # @param buffering is size of the output buffer or 'line' for line buffered output,
+    #        the output is flushed at the end of the program in any case (EXIT, errors)
+    # @param error_file is opened file the debug output (DPRINT, BREAK) is written to (STDERR when None)
+    # @err InterpretError with exit code of the error
+    # @return exit code of the program (0 or the value of instruction EXIT)
+    def run(self, source, input_file=None, output_file=None, cache_dir=None, buffering=OUTPUT_BUFFER_SIZE,
+            error_file=None):
+        self.files.setHandles(source, sys.stdin if input_file is None else input_file,
+                              sys.stdout if output_file is None else output_file, cache_dir, buffering, error_file)
+        try:
+            self.load()
+            self.optimize()
+            self.resolveHandlers()
+            self.resolveSlots()
+            if self.profiler is None:
+                self.prepare()
+            if self.sampler is not None:
+                self.sampler.start()
+            return self.execute()
+        finally:
+            if self.sampler is not None:
+                self.sampler.stop()
+            self.files.flushOutput()
+            self.files.closeFiles()
+
+    # compiles program and stores it to a file, the program is not executed
+    # @param source is path to the XML file, XML document in bytes or opened file
+    # @param compiled_file is path to the file the compiled program is stored to
+    # @err InterpretError with exit code of the error
+    def compile(self, source, compiled_file):
+        self.files.setHandles(source, sys.stdin, sys.stdout)
+        try:
+            self.load()
+            self.optimize()
+            self.files.storeCompiled(self.labels, compiled_file)
+        except OSError:
+            raise OutputFileError("compile - error compiled file could not be written")
+        finally:
+            self.files.closeFiles()
+
+    # transpiles program to python and stores it to a file, the program is not executed
+    # @param source is path to the XML or compiled file, XML document in bytes or opened file
+    # @param transpiled_file is path to the file the transpiled program is stored to
+    # @err InterpretError with exit code of the error
+    def transpile(self, source, transpiled_file):
+        self.files.setHandles(source, sys.stdin, sys.stdout)
+        try:
+            self.load()
+            self.optimize()
+            transpiled = Transpiler(self.files.code).transpile()
+            self.files.storeTranspiled(self.labels, transpiled, transpiled_file)
+        except OSError:
+            raise OutputFileError("transpile - error transpiled file could not be written")
+        finally:
+            self.files.closeFiles()
+
+    # loads program from prepared source, compiled program is used when possible,
+    # otherwise the XML is translated and checked and the result is stored to the cache
+    # @err when the program is not valid
+    def load(self):
+        if not self.files.loadCompiled(self.labels):
+            self.files.xmlTranslate()
+            self.scanForLabels()
+            self.validateProgram()
+            self.files.storeCache(self.labels)
+
+    # optimizes loaded program by the Optimizer, when optimization level is set
+    # transpiled program is not optimized, it was optimized before it was transpiled
+    def optimize(self):
+        if (self.optimization > 0) & (self.files.linker is None):
+            self.files.code = Optimizer(self.files.code, self.labels).optimize(self.optimization)
+
+    # prepares loaded program for the selected way of execution - transpiled program,
+    # closures or the interpret loop with superinstructions
+    def prepare(self):
+        if self.transpiled | (self.files.linker is not None):
+            self.link()
+        elif self.threaded:
+            self.closures = ClosureCompiler(self).compile()
+        elif self.jit:
+            self.traceJit = TraceJit(self)
+        else:
+            self.fuseInstructions()
+
+    # executes loaded program
+    # @err all possible errors listed above
+    # @return exit code of the program
+    def execute(self):
+        if self.profiler is not None:
+            return self.executeProfiled()
+        if self.blocks is not None:
+            return self.executeTranspiled()
+        if self.closures is not None:
+            return self.executeClosures()
+        if self.traceJit is not None:
+            return self.executeJit()
+        code = self.files.code
+        try:
+            while self.ProgCounter < len(code):
+                line = code[self.ProgCounter]
+                if line.checkVars:
+                    self.checkLineVars(line)
+                line.handler(line)
+                self.ExecutedInstructions += 1
+                self.ProgCounter += 1
+        except ProgramExit as program_exit:
+            return program_exit.code
+        return ERR_OK
+
+    # executes loaded program and measures time of every instruction by the profiler,
+    # subroutine regions start by CALL and end by RETURN
+    # @err all possible errors listed above
+    # @return exit code of the program
+    def executeProfiled(self):
+        code = self.files.code
+        profiler = self.profiler
+        clock = time.perf_counter
+        try:
+            while self.ProgCounter < len(code):
+                line = code[self.ProgCounter]
+                start = clock()
+                if line.checkVars:
+                    self.checkLineVars(line)
+                line.handler(line)
+                profiler.record(line.opcode, clock() - start)
+                if line.opcode == 'CALL':
+                    profiler.enter(line.args[0].name)
+                elif line.opcode == 'RETURN':
+                    profiler.leave()
+                self.ExecutedInstructions += 1
+                self.ProgCounter += 1
+        except ProgramExit as program_exit:
+            return program_exit.code
+        return ERR_OK
+
+    # executes loaded program transpiled to python, function of every basic block returns
+    # line of the next block, ProgCounter is updated only between the blocks
+    # @err all possible errors listed above
+    # @return exit code of the program
+    def executeTranspiled(self):
+        blocks = self.blocks
+        end = len(self.files.code)
+        try:
+            while self.ProgCounter < end:
+                self.ProgCounter = blocks[self.ProgCounter]()
+        except ProgramExit as program_exit:
+            return program_exit.code
+        return ERR_OK
+
+    # executes loaded program turned to closures, every closure returns the next line
+    # @err all possible errors listed above
+    # @return exit code of the program
+    def executeClosures(self):
+        closures = self.closures
+        end = len(closures)
+        try:
+            while self.ProgCounter < end:
+                self.ProgCounter = closures[self.ProgCounter]()
+                self.ExecutedInstructions += 1
+        except ProgramExit as program_exit:
+            return program_exit.code
+        return ERR_OK
+
+    # executes loaded program, after every backward jump traceJit executes trace of the
+    # loop or counts the jump (see TraceJit.backwardJump)
+    # @err all possible errors listed above
+    # @return exit code of the program
+    def executeJit(self):
+        code = self.files.code
+        trace_jit = self.traceJit
+        try:
+            while self.ProgCounter < len(code):
+                counter = self.ProgCounter
+                line = code[counter]
+                if line.checkVars:
+                    self.checkLineVars(line)
+                line.handler(line)
+                self.ExecutedInstructions += 1
+                self.ProgCounter += 1
+                if self.ProgCounter <= counter:
+                    trace_jit.backwardJump(line)
+        except ProgramExit as program_exit:
+            return program_exit.code
+        return ERR_OK
+
+    # transpiles loaded program to python (unless it was loaded transpiled) and links
+    # functions of its basic blocks to this interpret
+    def link(self):
+        if self.files.linker is None:
+            namespace = dict(globals())
+            exec(compile(Transpiler(self.files.code).transpile(), '<transpiled>', 'exec'), namespace)
+            self.files.linker = namespace['link']
+        self.blocks = self.files.linker(self, self.files.code)
+
+    # binds method executing the opcode (from the handlers table) to every line of code
+    # so the opcode does not need to be looked up during execution
+    # @err when there is no handler for the opcode
+    def resolveHandlers(self):
+        for line in self.files.code:
+            try:
+                line.handler = getattr(self, handlers[line.opcode])
+            except KeyError:
+                raise InternalError("resolveHandlers - error unknown opcode " + line.opcode)
+
+    # assigns slots to the variables of the program (see Frame), every name of variable
+    # of the global frame has its slot in the global frame, names of variables of local and
+    # temporary frames have slots in layout shared by all these frames (the set of variables
+    # defined in the frame is not known before the execution)
+    def resolveSlots(self):
+        global_layout = {}
+        frame_layout = {}
+        for line in self.files.code:
+            for arg in line.args:
+                if arg.kind == 'var':
+                    layout = global_layout if arg.frame == 'GF' else frame_layout
+                    arg.slot = layout.setdefault(arg.name, len(layout))
+        self.variables.setLayout(global_layout, frame_layout)
+
+    # peephole pass, finds common sequences of lines and sets handler of the first line
+    # to superinstruction executing the whole sequence at once, the other lines of the
+    # sequence stay in the code, but they are skipped
+    # only the first line of a sequence can be LABEL or follow CALL, so no jump or
+    # return can get into the middle of the sequence
+    # sequences:
+    #   LT/GT/EQ var ...; JUMPIFEQ/JUMPIFNEQ label var bool       (execCompareJump)
+    #   PUSHS symb1; PUSHS symb2; ADDS/SUBS/.../EQS; POPS var      (execPushsOperationPops)
+    #   PUSHS symb1; PUSHS symb2; JUMPIFEQS/JUMPIFNEQS label       (execPushsJump)
+    def fuseInstructions(self):
+        code = self.files.code
+        i = 0
+        while i < len(code):
+            line = code[i]
+            following = code[i + 1:i + 4]
+            opcodes = [next_line.opcode for next_line in following]
+            if (line.opcode in ('LT', 'GT', 'EQ')) & (opcodes[:1] in (['JUMPIFEQ'], ['JUMPIFNEQ'])):
+                jump = following[0]
+                if sameVariable(line.args[0], jump.args[1]) & isBoolConst(jump.args[2]):
+                    constant = jump.args[2].value
+                elif sameVariable(line.args[0], jump.args[2]) & isBoolConst(jump.args[1]):
+                    constant = jump.args[1].value
                 else:
-                    d_print("INTE doCompare - error bad nil comparision")
-                    exit(ERR_BADTYPE_OP)
+                    i += 1
+                    continue
+                line.fused = (jump, constant if jump.opcode == 'JUMPIFEQ' else not constant)
+                line.handler = self.execCompareJump
+                i += 2
+            elif (line.opcode == 'PUSHS') & (opcodes[:1] == ['PUSHS']) & \
+                    (opcodes[1:3] in [[opcode, 'POPS'] for opcode in stackOperations]):
+                line.fused = (following[0], following[1], following[2], stackOperations[opcodes[1]])
+                line.handler = self.execPushsOperationPops
+                i += 4
+            elif (line.opcode == 'PUSHS') & (opcodes[:2] in (['PUSHS', 'JUMPIFEQS'], ['PUSHS', 'JUMPIFNEQS'])):
+                line.fused = (following[0], following[1], opcodes[1] == 'JUMPIFEQS')
+                line.handler = self.execPushsJump
+                i += 3
             else:
-                if comparision_type == 'EQ':
-                    self.variables.setVar(line_array[1], 'bool', 'false')
-                elif comparision_type == 'EQS':
-                    self.stack.stackPush('false', 'bool')
-                else:
-                    d_print("INTE doCompare - error bad nil comparision")
-                    exit(ERR_BADTYPE_OP)
-        elif symb1type == symb2type:
-            if symb1type == 'int':
-                if int(symb1value) == int(symb2value):
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('true', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('false', 'bool')
-                elif int(symb1value) > int(symb2value):
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('true', 'bool')
-                elif int(symb1value) < int(symb2value):
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('true', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('false', 'bool')
-            elif symb1type == 'string':
-                if symb1value == symb2value:
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('true', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('false', 'bool')
-                elif symb1value > symb2value:
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('true', 'bool')
-                elif symb1value < symb2value:
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('true', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('false', 'bool')
-            elif symb1type == 'bool':
-                if symb1value == symb2value:
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('false', 'bool')
-                elif (symb1value == 'true') & (symb2value == 'false'):
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('false', 'bool')
-                elif (symb1value == 'false') & (symb2value == 'true'):
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('false', 'bool')
-            if symb1type == 'float':
-                if float(symb1value) == float(symb2value):
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('true', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('false', 'bool')
-                elif float(symb1value) > float(symb2value):
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('true', 'bool')
-                elif float(symb1value) < float(symb2value):
-                    if comparision_type == 'EQ':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'LT':
-                        self.variables.setVar(line_array[1], 'bool', 'true')
-                    elif comparision_type == 'GT':
-                        self.variables.setVar(line_array[1], 'bool', 'false')
-                    elif comparision_type == 'EQS':
-                        self.stack.stackPush('false', 'bool')
-                    elif comparision_type == 'LTS':
-                        self.stack.stackPush('true', 'bool')
-                    elif comparision_type == 'GTS':
-                        self.stack.stackPush('false', 'bool')
+                i += 1
+
+    # --- superinstructions (see fuseInstructions) ---
+
+    # LT/GT/EQ <var> <symb1> <symb2>; JUMPIFEQ/JUMPIFNEQ <label> <var> <bool>
+    # the variable is set as by the compare, jumps when the result is line.fused[1]
+    def execCompareJump(self, line):
+        jump, jump_result = line.fused
+        result_type, result = operateSymbols(line.opcode, *self.getCompareOperands(line))
+        self.variables.setVar(line.args[0], result_type, result)
+        self.ExecutedInstructions += 1
+        if result == jump_result:
+            self.ProgCounter = jump.target
         else:
-            if symb1type == 'undef' or symb2type == 'undef':
-                d_print("INTE doCompare - error undefined symbol")
-                exit(ERR_NOVAL_VAR)
-            else:
-                d_print("INTE doCompare - error types not matching")
-                exit(ERR_BADTYPE_OP)
-
-    # executes logic operations
-    # can operate from line (with constants and variables) or with stack (variants with S)
-    # @param line_array is the line of code split into array by words
-    def doLogic(self, line_array):
-        d_print("\tINTE\tdoLogic\t" + str(line_array))
-        logic_op = line_array[0]
-        if logic_op == 'NOT':
-            symbol = self.getSymbolValueByType(line_array[2], 'bool')
-            if symbol == 'true':
-                self.variables.setVar(line_array[1], 'bool', 'false')
-            elif symbol == 'false':
-                self.variables.setVar(line_array[1], 'bool', 'true')
-            else:
-                d_print("INTE doLogic - error unknown value")
-                exit(ERR_INTERNAL)
-        elif logic_op == 'NOTS':
-            symbol = self.stack.stackPopValueByType('bool')
-            if symbol == 'true':
-                self.stack.stackPush('false', 'bool')
-            elif symbol == 'false':
-                self.stack.stackPush('true', 'bool')
+            self.ProgCounter += 1
+
+    # PUSHS <symb1>; PUSHS <symb2>; <stack operation>; POPS <var>
+    # operands are not pushed to the stack, result of the operation is set directly to the variable
+    def execPushsOperationPops(self, line):
+        push, operation, pop, opcode = line.fused
+        symb1type, symb1 = self.getSymbol(line.args[0])
+        if push.checkVars:
+            self.checkLineVars(push)
+        symb2type, symb2 = self.getSymbol(push.args[0])
+        result_type, result = operateSymbols(opcode, symb1type, symb1, symb2type, symb2)
+        self.checkLineVars(pop)
+        self.variables.setVar(pop.args[0], result_type, result)
+        self.ExecutedInstructions += 3
+        self.ProgCounter += 3
+
+    # PUSHS <symb1>; PUSHS <symb2>; JUMPIFEQS/JUMPIFNEQS <label>
+    # jumps when equality of the symbols is line.fused[2], operands are not pushed to the stack
+    def execPushsJump(self, line):
+        push, jump, jump_equal = line.fused
+        symb1type, symb1 = self.getSymbol(line.args[0])
+        if push.checkVars:
+            self.checkLineVars(push)
+        symb2type, symb2 = self.getSymbol(push.args[0])
+        self.ExecutedInstructions += 2
+        if symbolsEqual(symb1type, symb1, symb2type, symb2) == jump_equal:
+            self.ProgCounter = jump.target
+        else:
+            self.ProgCounter += 2
+
+    # --- superinstructions end ---
+
+    # --- opcode handlers ---
+
+    # MOVE <var> <symb>
+    def execMove(self, line):
+        self.variables.setVar(line.args[0], self.getSymbolType(line.args[1]), self.getSymbolValue(line.args[1]))
+
+    # CREATEFRAME
+    def execCreateFrame(self, line):
+        self.variables.createTempFrame(line)
+
+    # PUSHFRAME
+    def execPushFrame(self, line):
+        self.variables.pushLocFrame()
+
+    # POPFRAME
+    def execPopFrame(self, line):
+        self.variables.popLocFrame()
+
+    # DEFVAR <var>
+    def execDefVar(self, line):
+        self.variables.createVar(line.args[0])
+        self.DefinedVars += 1
+
+    # CALL <label>
+    def execCall(self, line):
+        self.CallStack.append(self.ProgCounter + 1)
+        self.ProgCounter = line.target
+
+    # RETURN
+    def execReturn(self, line):
+        if len(self.CallStack) > 0:
+            self.ProgCounter = self.CallStack.pop(-1) - 1
+        else:
+            raise MissingValueError("execute - error poping from empty call stack")
+
+    # PUSHS <symb>
+    def execPushs(self, line):
+        self.stack.stackPush(self.getSymbolValue(line.args[0]), self.getSymbolType(line.args[0]))
+
+    # POPS <var>
+    def execPops(self, line):
+        self.variables.setVar(line.args[0], *self.stack.stackPop())
+
+    # CLEARS
+    def execClears(self, line):
+        self.stack.stackClear()
+
+    # ADD <var> <symb1> <symb2>
+    def execAdd(self, line):
+        self.variables.setVar(line.args[0], *operateSymbols('ADD', *self.getCompareOperands(line)))
+
+    # ADDS
+    def execAdds(self, line):
+        result_type, result = operateSymbols('ADD', *self.popCompareOperands())
+        self.stack.stackPush(result, result_type)
+
+    # SUB <var> <symb1> <symb2>
+    def execSub(self, line):
+        self.variables.setVar(line.args[0], *operateSymbols('SUB', *self.getCompareOperands(line)))
+
+    # SUBS
+    def execSubs(self, line):
+        result_type, result = operateSymbols('SUB', *self.popCompareOperands())
+        self.stack.stackPush(result, result_type)
+
+    # MUL <var> <symb1> <symb2>
+    def execMul(self, line):
+        self.variables.setVar(line.args[0], *operateSymbols('MUL', *self.getCompareOperands(line)))
+
+    # MULS
+    def execMuls(self, line):
+        result_type, result = operateSymbols('MUL', *self.popCompareOperands())
+        self.stack.stackPush(result, result_type)
+
+    # IDIV <var> <symb1> <symb2>
+    def execIdiv(self, line):
+        self.variables.setVar(line.args[0], *operateSymbols('IDIV', *self.getCompareOperands(line)))
+
+    # IDIVS
+    def execIdivs(self, line):
+        result_type, result = operateSymbols('IDIV', *self.popCompareOperands())
+        self.stack.stackPush(result, result_type)
+
+    # DIV <var> <symb1> <symb2>
+    def execDiv(self, line):
+        self.variables.setVar(line.args[0], *operateSymbols('DIV', *self.getCompareOperands(line)))
+
+    # DIVS
+    def execDivs(self, line):
+        result_type, result = operateSymbols('DIV', *self.popCompareOperands())
+        self.stack.stackPush(result, result_type)
+
+    # LT <var> <symb1> <symb2>
+    def execLt(self, line):
+        self.variables.setVar(line.args[0], *operateSymbols('LT', *self.getCompareOperands(line)))
+
+    # LTS
+    def execLts(self, line):
+        result_type, result = operateSymbols('LT', *self.popCompareOperands())
+        self.stack.stackPush(result, result_type)
+
+    # GT <var> <symb1> <symb2>
+    def execGt(self, line):
+        self.variables.setVar(line.args[0], *operateSymbols('GT', *self.getCompareOperands(line)))
+
+    # GTS
+    def execGts(self, line):
+        result_type, result = operateSymbols('GT', *self.popCompareOperands())
+        self.stack.stackPush(result, result_type)
+
+    # EQ <var> <symb1> <symb2>
+    def execEq(self, line):
+        self.variables.setVar(line.args[0], *operateSymbols('EQ', *self.getCompareOperands(line)))
+
+    # EQS
+    def execEqs(self, line):
+        result_type, result = operateSymbols('EQ', *self.popCompareOperands())
+        self.stack.stackPush(result, result_type)
+
+    # AND <var> <symb1> <symb2>
+    def execAnd(self, line):
+        symbol1 = self.getSymbolValueByType(line.args[1], 'bool')
+        symbol2 = self.getSymbolValueByType(line.args[2], 'bool')
+        self.variables.setVar(line.args[0], 'bool', symbol1 and symbol2)
+
+    # ANDS
+    def execAnds(self, line):
+        symbol1 = self.stack.stackPopValueByType('bool')
+        symbol2 = self.stack.stackPopValueByType('bool')
+        self.stack.stackPush(symbol1 and symbol2, 'bool')
+
+    # OR <var> <symb1> <symb2>
+    def execOr(self, line):
+        symbol1 = self.getSymbolValueByType(line.args[1], 'bool')
+        symbol2 = self.getSymbolValueByType(line.args[2], 'bool')
+        self.variables.setVar(line.args[0], 'bool', symbol1 or symbol2)
+
+    # ORS
+    def execOrs(self, line):
+        symbol1 = self.stack.stackPopValueByType('bool')
+        symbol2 = self.stack.stackPopValueByType('bool')
+        self.stack.stackPush(symbol1 or symbol2, 'bool')
+
+    # NOT <var> <symb>
+    def execNot(self, line):
+        self.variables.setVar(line.args[0], 'bool', not self.getSymbolValueByType(line.args[1], 'bool'))
+
+    # NOTS
+    def execNots(self, line):
+        self.stack.stackPush(not self.stack.stackPopValueByType('bool'), 'bool')
+
+    # INT2CHAR <var> <symb>
+    def execInt2Char(self, line):
+        self.variables.setVar(line.args[0], 'string', intToChar(self.getSymbolValueByType(line.args[1], 'int')))
+
+    # INT2CHARS
+    def execInt2Chars(self, line):
+        self.stack.stackPush(intToChar(self.stack.stackPopValueByType('int')), 'string')
+
+    # INT2FLOAT <var> <symb>
+    def execInt2Float(self, line):
+        symb = self.getSymbolValueByType(line.args[1], 'int')
+        self.variables.setVar(line.args[0], 'float', float(symb))
+
+    # INT2FLOATS
+    def execInt2Floats(self, line):
+        symb = self.stack.stackPopValueByType('int')
+        self.stack.stackPush(float(symb), 'float')
+
+    # FLOAT2INT <var> <symb>
+    def execFloat2Int(self, line):
+        symb = self.getSymbolValueByType(line.args[1], 'float')
+        self.variables.setVar(line.args[0], 'int', int(symb))
+
+    # FLOAT2INTS
+    def execFloat2Ints(self, line):
+        symb = self.stack.stackPopValueByType('float')
+        self.stack.stackPush(int(symb), 'int')
+
+    # STRI2INT <var> <symb1> <symb2>
+    def execStri2Int(self, line):
+        symb1 = self.getSymbolValueByType(line.args[1], 'string')
+        symb2 = self.getSymbolValueByType(line.args[2], 'int')
+        self.variables.setVar(line.args[0], 'int', stringOrdinal(symb1, symb2))
+
+    # STRI2INTS
+    def execStri2Ints(self, line):
+        symb2 = self.stack.stackPopValueByType('int')
+        symb1 = self.stack.stackPopValueByType('string')
+        self.stack.stackPush(stringOrdinal(symb1, symb2), 'int')
+
+    # READ <var> <type>
+    def execRead(self, line):
+        try:
+            converter = readConverters[line.args[1].name]
+        except KeyError:
+            raise XmlStructureError('execute - error bad READ type')
+        inputdata = self.files.readInput()
+        if inputdata is None:
+            self.variables.setVar(line.args[0], 'nil', NIL)
+        else:
+            value_type, value = converter(inputdata)
+            self.variables.setVar(line.args[0], value_type, value)
+
+    # WRITE <symb>
+    def execWrite(self, line):
+        symbtype = self.getSymbolType(line.args[0])
+        symbval = self.getSymbolValueByType(line.args[0], symbtype)
+        self.files.output.write(valueToString(symbtype, symbval))
+
+    # CONCAT <var> <symb1> <symb2>
+    def execConcat(self, line):
+        symb1 = self.getStringValue(line.args[1])
+        symb2 = self.getSymbolValueByType(line.args[2], 'string')
+        variable = self.variables.getVariable(line.args[0])
+        if symb1 is variable.value:
+            # appending to the same variable, the value is extended in place
+            if symb1.__class__ is not StrBuf:
+                symb1 = StrBuf(symb1)
+            symb1.append(symb2)
+            variable.value = symb1
+        else:
+            variable.type = 'string'
+            variable.value = str(symb1) + symb2
+
+    # STRLEN <var> <symb>
+    def execStrLen(self, line):
+        symb = self.getStringValue(line.args[1])
+        self.variables.setVar(line.args[0], 'int', len(symb))
+
+    # GETCHAR <var> <symb1> <symb2>
+    def execGetChar(self, line):
+        symb1 = self.getStringValue(line.args[1])
+        symb2 = self.getSymbolValueByType(line.args[2], 'int')
+        if symb2 < 0 or symb2 >= len(symb1):
+            raise StringError("execute - error GETCHAR bad integer argument")
+        else:
+            self.variables.setVar(line.args[0], 'string', symb1[symb2])
+
+    # SETCHAR <var> <symb1> <symb2>
+    def execSetChar(self, line):
+        if self.variables.getVarType(line.args[0]) == 'undef':
+            raise MissingValueError("execute - error undefined variable")
+        varvalue = self.variables.getVarValByType(line.args[0], 'string')
+        symb1 = self.getSymbolValueByType(line.args[1], 'int')
+        symb2 = self.getSymbolValueByType(line.args[2], 'string')
+        if symb2 == '':
+            raise StringError("execute - error empty string")
+        if (symb1 < 0) | (len(varvalue) <= symb1):
+            raise StringError("execute - error SETCHAR bad integer argument")
+        if varvalue.__class__ is not StrBuf:
+            varvalue = StrBuf(varvalue)
+            self.variables.setVar(line.args[0], 'string', varvalue)
+        varvalue.setChar(symb1, symb2[0])
+
+    # TYPE <var> <symb>
+    def execType(self, line):
+        if checkType(self.getSymbolTypeUndefA(line.args[1])):
+            symbtype = self.getSymbolTypeUndefA(line.args[1])
+            if symbtype == 'undef':
+                self.variables.setVar(line.args[0], 'string', '')
             else:
-                d_print("INTE doLogic - error unknown value")
-                exit(ERR_INTERNAL)
-        elif (logic_op == 'AND') | (logic_op == 'OR'):
-            symbol1 = self.getSymbolValueByType(line_array[2], 'bool')
-            symbol2 = self.getSymbolValueByType(line_array[3], 'bool')
-            if logic_op == 'AND':
-                if (symbol1 == 'true') & (symbol2 == 'true'):
-                    self.variables.setVar(line_array[1], 'bool', 'true')
-                else:
-                    self.variables.setVar(line_array[1], 'bool', 'false')
-            elif logic_op == 'OR':
-                if (symbol1 == 'true') | (symbol2 == 'true'):
-                    self.variables.setVar(line_array[1], 'bool', 'true')
-                else:
-                    self.variables.setVar(line_array[1], 'bool', 'false')
-        elif (logic_op == 'ANDS') | (logic_op == 'ORS'):
-            symbol1 = self.stack.stackPopValueByType('bool')
-            symbol2 = self.stack.stackPopValueByType('bool')
-            if logic_op == 'ANDS':
-                if (symbol1 == 'true') & (symbol2 == 'true'):
-                    self.stack.stackPush('true', 'bool')
-                else:
-                    self.stack.stackPush('false', 'bool')
-            elif logic_op == 'ORS':
-                if (symbol1 == 'true') | (symbol2 == 'true'):
-                    self.stack.stackPush('true', 'bool')
+                self.variables.setVar(line.args[0], 'string', symbtype)
+
+    # LABEL <label>
+    def execLabel(self, line):
+        # already set by scan labels function
+        pass
+
+    # JUMP <label>
+    def execJump(self, line):
+        self.ProgCounter = line.target
+
+    # JUMPIFEQ <label> <symb1> <symb2>
+    def execJumpIfEq(self, line):
+        if symbolsEqual(*self.getCompareOperands(line)):
+            self.ProgCounter = line.target
+
+    # JUMPIFEQS <label>
+    def execJumpIfEqs(self, line):
+        if symbolsEqual(*self.popCompareOperands()):
+            self.ProgCounter = line.target
+
+    # JUMPIFNEQ <label> <symb1> <symb2>
+    def execJumpIfNeq(self, line):
+        if not symbolsEqual(*self.getCompareOperands(line)):
+            self.ProgCounter = line.target
+
+    # JUMPIFNEQS <label>
+    def execJumpIfNeqs(self, line):
+        if not symbolsEqual(*self.popCompareOperands()):
+            self.ProgCounter = line.target
+
+    # EXIT <symb>
+    def execExit(self, line):
+        symb = self.getSymbolValueByType(line.args[0], 'int')
+        if (symb >= 0) & (symb <= 49):
+            raise ProgramExit(symb)
+        else:
+            raise OperandValueError("execute - error EXIT bad integer value")
+
+    # DPRINT <symb>
+    def execDprint(self, line):
+        symb = self.getSymbolValue(line.args[0])
+        self.files.errorOutput.write(valueToDebugString(self.getSymbolType(line.args[0]), symb) + '\n')
+
+    # BREAK
+    def execBreak(self, line):
+        self.files.flushOutput()
+        output = self.files.errorOutput
+        output.write('\n')
+        output.write('++ BREAK INTERPRET STATUS ++\n')
+        output.write('\n')
+        output.write('num of completed instructions : ' + str(self.ExecutedInstructions) + '\n')
+        output.write('num of defined variables : ' + str(self.DefinedVars) + '\n')
+        self.variables.printStat(output)
+        output.flush()
+
+    # --- opcode handlers end ---
+
+    # scans code for labels and sets them into label storage
+    # @err when the label name in the code does not match IPPcode20 notation
+    def scanForLabels(self):
+        for i in range(self.files.getLenCode()):
+            line = self.files.getLineCode(i)
+            if (line.opcode == 'LABEL') & (len(line.args) == 1):
+                trace('INTE', "scanForLabels - setting label '" + str(line.args[0]) + "' at line :" + str(i))
+                self.labels.addLabel(line.args[0].name, i)
+
+    # checks structure of the whole program once, before the interpretation starts
+    # every line is checked by the rules table (see checkLineRules)
+    # @err when some line does not match the rules or uses undefined label
+    def validateProgram(self):
+        for line in self.files.code:
+            self.checkLineRules(line, ruleTable[line.opcode])
+
+    # checks if line of code matches its rule from the rule table above
+    # only the static structure is checked here, variables that must be defined
+    # when the line is executed are stored in line.checkVars (see checkLineVars)
+    # for 'var' it checks if the param is variable
+    # for 'symb' it checks if its a variable or constant
+    # for 'und_symb' (only in TYPE) the same as 'symb', variable does not need to be set
+    # for 'label' it checks if its defined and stores its line to line.target
+    # for 'type' it checks it its 'int', 'bool', 'nil' or 'string'
+    # for 'undefvar' (only in DEFVAR) it checks if the param is variable, the variable
+    #   is created when the line is executed
+    # @err when the line does not match the rule or when the label is not defined
+    # @param line is the decoded line of code
+    # @param rule is list of operand kinds of the opcode from the rules table
+    def checkLineRules(self, line, rule):
+        if len(line.args) != len(rule):
+            raise XmlStructureError("checkLineRules - error bad opcode arguments")
+        check_vars = []
+        for i in range(len(rule)):
+            arg = line.args[i]
+            if rule[i] == 'var':
+                checkOperandKind(arg, 'var')
+                check_vars.append(arg)
+            elif (rule[i] == 'symb') | (rule[i] == 'und_symb'):
+                if arg.kind == 'var':
+                    check_vars.append(arg)
                 else:
-                    self.stack.stackPush('false', 'bool')
+                    # notation of constants was checked when they were decoded
+                    checkOperandKind(arg, 'const')
+            elif rule[i] == 'label':
+                checkOperandKind(arg, 'label')
+                line.target = self.labels.getLabelLine(arg.name)
+            elif rule[i] == 'type':
+                checkOperandKind(arg, 'type')
+                if (arg.name != 'int') & (arg.name != 'bool') & \
+                        (arg.name != 'string') & (arg.name != 'nil') & \
+                        (arg.name != 'float'):
+                    raise XmlStructureError("checkLineRules - error bad type")
+            elif rule[i] == 'undefvar':
+                checkOperandKind(arg, 'var')
+            else:
+                raise InternalError("checkLineRules - error bug in rules table")
+        line.checkVars = tuple(check_vars)
+
+    # checks the dynamic part of the rules before the line is executed - frames of
+    # the variables used by the line must exist and the variables must be defined
+    # @err when frame of some variable does not exist or the variable is not defined
+    # @param line is the decoded line of code
+    def checkLineVars(self, line):
+        for var in line.checkVars:
+            self.variables.getVarType(var)
+
+    # returns type of symbol
+    # @err when symbol is variable and its not defined or set
+    # @err when symbol is not variable or constant
+    # @param symbol is decoded operand (variable or constant)
+    # @return symbol type if successful
+    def getSymbolType(self, symbol):
+        if symbol.kind == 'var':
+            vartype = self.variables.getVarType(symbol)
+            if vartype == 'undef':
+                raise MissingValueError("getSymbolType - error not set variable")
+            return vartype
+        elif symbol.kind == 'const':
+            return symbol.type
+        else:
+            raise XmlStructureError("getSymbolType - error not a symbol " + str(symbol))
+
+    # returns type of symbol, unset variable returns 'undef' type
+    # @err when symbol is variable and its not defined
+    # @err when symbol is not variable or constant
+    # @param symbol is decoded operand (variable or constant)
+    # @return symbol type if successful
+    def getSymbolTypeUndefA(self, symbol):
+        if symbol.kind == 'var':
+            return self.variables.getVarType(symbol)
+        elif symbol.kind == 'const':
+            return symbol.type
+        else:
+            raise XmlStructureError("getSymbolTypeUndefA - error not a symbol " + str(symbol))
+
+    # returns value of symbol
+    # @err when symbol is variable and its not defined or set
+    # @err when symbol is not variable or constant
+    # @param symbol is decoded operand (variable or constant)
+    # @return symbol value if successful
+    def getSymbolValue(self, symbol):
+        if symbol.kind == 'var':
+            variable = self.variables.getVariable(symbol)
+            if variable.type == 'undef':
+                raise MissingValueError("getSymbolType - error not set variable")
+            value = variable.value
+            if value.__class__ is StrBuf:
+                return value.text()
+            return value
+        elif symbol.kind == 'const':
+            return symbol.value
+        else:
+            raise XmlStructureError("getSymbolValue - error not a symbol")
+
+    # returns type and value of symbol
+    # @err when symbol is variable and its not defined or set
+    # @err when symbol is not variable or constant
+    # @param symbol is decoded operand (variable or constant)
+    # @return pair symbol type, symbol value if successful
+    def getSymbol(self, symbol):
+        if symbol.kind == 'var':
+            variable = self.variables.getVariable(symbol)
+            if variable.type == 'undef':
+                raise MissingValueError("getSymbol - error not set variable")
+            value = variable.value
+            if value.__class__ is StrBuf:
+                value = value.text()
+            return variable.type, value
+        elif symbol.kind == 'const':
+            return symbol.type, symbol.value
         else:
-            d_print("INTE doLogic - error logic operator")
-            exit(ERR_INTERNAL)
+            raise XmlStructureError("getSymbol - error not a symbol")
+
+    # returns value of string symbol, unlike getSymbolValue the value of variable
+    # can be StrBuf (it is not converted to str)
+    # @err when symbol is not set or it is not string
+    # @param symbol is decoded operand (variable or constant)
+    # @return symbol value (str or StrBuf) if successful
+    def getStringValue(self, symbol):
+        if self.getSymbolType(symbol) != 'string':
+            raise OperandTypeError("getStringValue - error symbol is not string")
+        if symbol.kind == 'var':
+            return self.variables.getVarVal(symbol)
+        return symbol.value
+
+    # returns value of symbol if it have expected type
+    # @err when symbol is variable and its not defined
+    # @err when symbol have bad notation
+    # @err when the symbol does not match the expected type
+    # @param symbol is decoded operand (variable or constant)
+    # @return symbol value if successful
+    def getSymbolValueByType(self, symbol, symbol_type):
+        if symbol_type == self.getSymbolType(symbol):
+            return self.getSymbolValue(symbol)
+        else:
+            raise OperandTypeError("getSymbolValueByType - error type of symbol not matching expected type")
+
+    # returns types and values of both operands of arithmetic, compare or conditional jump line
+    # @err when the symbols are not set
+    # @param line is the decoded line of code
+    # @return first operand type and value, second operand type and value
+    def getCompareOperands(self, line):
+        return self.getSymbol(line.args[1]) + self.getSymbol(line.args[2])
+
+    # pops both operands of stack operation, the top item is the second operand
+    # @err when the stack is empty
+    # @return first operand type and value, second operand type and value
+    def popCompareOperands(self):
+        symb2type, symb2value = self.stack.stackPop()
+        symb1type, symb1value = self.stack.stackPop()
+        return symb1type, symb1value, symb2type, symb2value
 
 
 # --- functions ---
 
-# debug print function, prints messages only if var debug is set on True
+# --- tracing ---
+# trace messages are printed to stderr only for enabled categories. Each class has
+# its own category (table traceClasses), module functions have category OUTF.
+# Calls are traced by wrappers which setTracing installs only for the enabled categories,
+# so the interpretation does not pay anything for disabled tracing
+
+traceClasses = {
+    'FRAME': Frame,
+    'DATAS': VariableStorage,
+    'STAKS': StackStorage,
+    'LABLS': LabelStorage,
+    'FILES': FileProcessor,
+    'INTE': Interpret
+}
+
+# module functions traced by category OUTF
+traceFunctions = ['checkNameVar', 'checkLabelName', 'checkType', 'checkNumberType',
+                  'checkValueByType', 'checkOperandKind', 'arithmeticAdd', 'arithmeticSub', 'arithmeticMul',
+                  'arithmeticIdiv', 'arithmeticDiv', 'operateSymbols', 'compareSymbols', 'symbolsEqual',
+                  'stringOrdinal', 'intToChar', 'isOpcode']
+
+traceCategories = list(traceClasses) + ['OUTF']
+tracedCategories = set()  # < currently enabled categories
+tracedOriginals = {}  # < original functions replaced by tracing wrappers, key is (class or None, name)
+
+
+# prints trace message if its category is enabled
+# @param category is category of the message (one of traceCategories)
 # @param message is message to be printed
-def d_print(message):
-    if debug:
-        print(message)
+def trace(category, message):
+    if category in tracedCategories:
+        print(category + ' ' + message, file=sys.stderr)
+
+
+# creates wrapper of function that prints its name and arguments before calling it
+# @param category is category of the function
+# @param function is the function to be wrapped
+# @param method says if the first argument is self and should not be printed
+# @return the wrapper
+def traceWrapper(category, function, method):
+    name = function.__name__
+
+    def traced(*args):
+        printed = args[1:] if method else args
+        print('\t' + category + '\t' + name + '\t' +
+              ' '.join(repr(arg) if isinstance(arg, str) else str(arg) for arg in printed), file=sys.stderr)
+        return function(*args)
+
+    traced.__name__ = name
+    return traced
+
+
+# enables tracing of given categories and disables all the others
+# tracing is global for the whole process, the wrappers replace module functions and methods
+# of the classes, so they trace every Interpret in the process; it is enabled only by --trace
+# of main, which disables it again before it returns, runProgram never changes it
+# @param categories is iterable of categories to be traced
+def setTracing(categories):
+    global tracedCategories
+    for (owner, name), function in tracedOriginals.items():
+        if owner is None:
+            globals()[name] = function
+        else:
+            setattr(owner, name, function)
+    tracedOriginals.clear()
+    tracedCategories = set(categories)
+    for category in tracedCategories:
+        if category == 'OUTF':
+            for name in traceFunctions:
+                tracedOriginals[(None, name)] = globals()[name]
+                globals()[name] = traceWrapper(category, globals()[name], False)
+        else:
+            owner = traceClasses[category]
+            for name, function in list(vars(owner).items()):
+                if isinstance(function, types.FunctionType) and not name.startswith('__'):
+                    tracedOriginals[(owner, name)] = function
+                    setattr(owner, name, traceWrapper(category, function, True))
+
+
+# error function for argparse used in class FileProcessor function parseArgs()
+# @param message is message from argparse
+def arg_err(message):
+    raise ParamError("parseArgs - " + message)
 
 
-# error function for argparse used in class Files function setHandles()
-def arg_err():
-    exit(ERR_PARAM)
+# makes parser of the interpret arguments
+# @return the parser (errors are raised as ParamError)
+def argumentParser():
+    parser = argparse.ArgumentParser(add_help=False)
+    # basic arguments
+    parser.add_argument('-h', '--help', dest='help', action='count')
+    parser.add_argument('--source', default=None)
+    parser.add_argument('--input', default=None)
+    # additional arguments
+    parser.add_argument('--stats', default=None)
+    parser.add_argument('--insts', dest='insts', action='count')
+    parser.add_argument('--vars', dest='vars', action='count')
+    parser.add_argument('--trace', default=None)
+    parser.add_argument('--compile', default=None)
+    parser.add_argument('--cache', nargs='?', const='', default=None)
+    parser.add_argument('--buffer', default=None)
+    parser.add_argument('--profile', default=None)
+    parser.add_argument('--sample', default=None)
+    parser.add_argument('--opt', type=int, choices=[0, 1, 2], default=0)
+    parser.add_argument('--transpile', default=None)
+    parser.add_argument('--run-transpiled', dest='runTranspiled', default=None)
+    parser.add_argument('--aot', dest='aot', action='store_true')
+    parser.add_argument('--closures', dest='closures', action='store_true')
+    parser.add_argument('--jit', dest='jit', action='store_true')
+    parser.error = arg_err
+    return parser
 
 
 # checks if the given string is correct representation of IPPcode20 variable
@@ -1429,17 +3572,14 @@ def arg_err():
 # @param var_str is the string of variable from IPPcode20
 # @return True if its correct
 def checkNameVar(var_str):
-    d_print("\tOUTF\tcheckNameVar\t" + var_str)
     if re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', var_str) is not None:
         value = re.match(r'^(\wF)@([\w_\-$&%*!?]+)$', var_str)
         if (value[1] == "GF") | (value[1] == "TF") | (value[1] == "LF"):
             return True  # value[1] + value[2]
         else:
-            d_print("OUTF checkNameVar - error nonexisting frame ")
-            exit(ERR_STRUCT_XML)
+            raise XmlStructureError("checkNameVar - error nonexisting frame ")
     else:
-        d_print("OUTF checkNameVar - error not a variable")
-        exit(ERR_STRUCT_XML)
+        raise XmlStructureError("checkNameVar - error not a variable")
 
 
 # checks if the given string is correct representation of IPPcode20 label
@@ -1447,12 +3587,10 @@ def checkNameVar(var_str):
 # @param label_str is the string of label from IPPcode20
 # @return True if correct
 def checkLabelName(label_str):
-    d_print("\tOUTF\tcheckLabelName\t" + label_str)
     if re.match(r'^([\w_\-$&%*!?]+)$', label_str):
         return True
     else:
-        d_print("OUTF checkLabelName - error bad label name")
-        exit(ERR_STRUCT_XML)
+        raise XmlStructureError("checkLabelName - error bad label name")
 
 
 # checks if given string matches one of the used types
@@ -1460,13 +3598,22 @@ def checkLabelName(label_str):
 # @param type_str is string of type to be checked
 # @return True if the string matches one of the used types
 def checkType(type_str):
-    d_print("\tOUTF\tcheckType\t" + str(type_str))
     if (type_str == 'int') | (type_str == 'string') | \
             (type_str == 'bool') | (type_str == 'nil') | (type_str == 'float') | (type_str == 'undef'):
         return True
     else:
-        d_print("OUTF checkType - error undefined type [" + str(type_str) + "]")
-        exit(ERR_STRUCT_XML)
+        raise XmlStructureError("checkType - error undefined type [" + str(type_str) + "]")
+
+
+# checks if given type is a number type ('int' or 'float')
+# @err when the type is not a number type
+# @param type_str is string of type to be checked
+# @return True if the type is a number type
+def checkNumberType(type_str):
+    if (type_str == 'int') | (type_str == 'float'):
+        return True
+    else:
+        raise OperandTypeError("checkNumberType - error not a number type [" + str(type_str) + "]")
 
 
 # checks if given value corresponds with given type meanwhile
@@ -1476,20 +3623,17 @@ def checkType(type_str):
 # @param value_str is string of the value to be checked
 # @return True if successful
 def checkValueByType(type_str, value_str):
-    d_print("\tOUTF\tcheckValueByType\t" + str(type_str) + " " + repr(value_str))
     checkType(type_str)
     if type_str == 'int':
-        if re.match(r'^[-]?\d+$', value_str) is not None:
+        if intPattern.match(value_str) is not None:
             return True
         else:
-            d_print("OUTF checkValueByType - error bad integer")
-            exit(ERR_STRUCT_XML)
+            raise XmlStructureError("checkValueByType - error bad integer")
     elif type_str == 'float':
-        if re.match(r'^[0-9.abcdefABCDEF+\-px]*$', value_str):
+        if floatPattern.match(value_str):
             return True
         else:
-            d_print("OUTF checkValueByType - error bad float")
-            exit(ERR_STRUCT_XML)
+            raise XmlStructureError("checkValueByType - error bad float")
     elif type_str == 'string':
         for ic in range(len(value_str)):
             try:
@@ -1500,11 +3644,9 @@ def checkValueByType(type_str, value_str):
                                 ((value_str[ic + 3] >= '0') & (value_str[ic + 3] <= '9')):
                             ic += 3
                         else:
-                            d_print("OUTF checkValueByType - error bad escape number in string")
-                            exit(ERR_STRUCT_XML)
+                            raise XmlStructureError("checkValueByType - error bad escape number in string")
                     except IndexError:
-                        d_print("OUTF checkValueByType - error bad escape in string")
-                        exit(ERR_STRUCT_XML)
+                        raise XmlStructureError("checkValueByType - error bad escape in string")
             except IndexError:
                 pass
         return True
@@ -1512,28 +3654,481 @@ def checkValueByType(type_str, value_str):
         if (value_str == 'true') | (value_str == 'false'):
             return True
         else:
-            d_print('OUTF checkValueByType - error bad boolean')
-            exit(ERR_STRUCT_XML)
+            raise XmlStructureError('checkValueByType - error bad boolean')
     elif type_str == 'nil':
         if value_str == 'nil':
             return True
         else:
-            d_print("OUTF checkValueByType - error bad nil")
-            exit(ERR_STRUCT_XML)
+            raise XmlStructureError("checkValueByType - error bad nil")
+
+
+# checks if decoded operand is of the kind the rule table expects
+# @err when the operand kind does not match
+# @param operand is decoded operand of instruction
+# @param kind is expected kind ('var', 'const', 'label' or 'type')
+# @return True if the kind matches
+def checkOperandKind(operand, kind):
+    if operand.kind == kind:
+        return True
+    else:
+        raise XmlStructureError("checkOperandKind - error operand is not " + kind)
+
+
+# adds two arithmetic operands of the same type
+# @err when the operands are not numbers
+# @param type_symb is type of both operands
+# @return type and value of the result
+def arithmeticAdd(type_symb, symbol1val, symbol2val):
+    checkNumberType(type_symb)
+    return type_symb, symbol1val + symbol2val
+
+
+# subtracts second arithmetic operand from the first one
+# @err when the operands are not numbers
+# @param type_symb is type of both operands
+# @return type and value of the result
+def arithmeticSub(type_symb, symbol1val, symbol2val):
+    checkNumberType(type_symb)
+    return type_symb, symbol1val - symbol2val
+
+
+# multiplies two arithmetic operands of the same type
+# @err when the operands are not numbers
+# @param type_symb is type of both operands
+# @return type and value of the result
+def arithmeticMul(type_symb, symbol1val, symbol2val):
+    checkNumberType(type_symb)
+    return type_symb, symbol1val * symbol2val
+
+
+# divides first integer operand by the second one, the result is rounded towards zero
+# @err when the operands are not integers or when dividing by zero
+# @param type_symb is type of both operands
+# @return type and value of the result
+def arithmeticIdiv(type_symb, symbol1val, symbol2val):
+    if type_symb != 'int':
+        raise OperandTypeError("arithmeticIdiv - error bad types")
+    return 'int', integerDivision(symbol1val, symbol2val)
+
+
+# divides first integer by the second one, the result is rounded towards zero
+# @err when dividing by zero
+# @return the quotient
+def integerDivision(value1, value2):
+    if value2 == 0:
+        raise OperandValueError("integerDivision - error zero division")
+    quotient = abs(value1) // abs(value2)
+    if (value1 < 0) != (value2 < 0):
+        quotient = -quotient
+    return quotient
+
+
+# divides first float operand by the second one
+# @err when the operands are not floats or when dividing by zero
+# @param type_symb is type of both operands
+# @return type and value of the result
+def arithmeticDiv(type_symb, symbol1val, symbol2val):
+    if type_symb != 'float':
+        raise OperandTypeError("arithmeticDiv - error bad types")
+    return 'float', floatDivision(symbol1val, symbol2val)
+
+
+# divides first float by the second one
+# @err when dividing by zero
+# @return the quotient
+def floatDivision(value1, value2):
+    if value2 == 0.0:
+        raise OperandValueError("floatDivision - error zero division")
+    return value1 / value2
+
+
+# compares two symbols by relation operator
+# @err when nil is compared by other relation than EQ or when types of symbols does not match
+# @param relation is relation operator 'LT', 'GT' or 'EQ'
+# @return result of the comparision (bool)
+def compareSymbols(relation, symb1type, symb1value, symb2type, symb2value):
+    if (symb1type == 'nil') | (symb2type == 'nil'):
+        if relation != 'EQ':
+            raise OperandTypeError("compareSymbols - error bad nil comparision")
+        return symb1type == symb2type
+    elif symb1type == symb2type:
+        if relation == 'EQ':
+            return symb1value == symb2value
+        elif relation == 'LT':
+            return symb1value < symb2value
+        else:
+            return symb1value > symb2value
+    elif symb1type == 'undef' or symb2type == 'undef':
+        raise MissingValueError("compareSymbols - error undefined symbol")
+    else:
+        raise OperandTypeError("compareSymbols - error types not matching")
+
+
+# decides if two symbols are equal for conditional jumps, nil is not equal to any other type
+# @err when types of the symbols does not match and none of them is nil
+# @return True if the symbols are equal, False otherwise
+def symbolsEqual(symb1type, symb1value, symb2type, symb2value):
+    if symb1type == symb2type:
+        return symb1value == symb2value
+    elif (symb1type != 'nil') & (symb2type != 'nil'):
+        raise OperandTypeError("symbolsEqual - error bad argument types [" + str(symb1type) + "] [" + str(symb2type) + "]")
+    return False
+
+
+# kernels of arithmetic and compare operations, (opcode, type of the first operand, type of
+# the second operand) is the key and pair of result type and function computing the result
+# from values of the operands is the value. Combinations missing in the table are invalid
+# or involve nil, they are computed by the generic functions (see operateSymbols)
+operationKernels = {
+    ('ADD', 'int', 'int'): ('int', operator.add),
+    ('ADD', 'float', 'float'): ('float', operator.add),
+    ('SUB', 'int', 'int'): ('int', operator.sub),
+    ('SUB', 'float', 'float'): ('float', operator.sub),
+    ('MUL', 'int', 'int'): ('int', operator.mul),
+    ('MUL', 'float', 'float'): ('float', operator.mul),
+    ('IDIV', 'int', 'int'): ('int', integerDivision),
+    ('DIV', 'float', 'float'): ('float', floatDivision),
+    ('LT', 'int', 'int'): ('bool', operator.lt),
+    ('LT', 'float', 'float'): ('bool', operator.lt),
+    ('LT', 'string', 'string'): ('bool', operator.lt),
+    ('LT', 'bool', 'bool'): ('bool', operator.lt),
+    ('GT', 'int', 'int'): ('bool', operator.gt),
+    ('GT', 'float', 'float'): ('bool', operator.gt),
+    ('GT', 'string', 'string'): ('bool', operator.gt),
+    ('GT', 'bool', 'bool'): ('bool', operator.gt),
+    ('EQ', 'int', 'int'): ('bool', operator.eq),
+    ('EQ', 'float', 'float'): ('bool', operator.eq),
+    ('EQ', 'string', 'string'): ('bool', operator.eq),
+    ('EQ', 'bool', 'bool'): ('bool', operator.eq)
+}
+
+# generic arithmetic functions, opcode is the key
+arithmeticFunctions = {
+    'ADD': arithmeticAdd,
+    'SUB': arithmeticSub,
+    'MUL': arithmeticMul,
+    'IDIV': arithmeticIdiv,
+    'DIV': arithmeticDiv
+}
+
+
+# computes result of arithmetic or compare operation, the kernel for types of the operands
+# is selected from table operationKernels, generic functions raise the exact error otherwise
+# @err when types of the operands are not valid for the operation or when dividing by zero
+# @param opcode is opcode of the operation ('ADD', 'SUB', 'MUL', 'IDIV', 'DIV', 'LT', 'GT' or 'EQ')
+# @return type and value of the result
+def operateSymbols(opcode, symb1type, symb1value, symb2type, symb2value):
+    kernel = operationKernels.get((opcode, symb1type, symb2type))
+    if kernel is not None:
+        return kernel[0], kernel[1](symb1value, symb2value)
+    elif opcode in ('LT', 'GT', 'EQ'):
+        return 'bool', compareSymbols(opcode, symb1type, symb1value, symb2type, symb2value)
+    elif symb1type != symb2type:
+        raise OperandTypeError("operateSymbols - error types of operands not matching")
+    return arithmeticFunctions[opcode](symb1type, symb1value, symb2value)
+
+
+# returns types and values of two symbols for comparisons, symbols are objects holding
+# type and value (Variable or ConstOperand)
+# @err when some of the symbols is not set
+# @return first symbol type and value, second symbol type and value
+def symbolValues(symbol1, symbol2):
+    if symbol1.type == 'undef':
+        raise MissingValueError("symbolValues - error not set variable")
+    value1 = symbol1.value
+    if value1.__class__ is StrBuf:
+        value1 = value1.text()
+    if symbol2.type == 'undef':
+        raise MissingValueError("symbolValues - error not set variable")
+    value2 = symbol2.value
+    if value2.__class__ is StrBuf:
+        value2 = value2.text()
+    return symbol1.type, value1, symbol2.type, value2
+
+
+# returns value of bool symbol, symbol is object holding type and value (Variable or ConstOperand)
+# @err when the symbol is not set or it is not bool
+# @return the value
+def boolValue(symbol):
+    if symbol.type == 'bool':
+        return symbol.value
+    elif symbol.type == 'undef':
+        raise MissingValueError("boolValue - error not set variable")
+    raise OperandTypeError("boolValue - error symbol is not bool")
+
+
+# returns type of result of the line in trace compiled by TraceJit
+# @param opcode is opcode of the line
+# @param types is tuple of recorded types of the symbols of the line
+# @return the type, None when the line with these types is executed by its handler
+def traceResultType(opcode, types):
+    if opcode == 'MOVE':
+        return types[0]
+    elif opcode in ('ADD', 'SUB', 'MUL'):
+        if (types[0] == types[1]) & (types[0] in ('int', 'float')):
+            return types[0]
+    elif opcode in ('LT', 'GT'):
+        if (types[0] == types[1]) & (types[0] != 'nil'):
+            return 'bool'
+    elif opcode == 'EQ':
+        if (types[0] == types[1]) | (types[0] == 'nil') | (types[1] == 'nil'):
+            return 'bool'
+    elif opcode in ('AND', 'OR', 'NOT'):
+        if all(symbol_type == 'bool' for symbol_type in types):
+            return 'bool'
+    return None
+
+
+# returns ordinal value of character in string at given index
+# @err when the index is out of the string
+# @param string is the string to be indexed
+# @param index is the index of the character
+# @return ordinal value of the character
+def stringOrdinal(string, index):
+    if (index < 0) | (len(string) <= index):
+        raise StringError("stringOrdinal - error bad integer argument")
+    return ord(string[index])
+
+
+# returns character of given ordinal value
+# @err when the value is not valid unicode ordinal value
+# @param value is the ordinal value
+# @return one character string
+def intToChar(value):
+    try:
+        return chr(value)
+    except (ValueError, OverflowError):
+        raise StringError("intToChar - error bad integer")
+
+
+# converts native value to text printed by WRITE
+# @param value_type is type of the value
+# @param value is the native value
+# @return text representation of the value
+def valueToString(value_type, value):
+    if value_type == 'string':
+        return str(value)
+    elif value_type == 'int':
+        return str(value)
+    elif value_type == 'bool':
+        if value:
+            return 'true'
+        else:
+            return 'false'
+    elif value_type == 'float':
+        return float.hex(value)
+    else:
+        return ''
+
+
+# checks if both operands are the same variable
+# @param operand1 is decoded operand
+# @param operand2 is decoded operand
+# @return True if both operands are variables with the same frame and name
+def sameVariable(operand1, operand2):
+    return (operand1.kind == 'var') and (operand2.kind == 'var') and \
+        (operand1.frame == operand2.frame) and (operand1.name == operand2.name)
+
+
+# checks if operand is bool constant
+# @param operand is decoded operand
+# @return True if the operand is constant of type bool
+def isBoolConst(operand):
+    return (operand.kind == 'const') and (operand.type == 'bool')
+
+
+# checks if python expression generated by Transpiler is string literal (type of constant)
+# @param expression is the python expression
+# @return True if the expression is string literal
+def isLiteral(expression):
+    return expression.startswith('\'')
+
+
+# makes operand object from its compiled form (see method compiled of operands)
+# @param compiled is tuple with kind of the operand and its content
+# @return the operand
+def operandFromCompiled(compiled):
+    if compiled[0] == 'var':
+        return VarOperand(compiled[1], compiled[2])
+    elif compiled[0] == 'const':
+        return ConstOperand(compiled[1], NIL if compiled[1] == 'nil' else compiled[2])
+    elif compiled[0] == 'label':
+        return LabelOperand(compiled[1])
+    return TypeOperand(compiled[1])
+
+
+# classes of the native values of constants of each type
+constantClasses = {'int': int, 'float': float, 'bool': bool, 'string': str, 'nil': Nil}
+
+
+# checks if operand decoded from compiled program matches operand kind from the rules table
+# @param operand is the decoded operand
+# @param kind is the operand kind from the rules table
+# @return True if the operand matches
+def isCompiledOperand(operand, kind):
+    if operand.kind == 'var':
+        return (kind in ('var', 'undefvar', 'symb', 'und_symb')) and (operand.frame in ('GF', 'LF', 'TF')) and \
+            (operand.name.__class__ is str)
+    if operand.kind == 'const':
+        return (kind in ('symb', 'und_symb')) and (operand.value.__class__ is constantClasses.get(operand.type))
+    if operand.kind == 'type':
+        return (kind == 'type') and (operand.name in constantClasses)
+    return (operand.kind == kind) and (operand.name.__class__ is str)
+
+
+# converters of input lines read by READ, each returns type and value of the read
+# variable, nil when the line is not valid value of the type
+# @param text is the line of input (without new line character)
+# @return tuple of type and native value
+def readInt(text):
+    if intPattern.match(text) is not None:
+        return 'int', int(text)
+    return 'nil', NIL
+
+
+def readFloat(text):
+    if floatPattern.match(text) is not None:
+        try:
+            return 'float', float.fromhex(text)
+        except (ValueError, OverflowError):
+            pass
+    return 'nil', NIL
+
+
+def readBool(text):
+    return 'bool', text.lower() == 'true'
 
 
-# checks if given string is in the opcode rule table
+def readString(text):
+    return 'string', text
+
+
+readConverters = {'int': readInt, 'float': readFloat, 'bool': readBool, 'string': readString}
+
+
+# checks if the file is regular file (not terminal, pipe, ...), files in memory are
+# considered to be regular files
+# @param handle is opened file
+# @return True if the file is regular
+def isRegularFile(handle):
+    if isinstance(handle, io.StringIO):
+        return True
+    try:
+        return stat.S_ISREG(os.fstat(handle.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+# converts native value to text printed by debug outputs (DPRINT, BREAK and tracing)
+# @param value_type is type of the value
+# @param value is the native value
+# @return text representation of the value
+def valueToDebugString(value_type, value):
+    if value_type == 'nil':
+        return 'nil'
+    elif value_type == 'undef':
+        return 'undef'
+    elif value_type == 'float':
+        return str(value)
+    else:
+        return valueToString(value_type, value)
+
+
+# checks if given string is opcode of IPPcode20 (has a handler in the handlers table)
 # @param opcode_str is given string to be checked
 # @return True if given string is opcode, False otherwise
 def isOpcode(opcode_str):
-    d_print("\tOUTF\tisOpcode\t" + opcode_str)
-    for opcode in rules:
-        if opcode_str == opcode[0]:
-            return True
-    return False
+    return opcode_str in handlers
+
+
+# runs IPPcode20 program, entry point for embedding the interpret into other python programs
+# @param source is path to the XML or compiled file, XML document or compiled program
+#        in bytes or opened file
+# @param input_file is path to the input file or opened file (STDIN when None)
+# @param output_file is opened file the output is written to (STDOUT when None)
+# @param cache_dir is directory of the cache of compiled programs (None when not used)
+# @param buffering is size of the output buffer or 'line' for line buffered output
+# @param error_file is opened file the debug output (DPRINT, BREAK) is written to (STDERR when None)
+# @param options is list of interpret arguments setting the execution (--opt, --aot, --closures,
+#        --jit, --profile), other arguments are ignored
+# @err InterpretError with exit code of the error
+# @return tuple of exit code and dictionary of stats (keys 'insts' and 'vars')
+def runProgram(source, input_file=None, output_file=None, cache_dir=None, buffering=OUTPUT_BUFFER_SIZE,
+               error_file=None, options=None):
+    program = Interpret()
+    if options is not None:
+        program.setOptions(argumentParser().parse_args(options))
+    code = program.run(source, input_file, output_file, cache_dir, buffering, error_file)
+    return code, {'insts': program.ExecutedInstructions, 'vars': program.DefinedVars}
+
+
+# returns version of the interpret for the compiled programs, it is hash of the
+# interpret source and the python version, so any change makes old compiled programs invalid
+# @return the version as bytes
+def interpretVersion():
+    global compiledVersion
+    if compiledVersion is None:
+        with open(__file__, 'rb') as interpret_source:
+            digest = hashlib.sha256(interpret_source.read())
+        digest.update(sys.version.encode())
+        compiledVersion = digest.digest()
+    return compiledVersion
+
+
+compiledVersion = None  # < cached result of interpretVersion
+
+
+# returns default directory of the cache of compiled programs (--cache without directory)
+# @return path of the directory
+def defaultCacheDir():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'ippcode20')
+
+
+# command line interface of the interpret
+# @param argv is list of program arguments (sys.argv without program name when None)
+# @return exit code of the interpret
+def main(argv=None):
+    program = Interpret()
+    try:
+        program.files.parseArgs(sys.argv[1:] if argv is None else argv)
+        args = program.files.args
+        source = sys.stdin.buffer if args.source is None else args.source
+        program.setOptions(args)
+        if args.runTranspiled is not None:
+            source = args.runTranspiled
+            program.files.runTranspiled = True
+        if args.compile is not None:
+            program.compile(source, args.compile)
+            return ERR_OK
+        if args.transpile is not None:
+            program.transpile(source, args.transpile)
+            return ERR_OK
+        cache_dir = None
+        if args.cache is not None:
+            cache_dir = args.cache if args.cache != '' else defaultCacheDir()
+        if args.sample is not None:
+            program.sampler = Sampler(program)
+        try:
+            code = program.run(source, sys.stdin if args.input is None else args.input, None, cache_dir, args.buffer)
+        finally:
+            if program.profiler is not None:
+                program.profiler.store(args.profile)
+            if program.sampler is not None:
+                program.sampler.store(args.sample)
+        program.files.makeSTATIfile(program.DefinedVars, program.ExecutedInstructions)
+    except ProgramExit as program_exit:
+        return program_exit.code
+    except InterpretError as error:
+        trace('INTE', "error " + str(error.code) + " " + error.message)
+        return error.code
+    finally:
+        if tracedCategories:
+            setTracing(())
+    return code
 
 
 # --- main ---
 
-program = Interpret()
-program.execute()
+if __name__ == '__main__':
+    sys.exit(main())
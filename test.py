@@ -0,0 +1,456 @@
+#  test script for parse.php and interpret.py, python version of test.php
+#  interpret is loaded once in every worker process and tests are run in it
+#  directly, so the runs do not pay for starting new python process
+#  author : Vojtech Coupek - xcoupe01
+
+import argparse
+import difflib
+import html
+import importlib.util
+import io
+import multiprocessing
+import os
+import re
+import signal
+import subprocess
+import sys
+import time
+import traceback
+
+# --- variables and constants ---
+# exit codes
+ERR_OK = 0  # < successful
+ERR_PARAMS = 10  # < bad combinations of params
+ERR_OPEN = 11  # < cannot open file
+ERR_WRITE = 12  # < cannot write file
+ERR_INTERNAL = 99  # < internal fault
+
+interpret = None  # < interpret module loaded in the worker process
+loadError = None  # < traceback of the failed load of the interpret in the worker process
+
+style = '''
+body  {font-family: 'Arial CE',arial; font-size: 10pt; background-color: #a3a3a3; margin: 20px; }
+table {border: solid #000000 1px;	background: white; border-collapse: collapse; width:100%;}
+table caption {background-color: #D4E5E3;	color: #6B6B77;
+font-weight: bold;	margin: 0px 0px 10px 0px;  border: solid #C5C5C4 1px;  padding: 5px;  text-align: center; }
+
+table thead {font-style: italic; background-color: #DADADA;	color: #6B6B6B;  border: solid #C5C5C4 1px;  padding: 5px;}
+table th {text-align: left;  border: solid #C5C5C4 1px; padding: 4px;  background-color: #DADADA;}
+table tfoot {border: solid #C5C5C4 1px; background: #e0e0e0; }
+table tr {background-color: #FFF9F1;}
+table tr:hover, table tr.sudy:hover {background-color: #bababa;}
+table td {border: solid #000000 1px;  padding: 1px 4px 1px 4px;}
+table tbody td {color: black;  padding: 1px 4px 1px 4px;}
+table tr.zahlavi th {text-align: left;  border: solid #C5C5C4 1px; padding: 4px;  background-color: #DADADA;}
+'''
+
+
+# --- classes ---
+
+# raised in the worker process when the test runs longer than --timeout, it is not derived
+# from Exception, so it does not get caught by the tested scripts
+class TestTimeout(BaseException):
+    pass
+
+
+# --- functions ---
+
+# error function for argparse
+def arg_err(message):
+    exit(ERR_PARAMS)
+
+
+# makes html pair tag without attributes
+# @param tagname is name of the tag
+# @param content is content of the tag, 'noslash' makes only opening tag
+# @return the tag
+def ta(tagname, content=''):
+    if content == '':
+        return '<' + tagname + '/>'
+    if content == 'noslash':
+        return '<' + tagname + '>'
+    return '<' + tagname + '>' + content + '</' + tagname + '>' + '\n'
+
+
+# makes html tag with attributes
+# @param tagname is name of the tag
+# @param params are attributes of the tag
+# @param content is content of the tag, 'noslash' makes only opening tag
+# @return the tag
+def tg(tagname, params='', content=''):
+    if params + content == '':
+        return '<' + tagname + '/>'
+    if params != '':
+        params = ' ' + params
+    if content == 'noslash':
+        return '<' + tagname + params + '>'
+    if content == '':
+        return '<' + tagname + params + '/>' + '\n'
+    return '<' + tagname + params + '>' + content + '</' + tagname + '>' + '\n'
+
+
+# goes through the script arguments and checks their combinations
+# @err when unknown argument appears, when bad combination of arguments is set, when files does not exist
+# @return parsed arguments
+def parseArgs():
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--help', action='store_true')
+    parser.add_argument('--directory', default=None)
+    parser.add_argument('--recursive', action='store_true')
+    parser.add_argument('--parse-script', dest='parser', default=None)
+    parser.add_argument('--int-script', dest='interpret', default=None)
+    parser.add_argument('--parse-only', dest='parseOnly', action='store_true')
+    parser.add_argument('--int-only', dest='intOnly', action='store_true')
+    parser.add_argument('--jexamxml', dest='jexam', default=None)
+    parser.add_argument('--testlist', default=None)
+    parser.add_argument('--match', default=None)
+    parser.add_argument('--jobs', type=int, default=os.cpu_count())
+    parser.add_argument('--int-options', dest='intOptions', default=None)
+    parser.add_argument('--timeout', type=int, default=60)
+    parser.error = arg_err
+    args = parser.parse_args()
+    if args.help:
+        if (args.directory is not None) | args.recursive | (args.parser is not None) | \
+                (args.interpret is not None) | args.parseOnly | args.intOnly | (args.jexam is not None) | \
+                (args.intOptions is not None):
+            exit(ERR_PARAMS)
+        print('Test script for checking both parse.php and/or interpret.py\n'
+              'generates HTML file and outputs it in standard output.\n\n'
+              'Options:\n'
+              '- --help\t\tto print this informations\n'
+              '- --directory=[dir]\tto set the testfiles directory\n'
+              '- --recursive\t\tto tell the script to open all subfiles\n'
+              '- --parse-script=[file]\tto set the source of parse script (default: parse.php)\n'
+              '- --int-script=[file]\tto set the source of interpret script (default: interpret.py)\n'
+              '- --parse-only\t\tto test parser only (jexamxml used)\n'
+              '- --int-only\t\tto test only interpret\n'
+              '- --jexamxml=[file]\tto set the location of jexamxml '
+              '(default: /pub/courses/ipp/jexamxml/jexamxml.jar)\n'
+              '- --testlist=[file]\tto set file that contains list of location of test files or folders\n'
+              '- --match=[regex]\tto set regular expression that must the test file names pass to be tested\n'
+              '- --jobs=[number]\tto set number of worker processes (default: number of CPUs)\n'
+              '- --int-options=[list]\tto set interpret options the tests are run with, separated by space\n'
+              '\t\t\t(e.g. --int-options="--opt=2 --jit"), options in the .opts file\n'
+              '\t\t\tof the test (if it exists) are added to them, the .insts file of the test\n'
+              '\t\t\t(if it exists) sets the expected number of executed instructions\n'
+              '- --timeout=[seconds]\tto set time limit of one test, 0 for no limit (default: 60)')
+        exit(ERR_OK)
+    for path in (args.parser, args.interpret, args.jexam, args.testlist):
+        if (path is not None) and not os.path.isfile(path):
+            exit(ERR_OPEN)
+    if (args.directory is not None) and not os.path.isdir(args.directory):
+        exit(ERR_OPEN)
+    if (args.directory is not None) & (args.testlist is not None):
+        exit(ERR_PARAMS)
+    if (args.intOnly & ((args.parser is not None) | args.parseOnly)) | \
+            (args.parseOnly & ((args.interpret is not None) | args.intOnly)):
+        exit(ERR_PARAMS)
+    if (args.directory is None) & (args.testlist is None):
+        args.directory = '.'
+    if (args.parser is None) & (not args.intOnly):
+        args.parser = 'parse.php'
+    if (args.interpret is None) & (not args.parseOnly):
+        args.interpret = 'interpret.py'
+    if args.jexam is None:
+        args.jexam = '/pub/courses/ipp/jexamxml/jexamxml.jar'
+    if args.match is not None:
+        try:
+            args.match = re.compile(args.match)
+        except re.error:
+            exit(ERR_OPEN)
+    if (args.jobs < 1) | (args.timeout < 0):
+        exit(ERR_PARAMS)
+    if args.intOptions is not None:
+        if args.parseOnly:
+            exit(ERR_PARAMS)
+        args.intOptions = args.intOptions.split()
+    return args
+
+
+# finds all tests (files .src) in directory
+# @param directory is the directory with tests
+# @param recursive says if subdirectories are searched too
+# @return list of test paths without the .src extension
+def scanDirectory(directory, recursive):
+    tests = []
+    if recursive:
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for file in sorted(files):
+                if file.endswith('.src'):
+                    tests.append(os.path.join(root, file[:-4]))
+    else:
+        for file in sorted(os.listdir(directory)):
+            if file.endswith('.src'):
+                tests.append(os.path.join(directory, file[:-4]))
+    return tests
+
+
+# makes list of tests from testlist file or from directory
+# missing .in, .out and .rc files of the tests are generated
+# @param args are script arguments
+# @err when testlist file contains test that does not exist
+# @return list of test paths without the .src extension
+def loadTests(args):
+    tests = []
+    if args.testlist is not None:
+        with open(args.testlist, 'r', encoding='UTF-8') as testlist:
+            for line in testlist:
+                line = line.strip()
+                if line.endswith('.src'):
+                    if not os.path.isfile(line):
+                        exit(ERR_OPEN)
+                    tests.append(line[:-4])
+                elif os.path.isdir(line):
+                    tests += scanDirectory(line, args.recursive)
+    else:
+        tests = scanDirectory(args.directory, args.recursive)
+    if args.match is not None:
+        tests = [test for test in tests if args.match.search(os.path.basename(test))]
+    for test in tests:
+        for extension, content in (('.in', ''), ('.out', ''), ('.rc', '0')):
+            if not os.path.isfile(test + extension):
+                with open(test + extension, 'w', encoding='UTF-8') as file:
+                    file.write(content)
+    return tests
+
+
+# raises TestTimeout, handler of SIGALRM in the worker processes
+def timeoutHandler(signum, frame):
+    raise TestTimeout()
+
+
+# loads interpret module, initializer of the worker processes
+# errors of the load are kept and every test then fails with them (raising them here
+# would make the pool start new workers forever)
+# @param path is path to interpret.py
+def loadInterpret(path):
+    global interpret, loadError
+    if hasattr(signal, 'SIGALRM'):
+        signal.signal(signal.SIGALRM, timeoutHandler)
+    if path is None:
+        return
+    try:
+        spec = importlib.util.spec_from_file_location('interpret', path)
+        interpret = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(interpret)
+    except Exception:
+        interpret = None
+        loadError = traceback.format_exc()
+
+
+# runs XML program in the loaded interpret, debug output of the program (DPRINT, BREAK)
+# is captured too, so it does not get to the output of the script
+# @param source is path to the XML file or XML document in bytes
+# @param input_path is path to the input file
+# @param options is list of interpret options (None for default execution)
+# @err other exceptions than errors of the program are passed to the caller
+# @return tuple of return code, output of the program and number of executed instructions
+#         (None when the program ended with error)
+def runInterpret(source, input_path, options):
+    if interpret is None:
+        raise ImportError('interpret could not be loaded\n' + loadError)
+    output = io.StringIO()
+    insts = None
+    try:
+        code, stats = interpret.runProgram(source, input_path, output, error_file=io.StringIO(), options=options)
+        insts = stats['insts']
+    except interpret.InterpretError as error:
+        code = error.code
+    except SystemExit as error:
+        code = error.code if isinstance(error.code, int) else 1
+    return code, output.getvalue(), insts
+
+
+# gets interpret options of the test, options from its .opts file (if it exists) are added
+# to the options set by --int-options
+# @param test is path to the test without extension
+# @param args are script arguments
+# @return list of interpret options (None for default execution)
+def testOptions(test, args):
+    if not os.path.isfile(test + '.opts'):
+        return args.intOptions
+    with open(test + '.opts', 'r', encoding='UTF-8') as file:
+        return (args.intOptions or []) + file.read().split()
+
+
+# makes result of the failed test with different return codes
+# @param returned is return code of the script
+# @param expected is content of the .rc file
+# @return result of the test
+def failCode(returned, expected):
+    return 'fail#' + 'Different return code expected - returned:<b>' + str(returned) + \
+           '</b> expected:<b>' + expected + '</b>'
+
+
+# compares output of the script with the .out file of the test
+# @param test is path to the test without extension
+# @param output is output of the script
+# @return result of the test
+def compareOutput(test, output):
+    with open(test + '.out', 'r', encoding='UTF-8', errors='replace', newline='') as file:
+        expected = file.read()
+    if output == expected:
+        return 'OK'
+    diff = difflib.unified_diff(output.splitlines(), expected.splitlines(), 'script_output', 'expected_output',
+                                lineterm='')
+    return 'fail#' + 'Different script outputs: diff [script_output] [expected_output] <br>' + \
+           html.escape('\n'.join(diff)).replace('\n', '<br>')
+
+
+# compares number of executed instructions with the .insts file of the test (if it exists)
+# @param test is path to the test without extension
+# @param insts is number of executed instructions (None when the program ended with error)
+# @return result of the test
+def compareInsts(test, insts):
+    if (insts is None) or not os.path.isfile(test + '.insts'):
+        return 'OK'
+    with open(test + '.insts', 'r', encoding='UTF-8') as file:
+        expected = file.read().strip()
+    if str(insts) == expected:
+        return 'OK'
+    return 'fail#' + 'Different number of executed instructions - returned:<b>' + str(insts) + \
+           '</b> expected:<b>' + expected + '</b>'
+
+
+# runs one test and checks its results
+# @param test is path to the test without extension
+# @param args are script arguments
+# @err exceptions of the scripts and TestTimeout are passed to the caller
+# @return result of the test ('OK' or 'fail#details')
+def checkTest(test, args):
+    with open(test + '.rc', 'r', encoding='UTF-8') as file:
+        expected_rc = file.read()
+    try:
+        expected_code = int(expected_rc.strip())
+    except ValueError:
+        expected_code = None
+    if args.parseOnly:
+        with open(test + '.src', 'rb') as file:
+            parsed = subprocess.run(['php', '-f', args.parser], stdin=file, capture_output=True)
+        if parsed.returncode != expected_code:
+            return failCode(parsed.returncode, expected_rc)
+        if parsed.returncode > 0:
+            return 'OK'
+        with open(test + '.tmp', 'wb') as file:
+            file.write(parsed.stdout)
+        compared = subprocess.run(['java', '-jar', args.jexam, test + '.out', test + '.tmp'],
+                                  capture_output=True, text=True)
+        os.remove(test + '.tmp')
+        if compared.returncode == 0:
+            return 'OK'
+        return 'fail#' + 'Different script outputs: jexamxml [script_output] [expected_output] <br>' + \
+            html.escape(compared.stdout).replace('\n', '<br>')
+    if args.intOnly:
+        code, output, insts = runInterpret(test + '.src', test + '.in', testOptions(test, args))
+        if code != expected_code:
+            return failCode(code, expected_rc)
+        if code > 0:
+            return compareInsts(test, insts)
+        result = compareOutput(test, output)
+        return compareInsts(test, insts) if result == 'OK' else result
+    with open(test + '.src', 'rb') as file:
+        parsed = subprocess.run(['php', '-f', args.parser], stdin=file, capture_output=True)
+    # like 'parse.php | interpret.py' in test.php, the return code of the parser is not checked
+    # and the interpret gets whatever the parser wrote (nothing when it failed)
+    code, output, insts = runInterpret(parsed.stdout, test + '.in', testOptions(test, args))
+    if code != expected_code:
+        return failCode(code, expected_rc.replace('\n', ''))
+    result = compareOutput(test, output)
+    return compareInsts(test, insts) if result == 'OK' else result
+
+
+# runs one test, function executed by the worker processes
+# unexpected exceptions of the interpret and the tests that run out of time are failed tests
+# @param job is tuple of test path and script arguments
+# @return tuple of test path and result of the test ('OK' or 'fail#details')
+def runTest(job):
+    test, args = job
+    if hasattr(signal, 'SIGALRM'):
+        signal.alarm(args.timeout)
+    try:
+        return test, checkTest(test, args)
+    except TestTimeout:
+        return test, 'fail#' + 'Time limit exceeded - the test did not finish in <b>' + str(args.timeout) + \
+            '</b> s'
+    except Exception:
+        return test, 'fail#' + 'Internal error - returned:<b>' + str(ERR_INTERNAL) + '</b><br>' + \
+            html.escape(traceback.format_exc()).replace('\n', '<br>')
+    finally:
+        if hasattr(signal, 'SIGALRM'):
+            signal.alarm(0)
+
+
+# runs all tests in pool of worker processes
+# @param tests is list of tests
+# @param args are script arguments
+# @return dictionary of results (key is test path) in order of tests
+def runTests(tests, args):
+    jobs = [(test, args) for test in tests]
+    with multiprocessing.Pool(args.jobs, loadInterpret, (args.interpret,)) as pool:
+        return dict(pool.imap(runTest, jobs, chunksize=max(1, len(jobs) // (args.jobs * 8))))
+
+
+# formats number the way php echo does
+# @param number is the number to be formatted
+# @return formatted number
+def phpNumber(number):
+    return '%.14G' % number
+
+
+# makes HTML summary of the tests
+# @param results is dictionary of results (key is test path)
+# @param args are script arguments
+# @return the HTML document
+def makeHtml(results, args):
+    o = ta('h1', 'Test results - ' + time.strftime('%d.%m. %H:%M:%S', time.gmtime(time.time() + 3600)))
+    n = 0
+    fails = 0
+    success = 0
+    o += ta('br')
+    o += ta('h3', 'test settings:')
+    o += ta('ul')
+    o += ta('li', 'directory: ' + (os.path.realpath(args.directory) if args.directory is not None else ''))
+    o += ta('li', 'recursive: ' + ('&#128504;' if args.recursive else '&#128502;'))
+    o += ta('li', 'parse script: ' + (args.parser or ''))
+    o += ta('li', 'interpret script: ' + (args.interpret or ''))
+    o += ta('li', 'parse only: ' + ('&#128504;' if args.parseOnly else '&#128502;'))
+    o += ta('li', 'interpret only: ' + ('&#128504;' if args.intOnly else '&#128502;'))
+    o += ta('li', 'interpret options: ' + html.escape(' '.join(args.intOptions or [])))
+    o += ta('li', 'JexamXML: ' + args.jexam)
+    o += ta('br')
+    for test, result in results.items():
+        if result.startswith('fail#'):
+            fails += 1
+            res = tg('td', 'width=5% align="middle" bgcolor=ff7373', '<b>&#128502;</b>')
+            dets = tg('td', '',
+                      tg('span', 'onclick="document.getElementById(\'ID' + str(n) +
+                         '\').style.display=(document.getElementById(\'ID' + str(n) +
+                         '\').style.display==\'block\')?\'none\':\'block\';" ', '<b>Details available</b>') +
+                      tg('div', 'id="ID' + str(n) + '" style="display:none;"', result[5:]))
+        else:
+            success += 1
+            res = tg('td', 'width=5% align="middle" bgcolor=9bff8a', '<b>&#128504;</b>')
+            dets = ta('td', ' ')
+        n += 1
+        o += ta('tr', tg('td', 'width=5% align="middle"', str(n) + res + ta('td', test)) + dets)
+    percentage = success / (success + fails) * 100 if success + fails > 0 else 0
+    o = ta('table', ta('caption', 'total tests done : ' + str(n) + '<br>percentage : ' + phpNumber(percentage) +
+                       ' %<br>successful : ' + str(success) + '<br>failed : ' + str(fails)) +
+           ta('th', 'Number') + ta('th', 'Result') + ta('th', 'Test File') + ta('th', 'Details (click to view)') + o)
+    o = ta('html', ta('head', tg('meta', 'http-equiv="Content-Type" content="text/html;" charset="utf-8"') +
+                      ta('title', 'Test results') + ta('style', style)) + ta('body', o))
+    return '<!DOCTYPE html>' + '\n' + o
+
+
+# --- main ---
+
+if __name__ == '__main__':
+    arguments = parseArgs()
+    report = makeHtml(runTests(loadTests(arguments), arguments), arguments)
+    try:
+        print(report, end='')
+        sys.stdout.flush()
+    except OSError:
+        exit(ERR_WRITE)
+    exit(ERR_OK)
@@ -0,0 +1,117 @@
+#  tests of compiled programs and of the cache of compiled programs of interpret.py
+#  run by: python3 -m unittest discover tests
+#  author : Vojtech Coupek - xcoupe01
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+INTERPRET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'interpret.py')
+
+program = '''<?xml version="1.0" encoding="UTF-8"?>
+<program language="IPPcode20">
+  <instruction order="1" opcode="DEFVAR"><arg1 type="var">GF@i</arg1></instruction>
+  <instruction order="2" opcode="MOVE"><arg1 type="var">GF@i</arg1><arg2 type="int">0</arg2></instruction>
+  <instruction order="3" opcode="LABEL"><arg1 type="label">loop</arg1></instruction>
+  <instruction order="4" opcode="WRITE"><arg1 type="var">GF@i</arg1></instruction>
+  <instruction order="5" opcode="ADD"><arg1 type="var">GF@i</arg1><arg2 type="var">GF@i</arg2><arg3 type="int">1</arg3></instruction>
+  <instruction order="6" opcode="JUMPIFNEQ"><arg1 type="label">loop</arg1><arg2 type="var">GF@i</arg2><arg3 type="int">%d</arg3></instruction>
+  <instruction order="7" opcode="WRITE"><arg1 type="string">%s</arg1></instruction>
+</program>
+'''
+
+
+# runs the interpret in new process
+# @param arguments are arguments of the interpret
+# @return tuple of exit code and output of the interpret
+def runInterpret(*arguments):
+    result = subprocess.run([sys.executable, INTERPRET, '--input=' + os.devnull] + list(arguments),
+                            capture_output=True, text=True)
+    return result.returncode, result.stdout
+
+
+class CompiledTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, 'program.xml')
+        self.compiled = os.path.join(self.directory.name, 'program.ippc')
+        self.writeSource(3, 'end')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    # writes the test program to the source file
+    def writeSource(self, count, text):
+        with open(self.source, 'w', encoding='UTF-8') as source:
+            source.write(program % (count, text))
+
+    # returns files in the cache directory
+    def cacheFiles(self, cache):
+        return sorted(os.listdir(cache)) if os.path.isdir(cache) else []
+
+    def testCompileRoundTrip(self):
+        self.assertEqual(runInterpret('--source=' + self.source, '--compile=' + self.compiled), (0, ''))
+        for options in ([], ['--opt=2'], ['--closures'], ['--aot'], ['--jit']):
+            self.assertEqual(runInterpret('--source=' + self.compiled, *options), (0, '012end'))
+
+    def testCompileOptimized(self):
+        self.assertEqual(runInterpret('--source=' + self.source, '--compile=' + self.compiled, '--opt=2'), (0, ''))
+        self.assertEqual(runInterpret('--source=' + self.compiled), (0, '012end'))
+
+    def testDamagedCompiled(self):
+        runInterpret('--source=' + self.source, '--compile=' + self.compiled)
+        with open(self.compiled, 'rb') as compiled:
+            data = compiled.read()
+        for damaged in (data[:-1], data[:-1] + bytes([data[-1] ^ 1]), data[:60], data + b'\0'):
+            with open(self.compiled, 'wb') as compiled:
+                compiled.write(damaged)
+            self.assertEqual(runInterpret('--source=' + self.compiled), (11, ''))
+
+    def testCacheNotUsedByDefault(self):
+        self.assertEqual(runInterpret('--source=' + self.source), (0, '012end'))
+        self.assertEqual(os.listdir(self.directory.name), ['program.xml'])
+
+    def testCacheHit(self):
+        cache = os.path.join(self.directory.name, 'cache')
+        self.assertEqual(runInterpret('--source=' + self.source, '--cache=' + cache), (0, '012end'))
+        cached = self.cacheFiles(cache)
+        self.assertEqual(len(cached), 1)
+        # the cached program is replaced by compiled other program, the cache is hit
+        # when the output is the output of the other program
+        other = os.path.join(self.directory.name, 'other.xml')
+        os.rename(self.source, other)
+        self.writeSource(5, 'other')
+        runInterpret('--source=' + self.source, '--compile=' + os.path.join(cache, cached[0]))
+        os.rename(other, self.source)
+        self.assertEqual(runInterpret('--source=' + self.source, '--cache=' + cache), (0, '01234other'))
+        self.assertEqual(self.cacheFiles(cache), cached)
+
+    def testCacheInvalidation(self):
+        cache = os.path.join(self.directory.name, 'cache')
+        self.assertEqual(runInterpret('--source=' + self.source, '--cache=' + cache), (0, '012end'))
+        self.writeSource(2, 'changed')
+        self.assertEqual(runInterpret('--source=' + self.source, '--cache=' + cache), (0, '01changed'))
+        self.assertEqual(len(self.cacheFiles(cache)), 2)
+        self.assertEqual(runInterpret('--source=' + self.source, '--cache=' + cache), (0, '01changed'))
+
+    def testDamagedCache(self):
+        cache = os.path.join(self.directory.name, 'cache')
+        runInterpret('--source=' + self.source, '--cache=' + cache)
+        cached = os.path.join(cache, self.cacheFiles(cache)[0])
+        with open(cached, 'r+b') as compiled:
+            compiled.truncate(os.path.getsize(cached) - 1)
+        self.assertEqual(runInterpret('--source=' + self.source, '--cache=' + cache), (0, '012end'))
+        self.assertEqual(runInterpret('--source=' + self.source, '--cache=' + cache), (0, '012end'))
+
+    def testDefaultCacheDirectory(self):
+        environment = dict(os.environ, XDG_CACHE_HOME=self.directory.name)
+        result = subprocess.run([sys.executable, INTERPRET, '--source=' + self.source, '--input=' + os.devnull,
+                                 '--cache'], capture_output=True, text=True, env=environment)
+        self.assertEqual((result.returncode, result.stdout), (0, '012end'))
+        self.assertEqual(len(self.cacheFiles(os.path.join(self.directory.name, 'ippcode20'))), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()